@@ -1,7 +1,39 @@
-terraform state rm module.fmc_interface_groups.fmc_interface_group.netflow_managed
-terraform state rm module.fmc_network_objects.fmc_network.attacker
-terraform state rm module.fmc_network_objects.fmc_network.data_center
-terraform state rm module.fmc_network_objects.fmc_network.dmz
-terraform state rm module.fmc_network_objects.fmc_network.outside
-terraform state rm module.fmc_network_objects.fmc_network.transport
-terraform destroy -auto-approve
\ No newline at end of file
+#!/bin/bash
+# Delete what the pipeline created on cdFMC through the REST API, in dependency order and
+# layer by layer (VPN endpoints -> VPN topologies -> OSPF -> static routes -> network objects
+# -> interface groups), then confirm the tenant is clean. Preview with --dry-run.
+# If the teardown fails, stop before touching the Terraform state; --force continues anyway.
+
+force=false
+args=()
+for arg in "$@"; do
+  if [[ "$arg" == "--force" ]]; then force=true; else args+=("$arg"); fi
+done
+
+# Same isolated environment as the modules' local-exec scripts
+python3 -m venv .venv && .venv/bin/pip install -q -r scripts/teardown/requirements.txt || {
+  echo "❌ Could not set up .venv for the teardown script" >&2
+  exit 1
+}
+
+if [[ " ${args[*]} " == *" --dry-run "* ]]; then
+  exec .venv/bin/python3 scripts/teardown/teardown.py --state terraform.tfstate --tfvars terraform.tfvars "${args[@]}"
+fi
+if ! .venv/bin/python3 scripts/teardown/teardown.py --state terraform.tfstate --tfvars terraform.tfvars "${args[@]}"; then
+  if [[ "$force" != true ]]; then
+    echo "❌ Teardown failed or left objects behind (see above); not removing them from the Terraform state." >&2
+    echo "   Fix the cause and re-run, or pass --force to continue with terraform destroy anyway." >&2
+    exit 1
+  fi
+  echo "⚠️  Teardown left objects behind (see above); continuing with terraform destroy (--force)"
+fi
+
+# Objects deleted above refresh as gone; these are never destroyed by terraform (one state write, not five)
+terraform state rm \
+  module.fmc_interface_groups.fmc_interface_group.netflow_managed \
+  module.fmc_network_objects.fmc_network.attacker \
+  module.fmc_network_objects.fmc_network.data_center \
+  module.fmc_network_objects.fmc_network.dmz \
+  module.fmc_network_objects.fmc_network.outside \
+  module.fmc_network_objects.fmc_network.transport
+terraform destroy -auto-approve
@@ -21,75 +21,72 @@ resource "null_resource" "install_requirements_for_import" {
   }
 }
 
+# --wait blocks until the import task finishes (and fails the apply if it fails),
+# so downstream lookups run as soon as the imported objects exist
 resource "null_resource" "import_firewall_config" {
   depends_on = [null_resource.install_requirements_for_import]
   provisioner "local-exec" {
-    command     = ".venv/bin/python3 main.py --host https://${var.cdfmc_host} --token ${var.scc_token} --backup-file automation_backup.sfo"
+    command     = ".venv/bin/python3 main.py --host https://${var.cdfmc_host} --token ${var.scc_token} --backup-file automation_backup.sfo --wait"
     working_dir = "${path.root}/scripts/config-import"
     interpreter = ["/bin/bash", "-c"]
   }
 }
 
-resource "time_sleep" "wait_for_import" {
-  depends_on      = [null_resource.import_firewall_config]
-  create_duration = "2m"
-}
-
 ################################################################################################
 # Security Zone Data Sources
 ################################################################################################
 data "fmc_security_zone" "WAN" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "WAN"
 }
 
 data "fmc_security_zone" "DMZ" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "DMZ"
 }
 
 data "fmc_security_zone" "INTERNET" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "INTERNET"
 }
 
 data "fmc_security_zone" "DATA-CENTER" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "DATA-CENTER"
 }
 
 data "fmc_security_zone" "ATTACKER" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "ATTACKER"
 }
 
 data "fmc_security_zone" "TRANSPORT" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "Transport"
 }
 
 data "fmc_security_zone" "APPS" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "APPS"
 }
 
 data "fmc_security_zone" "DCtoMCD" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "DCtoMCD"
 }
 
 data "fmc_security_zone" "SecureAccess" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "SecureAccess"
 }
 
 data "fmc_security_zone" "TUNNEL_ZONE" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "TUNNEL-ZONE"
 }
 
 data "fmc_ftd_nat_policy" "dc_firewall_nat_policy" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   name       = "HQ NAT Policy"
 }
 
@@ -97,13 +94,13 @@ data "fmc_ftd_nat_policy" "dc_firewall_nat_policy" {
 # Device Onboarding
 ################################################################################
 data "fmc_access_control_policy" "fmc_access_policy" {
-  depends_on = [time_sleep.wait_for_import]
+  depends_on = [null_resource.import_firewall_config]
   count      = length(var.policies)
   name       = var.policies[count.index]
 }
 
 resource "cdo_ftd_device" "ngfw" {
-  depends_on         = [time_sleep.wait_for_import]
+  depends_on         = [null_resource.import_firewall_config]
   count              = length(var.ftd_ips)
   name               = var.device_name[count.index]
   licenses           = ["BASE", "MALWARE", "THREAT", "URLFilter"]
@@ -126,17 +123,22 @@ resource "null_resource" "install_requirements_for_onboarding" {
   }
 }
 
+# All FTDs are onboarded by one run with concurrent SSH sessions (per-host timeouts,
+# JSON result per host), so the step takes as long as the slowest device
 resource "null_resource" "ftd_onboarding_script" {
   depends_on = [null_resource.install_requirements_for_onboarding]
-  count      = length(var.ftd_ips)
 
   triggers = {
-    generated_command = cdo_ftd_device.ngfw[count.index].generated_command
-    host_ip           = var.ftd_ips[count.index]
+    hosts = jsonencode([
+      for i, ip in var.ftd_ips : {
+        host        = ip
+        gen_command = cdo_ftd_device.ngfw[i].generated_command
+      }
+    ])
   }
 
   provisioner "local-exec" {
-    command     = ".venv/bin/python3 cdo.py --host ${self.triggers.host_ip} --username admin --password dCloud123! --gen_command '${self.triggers.generated_command}'"
+    command     = ".venv/bin/python3 cdo.py --username admin --password dCloud123! --hosts '${self.triggers.hosts}'"
     working_dir = "${path.root}/scripts/device-onboarding"
     interpreter = ["/bin/bash", "-c"]
   }
@@ -148,16 +150,27 @@ resource "cdo_ftd_device_onboarding" "ftd_onboarding" {
   ftd_uid    = cdo_ftd_device.ngfw[count.index].id
 }
 
-resource "time_sleep" "wait_for_onboarding" {
-  depends_on      = [cdo_ftd_device_onboarding.ftd_onboarding]
-  create_duration = "2m"
+# Poll cdFMC until every device record is registered instead of sleeping a fixed 2 minutes;
+# add --healthy to also wait for a healthy status. Fails the apply after --deadline seconds.
+resource "null_resource" "wait_for_onboarding" {
+  depends_on = [cdo_ftd_device_onboarding.ftd_onboarding, null_resource.install_requirements_for_import]
+
+  triggers = {
+    devices = jsonencode(var.device_name)
+  }
+
+  provisioner "local-exec" {
+    command     = ".venv/bin/python3 ../common/fmc_ready.py --host ${var.cdfmc_host} --token ${var.scc_token} ${join(" ", formatlist("--device '%s'", var.device_name))} --deadline 900"
+    working_dir = "${path.root}/scripts/config-import"
+    interpreter = ["/bin/bash", "-c"]
+  }
 }
 
 ################################################################################################
 # Devices Data Sources
 ################################################################################################
 data "fmc_device" "devices" {
-  depends_on = [time_sleep.wait_for_onboarding]
+  depends_on = [null_resource.wait_for_onboarding]
   count      = length(var.ftd_ips)
   name       = var.device_name[count.index]
 }
@@ -5,7 +5,7 @@ output "devices" {
 
 output "wait_for_onboarding" {
   description = "Wait for onboarding completion"
-  value       = time_sleep.wait_for_onboarding
+  value       = null_resource.wait_for_onboarding
 }
 
 output "security_zones" {
@@ -21,12 +21,13 @@ resource "null_resource" "install_requirements_for_ospf" {
   }
 }
 
-# Execute OSPF configuration using the script in the scripts directory
+# Execute OSPF configuration for all devices in one run (devices are configured concurrently).
+# --reconcile only PUTs when the live config drifted, so re-applies leave nothing to deploy.
 resource "null_resource" "configure_ospf" {
   depends_on = [null_resource.install_requirements_for_ospf]
 
   provisioner "local-exec" {
-    command     = ".venv/bin/python3 cdfmc_ospf_automation.py --fmc-url '${var.cdfmc_host}' --api-key '${var.scc_token}' --device-id '${var.devices[0].id}' --network-ids '${jsonencode(var.network_ids)}'"
+    command     = ".venv/bin/python3 cdfmc_ospf_automation.py --fmc-url '${var.cdfmc_host}' --api-key '${var.scc_token}' --device-ids '${jsonencode(var.devices[*].id)}' --network-ids '${jsonencode(var.network_ids)}' --reconcile"
     working_dir = "${path.root}/scripts/ospf"
     interpreter = ["/bin/bash", "-c"]
   }
@@ -35,7 +36,7 @@ resource "null_resource" "configure_ospf" {
   triggers = {
     fmc_url     = var.cdfmc_host
     api_key     = md5(var.scc_token)
-    device_id   = var.devices[0].id
+    device_ids  = jsonencode(var.devices[*].id)
     network_ids = jsonencode(var.network_ids)
   }
 }
@@ -45,15 +45,15 @@ resource "fmc_policy_assignment" "dc_nat_policy" {
   ]
 }
 
+# One run assigns the platform policy to every FTD (a single PolicyAssignment with all targets)
 resource "null_resource" "platform_policy_assignment" {
-  count = length(var.ftd_ips)
   triggers = {
-    device_id = var.devices[0].id
+    device_ids = jsonencode(slice(var.devices[*].id, 0, length(var.ftd_ips)))
     # run_every_time = timestamp()
   }
 
   provisioner "local-exec" {
-    command     = ".venv/bin/python3 platsettings.py --host ${var.cdfmc_host} --token ${var.scc_token} --deviceid ${var.devices[count.index].id} --is_cdfmc 'true' --platformpolicy_name 'vFTD-platform-policy'"
+    command     = ".venv/bin/python3 platsettings.py --host ${var.cdfmc_host} --token ${var.scc_token} --deviceid '${jsonencode(slice(var.devices[*].id, 0, length(var.ftd_ips)))}' --is_cdfmc 'true' --platformpolicy_name 'vFTD-platform-policy'"
     working_dir = "${path.module}/../../scripts/config-import"
     interpreter = ["/bin/bash", "-c"]
   }
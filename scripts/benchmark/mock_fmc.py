@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the cdFMC REST API (standard library only)
+
+Implements the endpoints the automation scripts call so they can be run and
+timed without a tenant: ospfv2process, ospfv2routes, ipv4staticroutes, physicalinterfaces,
+network and host objects (including ?bulk=true), ftdplatformsettingspolicies,
+policyassignments, operational imports and exports (with download),
+deployabledevices, deploymentrequests and taskstatuses (plus on-prem generatetoken/refreshtoken).
+Listings are paginated like FMC; latency, 429 throttling and how long tasks
+take are configurable; every request is logged for the benchmark runner.
+
+Usage:
+    python3 mock_fmc.py --port 8443 --latency 80 --rate-limit 120
+    python3 ../ospf/cdfmc_ospf_automation.py --fmc-url http://127.0.0.1:8443 ...
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# Shared helpers live in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import template_endpoint
+
+DEFAULT_PAGE_LIMIT = 25  # FMC default when no limit is given
+MAX_PAGE_LIMIT = 1000
+PLATFORM_POLICY_NAME = "vFTD-platform-policy"
+
+CONFIG_PREFIX = r"/api/fmc_config/v1/domain/[^/]+/"
+DEVICE_PREFIX = CONFIG_PREFIX + r"devices/devicerecords/(?P<device>[^/]+)/routing/"
+INTERFACES_PREFIX = CONFIG_PREFIX + r"devices/devicerecords/(?P<device>[^/]+)/physicalinterfaces"
+PHYSICAL_INTERFACES = 8  # GigabitEthernet0/0-0/7 on every device
+BULK_LIMIT = 1000  # Objects per ?bulk=true request
+DEVICE_WRITE = re.compile(CONFIG_PREFIX + r"devices/devicerecords/(?P<device>[^/]+)/")
+
+
+class MockTask:
+    """Task state machine: PENDING -> RUNNING -> terminal state after `seconds`"""
+
+    def __init__(self, kind, seconds, devices=(), failed_devices=()):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.seconds = seconds
+        self.devices = list(devices)
+        self.failed_devices = set(failed_devices)
+        self.created = time.monotonic()
+
+    def to_dict(self):
+        elapsed = time.monotonic() - self.created
+        done = elapsed >= self.seconds
+        if self.kind == "deployment":
+            ok, failed, running = "DEPLOYMENT_SUCCEEDED", "DEPLOYMENT_FAILED", "DEPLOYING"
+        elif self.kind == "export":
+            ok, failed, running = "EXPORT_SUCCESS", "EXPORT_FAILED", "EXPORT_IN_PROGRESS"
+        else:
+            ok, failed, running = "IMPORT_SUCCESS", "IMPORT_FAILED", "IMPORT_IN_PROGRESS"
+
+        sub_tasks = [{"target": {"id": device, "type": "Device"},
+                      "status": (failed if device in self.failed_devices else ok) if done else running}
+                     for device in self.devices]
+        if not done:
+            status = "PENDING" if elapsed < self.seconds * 0.2 else running
+        else:
+            status = failed if self.failed_devices & set(self.devices) else ok
+        return {"id": self.id, "type": "TaskStatus", "taskType": self.kind.upper(),
+                "status": status, "message": f"{self.kind} {status.lower()}", "subTasks": sub_tasks}
+
+
+class MockState:
+    """Configuration objects, tasks and the request log shared by all handler threads"""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=0, throttle_fraction=0.0,
+                 task_seconds=3.0, policies=50, fail_devices="", export_bytes=4 * 1048576):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.throttle_fraction = throttle_fraction
+        self.task_seconds = task_seconds
+        self.policy_count = policies
+        self.fail_devices = fail_devices
+        # Every export returns the same bytes, like re-exporting an unchanged device
+        self.export_data = random.Random(0).randbytes(export_bytes)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all objects, tasks and logged requests"""
+        with self.lock:
+            self.processes = set()
+            self.routes = {}
+            self.interfaces = {}
+            self.static_routes = {}
+            self.objects = {"networks": {}, "hosts": {}}
+            self.pending = {}  # device -> version (ms) of its oldest undeployed change
+            self.assignments = {}
+            self.tasks = {}
+            self.window = []
+            self.log = []
+            names = [PLATFORM_POLICY_NAME] + [f"platform-policy-{i}" for i in range(1, self.policy_count)]
+            self.policies = [{"id": str(uuid.uuid5(uuid.NAMESPACE_URL, name)), "type": "FTDPlatformSettingsPolicy",
+                              "name": name} for name in names]
+
+    def throttled(self):
+        """Return Retry-After seconds if this request should get a 429, else None"""
+        if self.throttle_fraction and random.random() < self.throttle_fraction:
+            return 1
+        if not self.rate_limit:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 60]
+            if len(self.window) >= self.rate_limit:
+                return max(1, int(60 - (now - self.window[0])) + 1)
+            self.window.append(now)
+        return None
+
+    def device_interfaces(self, device):
+        """A device's physical interfaces (unconfigured until first PUT); call with the lock held"""
+        if device not in self.interfaces:
+            self.interfaces[device] = {}
+            for port in range(PHYSICAL_INTERFACES):
+                name = f"GigabitEthernet0/{port}"
+                interface_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{device}/{name}"))
+                self.interfaces[device][interface_id] = {"id": interface_id, "type": "PhysicalInterface", "name": name,
+                                                         "mode": "NONE", "enabled": False, "MTU": 1500}
+        return self.interfaces[device]
+
+    def mark_pending(self, device):
+        """A write to a device leaves it with changes to deploy"""
+        with self.lock:
+            self.pending[device] = int(time.time() * 1000)
+
+    def deployable(self):
+        with self.lock:
+            return [{"id": device, "type": "DeployableDevice", "name": device, "version": str(version),
+                     "device": {"id": device, "type": "Device", "name": device},
+                     "canBeDeployed": True, "upToDate": False} for device, version in self.pending.items()]
+
+    def add_task(self, kind, devices=()):
+        failed = [d for d in devices if self.fail_devices and self.fail_devices in d]
+        task = MockTask(kind, self.task_seconds, devices, failed)
+        with self.lock:
+            self.tasks[task.id] = task
+        return task
+
+    def record(self, method, path, status, seconds, size):
+        with self.lock:
+            self.log.append({"method": method, "endpoint": template_endpoint(path), "status": status,
+                             "seconds": seconds, "bytes": size})
+
+    def snapshot_log(self):
+        with self.lock:
+            return list(self.log)
+
+
+def paginate(items, query, expanded_fields=None):
+    """Return an FMC-style page (items + paging) for offset/limit query parameters"""
+    offset = int(query.get('offset', ['0'])[0])
+    limit = min(int(query.get('limit', [str(DEFAULT_PAGE_LIMIT)])[0]), MAX_PAGE_LIMIT)
+    expanded = query.get('expanded', ['false'])[0].lower() == 'true'
+    page = items[offset:offset + limit]
+    if not expanded:
+        page = [{key: item[key] for key in expanded_fields or ("id", "type", "name") if key in item} for item in page]
+    paging = {"offset": offset, "limit": limit, "count": len(items), "pages": -(-len(items) // limit) if limit else 0}
+    if offset + limit < len(items):
+        paging["next"] = [f"?offset={offset + limit}&limit={limit}"]
+    return {"items": page, "paging": paging}
+
+
+class MockFMCHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    server_version = "MockFMC/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body=None, extra_headers=None):
+        data = json.dumps(body if body is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        return status
+
+    def _read_body(self):
+        """Read the whole body (Content-Length or chunked); returns raw bytes"""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return data
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _drain_body(self, chunk_size=256 * 1024):
+        """Discard a (possibly large) upload without buffering it; returns its size"""
+        remaining = int(self.headers.get("Content-Length", 0))
+        total = remaining
+        while remaining > 0:
+            data = self.rfile.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+        return total
+
+    def _json_body(self):
+        try:
+            return json.loads(self._read_body() or b"{}")
+        except ValueError:
+            return None
+
+    def _handle(self, method):
+        start = time.perf_counter()
+        split = urlsplit(self.path)
+        retry_after = self.state.throttled()
+        if retry_after is not None:
+            self._read_body()
+            status = self._send(429, {"error": {"messages": [{"description": "Too many requests"}]}},
+                                {"Retry-After": str(retry_after)})
+        else:
+            if self.state.latency or self.state.jitter:
+                time.sleep(self.state.latency + random.uniform(0, self.state.jitter))
+            status = self._route(method, split.path, parse_qs(split.query))
+            device_write = DEVICE_WRITE.match(split.path)
+            if device_write and method != "GET" and 200 <= status < 300:
+                self.state.mark_pending(device_write.group('device'))
+        request_bytes = int(self.headers.get("Content-Length", 0) or 0)
+        self.state.record(method, split.path, status, time.perf_counter() - start, request_bytes)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _route(self, method, path, query):
+        state = self.state
+
+        if path.endswith(("/auth/generatetoken", "/auth/refreshtoken")) and method == "POST":
+            self._read_body()
+            self.send_response(204)
+            self.send_header("X-auth-access-token", str(uuid.uuid4()))
+            self.send_header("X-auth-refresh-token", str(uuid.uuid4()))
+            self.send_header("DOMAIN_UUID", "e276abec-e0f2-11e3-8169-6d9ed49b625f")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return 204
+
+        m = re.fullmatch(DEVICE_PREFIX + r"ospfv2process/?", path)
+        if m:
+            return self._ospf_process(method, m.group('device'))
+
+        m = re.fullmatch(DEVICE_PREFIX + r"ospfv2routes(?:/(?P<id>[^/]+))?/?", path)
+        if m:
+            return self._ospf_routes(method, m.group('device'), m.group('id'), query)
+
+        m = re.fullmatch(DEVICE_PREFIX + r"ipv4staticroutes/?", path)
+        if m:
+            return self._static_routes(method, m.group('device'), query)
+
+        m = re.fullmatch(CONFIG_PREFIX + r"object/(?P<kind>networks|hosts)/?", path)
+        if m:
+            return self._objects(method, m.group('kind'), query)
+
+        m = re.fullmatch(INTERFACES_PREFIX + r"(?:/(?P<id>[^/]+))?/?", path)
+        if m:
+            return self._physical_interfaces(method, m.group('device'), m.group('id'), query)
+
+        if re.fullmatch(CONFIG_PREFIX + r"policy/ftdplatformsettingspolicies/?", path) and method == "GET":
+            return self._send(200, paginate(state.policies, query))
+
+        m = re.fullmatch(CONFIG_PREFIX + r"assignment/policyassignments(?:/(?P<id>[^/]+))?/?", path)
+        if m:
+            return self._assignments(method, m.group('id'), query)
+
+        if re.fullmatch(CONFIG_PREFIX + r"devices/operational/imports/?", path) and method == "POST":
+            if not self._drain_body():
+                return self._send(400, {"error": "import needs a multipart body with Content-Length"})
+            task = state.add_task("import")
+            return self._send(202, {"type": "ImportRequest", "metadata": {"task": {"id": task.id, "type": "TaskStatus"}}})
+
+        if re.fullmatch(CONFIG_PREFIX + r"deployment/deployabledevices/?", path) and method == "GET":
+            return self._send(200, paginate(state.deployable(), query))
+
+        if re.fullmatch(CONFIG_PREFIX + r"deployment/deploymentrequests/?", path) and method == "POST":
+            body = self._json_body() or {}
+            # An incremental deploy takes the changes up to its version; a forced one takes everything
+            version = int(body.get("version") or 0)
+            with state.lock:
+                for device in body.get("deviceList", []):
+                    if body.get("forceDeploy") or state.pending.get(device, 0) <= version:
+                        state.pending.pop(device, None)
+            task = state.add_task("deployment", body.get("deviceList", []))
+            body["metadata"] = {"task": {"id": task.id, "type": "TaskStatus"}}
+            return self._send(202, body)
+
+        if re.fullmatch(CONFIG_PREFIX + r"devices/operational/exports/?", path) and method == "POST":
+            body = self._json_body() or {}
+            task = state.add_task("export", body.get("deviceList", []))
+            return self._send(202, {"type": "ExportRequest", "metadata": {"task": {"id": task.id, "type": "TaskStatus"}}})
+
+        m = re.fullmatch(CONFIG_PREFIX + r"devices/operational/exports/(?P<id>[^/]+)/download/?", path)
+        if m and method == "GET":
+            return self._download(m.group('id'))
+
+        m = re.fullmatch(CONFIG_PREFIX + r"job/taskstatuses/(?P<id>[^/]+)/?", path)
+        if m and method == "GET":
+            task = state.tasks.get(m.group('id'))
+            return self._send(200, task.to_dict()) if task else self._send(404, {"error": "task not found"})
+
+        if method in ("POST", "PUT"):
+            self._read_body()
+        return self._send(404, {"error": f"mock has no handler for {method} {path}"})
+
+    def _download(self, task_id, chunk_size=256 * 1024):
+        """Stream the export file in chunks with Content-Length and a sha-256 Digest header"""
+        task = self.state.tasks.get(task_id)
+        if task is None or task.kind != "export":
+            return self._send(404, {"error": "export not found"})
+        if task.to_dict()["status"] != "EXPORT_SUCCESS":
+            return self._send(409, {"error": "export not finished"})
+        data = self.state.export_data
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Disposition", f'attachment; filename="export-{task_id[:8]}.sfo"')
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Digest", "sha-256=" + base64.b64encode(hashlib.sha256(data).digest()).decode())
+        self.end_headers()
+        for offset in range(0, len(data), chunk_size):
+            self.wfile.write(data[offset:offset + chunk_size])
+        return 200
+
+    def _ospf_process(self, method, device):
+        state = self.state
+        if method == "GET":
+            if device in state.processes:
+                return self._send(200, {"type": "OspfV2Process", "processName": "PROCESS_1", "enabled": True})
+            return self._send(404, {"error": "OSPF process not configured"})
+        if method == "POST":
+            self._json_body()
+            with state.lock:
+                state.processes.add(device)
+            return self._send(201, {"type": "OspfV2Process", "processName": "PROCESS_1", "enabled": True})
+        return self._send(405, {"error": "method not allowed"})
+
+    def _ospf_routes(self, method, device, route_id, query):
+        state = self.state
+        body = self._json_body() if method in ("POST", "PUT") else {}
+        if body is None:
+            return self._send(400, {"error": "invalid JSON"})
+        # Decide under the lock, write the response outside it
+        with state.lock:
+            routes = state.routes.setdefault(device, {})
+            if method == "GET" and not route_id:
+                result = 200, paginate(list(routes.values()), query, ("id", "type", "processId"))
+            elif method in ("GET", "DELETE"):
+                route = routes.get(route_id) if method == "GET" else routes.pop(route_id, None)
+                result = (200, route) if route else (404, {"error": "route not found"})
+            elif method == "POST":
+                body["id"] = str(uuid.uuid4())
+                routes[body["id"]] = body
+                result = 201, body
+            elif route_id in routes:
+                body["id"] = route_id
+                routes[route_id] = body
+                result = 200, body
+            else:
+                result = 404, {"error": "route not found"}
+        return self._send(*result)
+
+    def _static_routes(self, method, device, query):
+        state = self.state
+        body = self._json_body() if method == "POST" else {}
+        if body is None:
+            return self._send(400, {"error": "invalid JSON"})
+        with state.lock:
+            routes = state.static_routes.setdefault(device, [])
+            if method == "GET":
+                result = 200, paginate(routes, query, ("id", "type"))
+            elif method == "POST":
+                body["id"] = str(uuid.uuid4())
+                routes.append(body)
+                result = 201, body
+            else:
+                result = 405, {"error": "method not allowed"}
+        return self._send(*result)
+
+    def _objects(self, method, kind, query):
+        """Network/host objects; POST takes one object, or a list of up to BULK_LIMIT with ?bulk=true"""
+        state = self.state
+        body = self._json_body() if method == "POST" else {}
+        bulk = query.get('bulk', ['false'])[0].lower() == 'true'
+        with state.lock:
+            objects = state.objects[kind]
+            if method == "GET":
+                result = 200, paginate(list(objects.values()), query)
+            elif method != "POST":
+                result = 405, {"error": "method not allowed"}
+            elif body is None or isinstance(body, list) != bulk or (bulk and len(body) > BULK_LIMIT):
+                result = 400, {"error": f"expected one object, or a list of at most {BULK_LIMIT} with ?bulk=true"}
+            else:
+                items = body if bulk else [body]
+                taken = [item.get("name") for item in items
+                         if any(item.get("name") in state.objects[k] for k in state.objects)]
+                if taken:
+                    result = 400, {"error": f"object name(s) already in use: {', '.join(map(str, taken))}"}
+                else:
+                    for item in items:
+                        item["id"] = str(uuid.uuid4())
+                        objects[item["name"]] = item
+                    result = 201, ({"items": items} if bulk else items[0])
+        return self._send(*result)
+
+    def _physical_interfaces(self, method, device, interface_id, query):
+        state = self.state
+        body = self._json_body() if method == "PUT" else {}
+        if body is None:
+            return self._send(400, {"error": "invalid JSON"})
+        with state.lock:
+            interfaces = state.device_interfaces(device)
+            if method == "GET" and not interface_id:
+                result = 200, paginate(list(interfaces.values()), query)
+            elif method not in ("GET", "PUT"):
+                result = 405, {"error": "method not allowed"}
+            elif interface_id not in interfaces:
+                result = 404, {"error": "interface not found"}
+            elif method == "GET":
+                result = 200, interfaces[interface_id]
+            else:
+                body.update(id=interface_id, name=interfaces[interface_id]["name"])
+                interfaces[interface_id] = body
+                result = 200, body
+        return self._send(*result)
+
+    def _assignments(self, method, assignment_id, query):
+        state = self.state
+        body = self._json_body() if method in ("POST", "PUT") else {}
+        if method != "GET" and (not body or "policy" not in body):
+            return self._send(400, {"error": "invalid PolicyAssignment"})
+        with state.lock:
+            if method == "GET" and not assignment_id:
+                result = 200, paginate(list(state.assignments.values()), query)
+            elif method == "GET":
+                assignment = state.assignments.get(assignment_id)
+                result = (200, assignment) if assignment else (404, {"error": "assignment not found"})
+            elif method == "POST" and body["policy"].get("id") in state.assignments:
+                result = 400, {"error": "policy is already assigned; use PUT"}
+            elif method == "POST":
+                body["id"] = body["policy"].get("id")
+                state.assignments[body["id"]] = body
+                result = 201, body
+            elif method == "PUT" and assignment_id in state.assignments:
+                body["id"] = assignment_id
+                state.assignments[assignment_id] = body
+                result = 200, body
+            else:
+                result = 404, {"error": "assignment not found"}
+        return self._send(*result)
+
+
+class MockFMCServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding a MockState; port 0 picks a free port"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, **options):
+        super().__init__((host, port), MockFMCHandler)
+        self.state = MockState(**options)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a background thread (for in-process use by the benchmark runner)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def add_mock_arguments(parser):
+    """Options shared by this script and the benchmark runner"""
+    parser.add_argument("--latency", type=float, default=50.0, help="Fixed latency per request in ms (default 50).")
+    parser.add_argument("--jitter", type=float, default=20.0, help="Extra random latency per request in ms (default 20).")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per rolling minute before answering 429 (0 = off).")
+    parser.add_argument("--throttle-fraction", type=float, default=0.0, help="Fraction of requests randomly answered with 429.")
+    parser.add_argument("--task-seconds", type=float, default=3.0, help="Seconds until import/deployment tasks finish (default 3).")
+    parser.add_argument("--policies", type=int, default=50, help="Number of platform settings policies to list (default 50).")
+    parser.add_argument("--fail-devices", default="", help="Deployments fail for device IDs containing this text.")
+    parser.add_argument("--export-mb", type=float, default=4.0, help="Size of the file an export produces in MB (default 4).")
+
+
+def mock_options(args):
+    return {"latency": args.latency / 1000, "jitter": args.jitter / 1000, "rate_limit": args.rate_limit,
+            "throttle_fraction": args.throttle_fraction, "task_seconds": args.task_seconds,
+            "policies": args.policies, "fail_devices": args.fail_devices, "export_bytes": int(args.export_mb * 1048576)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock cdFMC API for testing and benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8443, help="Port to listen on (default 8443, plain HTTP).")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockFMCServer(args.host, args.port, **mock_options(args))
+    print(f"Mock cdFMC listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
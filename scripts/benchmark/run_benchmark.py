@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the automation scripts against the mock cdFMC
+
+Starts mock_fmc in-process, runs each script as a subprocess (a fresh
+interpreter, as Terraform does) for every device count, and reports wall
+time, request count, 429s and p50/p95 server-side latency. Save a run with
+--json and pass it to --compare on another commit to see the difference.
+
+Usage:
+    python3 run_benchmark.py --devices 1,5,20 --json before.json
+    python3 run_benchmark.py --devices 1,5,20 --compare before.json
+    python3 run_benchmark.py --scripts-dir /tmp/old-checkout/scripts --json old.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mock_fmc import MockFMCServer, add_mock_arguments, mock_options
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS = ("ospf", "platsettings", "import")
+SCRIPT_TIMEOUT = 600  # Seconds before a single run is killed
+
+# Network IDs in the --network-ids shape the OSPF script expects
+NETWORK_IDS = {key: f"00000000-0000-4000-a000-{i:012d}" for i, key in enumerate(
+    ["attacker_id", "data_center_id", "apps_id", "dmz_id", "outside_id", "transport_id"])}
+
+
+def device_ids(count):
+    """Deterministic UUID-shaped device IDs (so endpoints template the same way as real ones)"""
+    return [f"00000000-0000-4000-8000-{i:012d}" for i in range(count)]
+
+
+def build_command(script, scripts_dir, url, devices):
+    """Command line and working directory for one script run"""
+    ids = json.dumps(device_ids(devices))
+    if script == "ospf":
+        return [sys.executable, "cdfmc_ospf_automation.py", "--fmc-url", url, "--api-key", "benchmark",
+                "--device-ids", ids, "--network-ids", json.dumps(NETWORK_IDS), "--reconcile"], scripts_dir / "ospf"
+    if script == "platsettings":
+        return [sys.executable, "platsettings.py", "--host", url, "--token", "benchmark", "--is_cdfmc", "true",
+                "--deviceid", ids, "--platformpolicy_name", "vFTD-platform-policy"], scripts_dir / "config-import"
+    return [sys.executable, "main.py", "--host", url, "--token", "benchmark",
+            "--backup-file", "automation_backup.sfo", "--wait", "--force"], scripts_dir / "config-import"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_once(server, script, scripts_dir, devices):
+    """Run one script against a freshly reset mock and summarize the requests it made"""
+    server.state.reset()
+    command, cwd = build_command(script, scripts_dir, server.url, devices)
+    with tempfile.TemporaryDirectory(prefix="fmc-bench-") as cache_dir:
+        # Cold caches for every run so results are comparable
+        env = dict(os.environ, FMC_CACHE_DIR=cache_dir, PYTHONDONTWRITEBYTECODE="1")
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True, timeout=SCRIPT_TIMEOUT)
+            exit_code, output = proc.returncode, proc.stdout + proc.stderr
+        except subprocess.TimeoutExpired as e:
+            exit_code, output = "timeout", f"{e.stdout or ''}{e.stderr or ''}"
+        wall = time.perf_counter() - start
+
+    log = server.state.snapshot_log()
+    latencies = [entry["seconds"] * 1000 for entry in log]
+    return {
+        "script": script,
+        "devices": devices,
+        "exit": exit_code,
+        "wall_seconds": round(wall, 3),
+        "requests": len(log),
+        "throttled": sum(1 for entry in log if entry["status"] == 429),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "output_tail": output.strip().splitlines()[-5:] if exit_code != 0 else []
+    }
+
+
+def format_results(results, baseline=None):
+    """Plain-text table; with a baseline, adds wall time and request deltas"""
+    previous = {(r["script"], r["devices"]): r for r in (baseline or {}).get("results", [])}
+    header = f"{'SCRIPT':<13} {'DEVICES':>7} {'EXIT':>7} {'WALL(s)':>8} {'REQS':>5} {'429':>4} {'P50(ms)':>8} {'P95(ms)':>8}"
+    if baseline:
+        header += f" {'dWALL(s)':>9} {'dREQS':>6}"
+    lines = [header]
+    for r in results:
+        line = (f"{r['script']:<13} {r['devices']:>7} {str(r['exit']):>7} {r['wall_seconds']:>8.2f} {r['requests']:>5} "
+                f"{r['throttled']:>4} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+        old = previous.get((r["script"], r["devices"]))
+        if baseline and old:
+            line += f" {r['wall_seconds'] - old['wall_seconds']:>+9.2f} {r['requests'] - old['requests']:>+6}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the automation scripts against a local mock cdFMC.")
+    parser.add_argument("--devices", default="1,5,20", help="Comma-separated device counts (default 1,5,20).")
+    parser.add_argument("--scripts", default=",".join(SCRIPTS), help=f"Comma-separated scripts to run (default {','.join(SCRIPTS)}).")
+    parser.add_argument("--scripts-dir", type=Path, default=SCRIPTS_DIR, help="scripts/ directory to benchmark (e.g. another checkout).")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--compare", help="Results file from an earlier run to compare against.")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    scripts = [s.strip() for s in args.scripts.split(",") if s.strip()]
+    unknown = set(scripts) - set(SCRIPTS)
+    if unknown:
+        parser.error(f"unknown script(s): {', '.join(sorted(unknown))}")
+    device_counts = [int(n) for n in args.devices.split(",") if n.strip()]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    server = MockFMCServer(**mock_options(args))
+    server.start()
+    print(f"Mock cdFMC on {server.url} (latency {args.latency:.0f}ms +{args.jitter:.0f}ms, "
+          f"rate limit {args.rate_limit or 'off'})", file=sys.stderr)
+
+    results = []
+    try:
+        for script in scripts:
+            # The import doesn't depend on the device count, so it runs once
+            for devices in (device_counts if script != "import" else [0]):
+                print(f"Running {script} with {devices} device(s)...", file=sys.stderr)
+                result = run_once(server, script, args.scripts_dir, devices)
+                for line in result["output_tail"]:
+                    print(f"   {line}", file=sys.stderr)
+                results.append(result)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(format_results(results, baseline))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"mock": mock_options(args), "results": results}, f, indent=2)
+    if any(r["exit"] != 0 for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the cdFMC / FMC automation scripts
+
+Keeps one pooled requests.Session per FMC host so that every script reuses
+TLS connections (keep-alive) instead of opening a new one per call.
+Pool size and timeouts can be overridden with environment variables.
+
+Requests are paced by a token bucket shared by every thread using the
+host's client, so concurrent workers stay under the FMC per-user rate
+limit. 429 responses are retried after Retry-After (and pause the whole
+bucket); transient 5xx/connection errors are retried with jittered
+exponential backoff for idempotent methods only. A 401 is retried once
+with new headers when an auth handler (fmc_tokens.TokenManager) can
+replace the rejected token.
+"""
+
+import inspect
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from types import GeneratorType
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+import fmc_trace
+from fmc_jsonstream import CollectionStream
+from fmc_tasks import backoff_delays
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Connection settings - can be overridden by environment variables
+POOL_SIZE = int(os.getenv('FMC_POOL_SIZE', "10"))
+CONNECT_TIMEOUT = float(os.getenv('FMC_CONNECT_TIMEOUT', "10"))
+READ_TIMEOUT = float(os.getenv('FMC_READ_TIMEOUT', "60"))
+RATE_PER_MINUTE = float(os.getenv('FMC_RATE_PER_MINUTE', "120"))  # FMC allows 120/min per user; 0 disables
+RATE_BURST = int(os.getenv('FMC_RATE_BURST', "10"))
+MAX_RETRIES = int(os.getenv('FMC_MAX_RETRIES', "5"))
+PAGE_LIMIT = int(os.getenv('FMC_PAGE_LIMIT', "1000"))  # FMC caps collection pages at 1000 items
+PREFETCH_WINDOW = int(os.getenv('FMC_PREFETCH_WINDOW', "4"))  # Pages fetched concurrently after the first
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {500, 502, 503, 504}
+DEFAULT_RETRY_AFTER = 5.0  # Used when a 429 carries no usable Retry-After
+
+UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def normalize_host(host):
+    """Return 'https://host' for a bare hostname or URL"""
+    host = host.strip().rstrip('/')
+    if not host.startswith(('http://', 'https://')):
+        host = f"https://{host}"
+    parts = urlsplit(host)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def template_endpoint(url):
+    """Collapse UUIDs in a URL path so counters group by endpoint, not object"""
+    return UUID_RE.sub('{id}', urlsplit(url).path)
+
+
+def retry_after_seconds(response, default=DEFAULT_RETRY_AFTER):
+    """Parse Retry-After (delta seconds or HTTP date) into seconds to wait"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, burst=RATE_BURST):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available; return the seconds spent waiting"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Hold every caller for a while, e.g. after the server answered 429"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+class RequestStats:
+    """Thread-safe per-endpoint request counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, method, endpoint, seconds, status):
+        with self._lock:
+            entry = self.endpoints.setdefault((method, endpoint), {
+                'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'retries': 0, 'wait': 0.0
+            })
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+            if status is None or status >= 400:
+                entry['errors'] += 1
+
+    def record_delay(self, method, endpoint, retries=0, wait=0.0):
+        """Count retries and time spent throttled (bucket or Retry-After) for an endpoint"""
+        with self._lock:
+            entry = self.endpoints.setdefault((method, endpoint), {
+                'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'retries': 0, 'wait': 0.0
+            })
+            entry['retries'] += retries
+            entry['wait'] += wait
+
+    @property
+    def total_requests(self):
+        with self._lock:
+            return sum(e['count'] for e in self.endpoints.values())
+
+    @property
+    def total_seconds(self):
+        with self._lock:
+            return sum(e['total'] for e in self.endpoints.values())
+
+    @property
+    def total_retries(self):
+        with self._lock:
+            return sum(e['retries'] for e in self.endpoints.values())
+
+    @property
+    def total_wait(self):
+        with self._lock:
+            return sum(e['wait'] for e in self.endpoints.values())
+
+    def format_table(self):
+        """Render the counters as a plain-text table"""
+        with self._lock:
+            rows = sorted(self.endpoints.items(), key=lambda kv: kv[1]['total'], reverse=True)
+            lines = [f"{'METHOD':<7} {'COUNT':>5} {'ERR':>4} {'RETRY':>5} {'WAIT(s)':>8} "
+                     f"{'TOTAL(s)':>9} {'AVG(ms)':>8} {'MAX(ms)':>8}  ENDPOINT"]
+            for (method, endpoint), e in rows:
+                avg_ms = e['total'] / e['count'] * 1000 if e['count'] else 0.0
+                lines.append(
+                    f"{method:<7} {e['count']:>5} {e['errors']:>4} {e['retries']:>5} {e['wait']:>8.2f} "
+                    f"{e['total']:>9.2f} {avg_ms:>8.0f} {e['max'] * 1000:>8.0f}  {endpoint}"
+                )
+            return "\n".join(lines)
+
+
+def _add_weak(refs, callback):
+    """A copy of refs with callback added once; bound methods are held weakly and dropped once collected
+
+    An object that registers a method (e.g. an ObjectIndex created per
+    lookup) therefore stops being called when it is garbage collected
+    instead of piling up on the long-lived shared client. The list is
+    replaced rather than mutated, so requests iterating the old one in
+    other threads are unaffected.
+    """
+    live = [ref for ref in refs if ref() is not None]
+    if all(ref() != callback for ref in live):
+        live.append(weakref.WeakMethod(callback) if inspect.ismethod(callback) else (lambda: callback))
+    return live
+
+
+class FMCClient:
+    """Pooled keep-alive HTTP client bound to a single FMC host"""
+
+    def __init__(self, host, pool_size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, verify=False, rate_per_minute=RATE_PER_MINUTE,
+                 burst=RATE_BURST, max_retries=MAX_RETRIES):
+        self.base_url = normalize_host(host)
+        self.timeout = (connect_timeout, read_timeout)
+        self.verify = verify
+        self.max_retries = max_retries
+        self.limiter = TokenBucket(rate_per_minute, burst)
+        self.stats = RequestStats()
+        self.write_listeners = []  # Callables returning the listener, or None once it is collected
+        self.not_found_listeners = []  # Same, called after a 404
+        self._listeners_lock = threading.Lock()
+        self.auth_handlers = []
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+
+    def url(self, path):
+        """Build an absolute URL from a path, leaving absolute URLs untouched"""
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        """Send a request through the shared session, pacing and retrying it
+
+        Every attempt first takes a token from the host's bucket. A 429 is
+        retried after Retry-After for any method, since the server rejected
+        it unprocessed (unless the body is a one-shot stream). 5xx responses
+        and connection errors are only retried for idempotent methods. A 401
+        is retried once if an auth handler returns new headers; the request's
+        headers dict is updated in place, so a caller holding it (e.g. a
+        module-level `headers`) sends the new token from then on.
+        """
+        method = method.upper()
+        url = self.url(path)
+        endpoint = template_endpoint(url)
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('verify', self.verify)
+        data = kwargs.get('data')
+        replayable = not (hasattr(data, 'read') or isinstance(data, GeneratorType))
+        idempotent = method in IDEMPOTENT_METHODS and replayable
+        delays = backoff_delays(initial=1.0, factor=2.0, maximum=30.0, jitter=0.5)
+
+        attempt = 0
+        reauthenticated = False
+        while True:
+            waited = self.limiter.acquire()
+            if waited:
+                self.stats.record_delay(method, endpoint, wait=waited)
+                fmc_trace.record_wait('throttle', waited, endpoint)
+
+            status = None
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+                status = response.status_code
+            except (requests.ConnectionError, requests.Timeout):
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+            finally:
+                seconds = time.perf_counter() - start
+                self.stats.record(method, endpoint, seconds, status)
+                if fmc_trace.tracing_enabled():
+                    self._trace(method, endpoint, response, kwargs, seconds, attempt)
+
+            if attempt >= self.max_retries:
+                break
+            if status == 429 and replayable:
+                # Pause the shared bucket so other workers back off too
+                delay = retry_after_seconds(response)
+                response.close()  # Hand a streamed connection back to the pool before retrying
+                self.limiter.pause(delay)
+                self.stats.record_delay(method, endpoint, retries=1)
+            elif idempotent and (response is None or status in RETRY_STATUSES):
+                if response is not None:
+                    response.close()
+                delay = next(delays)
+                self.stats.record_delay(method, endpoint, retries=1, wait=delay)
+                fmc_trace.record_wait('retry', delay, endpoint)
+                time.sleep(delay)
+            elif status == 401 and replayable and not reauthenticated and self._reauthenticate(kwargs):
+                response.close()
+                reauthenticated = True
+            else:
+                break
+            attempt += 1
+
+        if status == 404:
+            listeners = self.not_found_listeners
+        elif method != 'GET' and status is not None and status < 400:
+            listeners = self.write_listeners
+        else:
+            listeners = []
+        for ref in listeners:
+            listener = ref()
+            if listener is not None:
+                listener(method, url)
+        return response
+
+    @staticmethod
+    def _trace(method, endpoint, response, kwargs, seconds, attempt):
+        """Hand one attempt to the tracer (sizes from the prepared request and the response)"""
+        if response is None:
+            fmc_trace.record_request(method, endpoint, None, 0, 0, seconds, attempt=attempt)
+            return
+        body = response.request.body
+        request_bytes = len(body) if hasattr(body, '__len__') else 0
+        if kwargs.get('stream'):
+            response_bytes = int(response.headers.get('Content-Length') or 0)  # Don't consume the stream
+        else:
+            response_bytes = len(response.content)
+        fmc_trace.record_request(method, endpoint, response.status_code, request_bytes, response_bytes,
+                                 seconds, response.elapsed.total_seconds(), attempt)
+
+    def _reauthenticate(self, kwargs):
+        """Ask the auth handlers for headers replacing the ones just rejected; True if one did"""
+        headers = kwargs.get('headers')
+        if not headers:
+            return False
+        for handler in self.auth_handlers:
+            new_headers = handler(headers)
+            if new_headers:
+                headers.update(new_headers)
+                return True
+        return False
+
+    def add_auth_handler(self, handler):
+        """Register handler(headers) -> new headers or None, called when a request gets a 401"""
+        if handler not in self.auth_handlers:
+            self.auth_handlers.append(handler)
+
+    def add_write_listener(self, listener):
+        """Register listener(method, url), called after every successful non-GET request
+
+        A bound method is held weakly: it is dropped once its object is gone.
+        """
+        with self._listeners_lock:
+            self.write_listeners = _add_weak(self.write_listeners, listener)
+
+    def add_not_found_listener(self, listener):
+        """Register listener(method, url), called after every request answered 404 (held like write listeners)"""
+        with self._listeners_lock:
+            self.not_found_listeners = _add_weak(self.not_found_listeners, listener)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def paginate(self, path, headers=None, params=None, expanded=False, limit=PAGE_LIMIT, window=PREFETCH_WINDOW):
+        """Yield every item of a collection lazily, following FMC offset/limit paging
+
+        The page being consumed is stream-parsed, so an item is yielded as
+        soon as it has arrived. The first page tells how many items there
+        are; the remaining pages are then fetched concurrently, at most
+        `window` in flight, and consumed in order. Prefetched pages are read
+        completely by their worker: a streamed body would hold its pooled
+        connection until consumed, and concurrent paginations could then take
+        every connection (the pool blocks) and wait on each other forever.
+        Without a total count the pages are followed one by one, streamed.
+        Raises requests.HTTPError for a non-2xx page.
+        """
+        url = self.url(path)
+        base = dict(params or {}, limit=limit)
+        if expanded:
+            base['expanded'] = 'true'
+
+        def open_page(offset, stream=True):
+            # Streamed: only the headers are read here, the body stays on the connection until read_page
+            response = self.get(url, headers=headers, params=dict(base, offset=offset), stream=stream)
+            if not response.ok:
+                response.close()
+                response.raise_for_status()
+            return response
+
+        def read_page(response):
+            """Yield the page's items; returns (item count, paging)"""
+            page = CollectionStream.from_response(response)
+            count = 0
+            try:
+                for item in page:
+                    count += 1
+                    yield item
+            finally:
+                response.close()
+            return count, page.fields.get('paging', {})
+
+        count, paging = yield from read_page(open_page(0))
+        page_size = paging.get('limit') or count  # The server may cap the requested limit
+        if not paging.get('next') or not count or not page_size:
+            return
+
+        total = paging.get('count')
+        if total is None:
+            offset = page_size
+            while True:
+                count, paging = yield from read_page(open_page(offset))
+                if not paging.get('next') or not count:
+                    return
+                offset += page_size
+
+        offsets = iter(range(page_size, total, page_size))
+        with ThreadPoolExecutor(max_workers=max(1, window)) as pool:
+            pending = deque(pool.submit(open_page, offset, False)
+                            for _, offset in zip(range(max(1, window)), offsets))
+            try:
+                while pending:
+                    response = pending.popleft().result()
+                    following = next(offsets, None)
+                    if following is not None:
+                        pending.append(pool.submit(open_page, following, False))
+                    yield from read_page(response)
+            finally:
+                # Consumer stopped early (or a page failed): drop pages not started, discard fetched ones
+                for future in pending:
+                    if not future.cancel() and not future.exception():
+                        future.result().close()
+
+    def print_stats(self, file=sys.stderr):
+        """Print request counters (stderr by default so stdout stays parseable)"""
+        print(f"HTTP requests to {self.base_url}: {self.stats.total_requests} "
+              f"in {self.stats.total_seconds:.2f}s ({self.stats.total_retries} retries, "
+              f"{self.stats.total_wait:.2f}s throttled)", file=file)
+        print(self.stats.format_table(), file=file)
+
+
+def get_client(host, **kwargs):
+    """Return the shared client for a host, creating it on first use"""
+    key = normalize_host(host)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = FMCClient(key, **kwargs)
+            _clients[key] = client
+        return client
+
+
+def stats_enabled():
+    """True when FMC_HTTP_STATS is set, used by the scripts to print counters on exit"""
+    return os.getenv('FMC_HTTP_STATS', "").lower() in ("1", "true", "yes")
+
+
+def print_all_stats(file=sys.stderr):
+    """Print counters for every client created in this process"""
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        client.print_stats(file=file)
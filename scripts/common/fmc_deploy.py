@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Deployment planning: deploy only the devices that have pending changes
+
+deployment/deployabledevices lists the devices whose configuration
+differs from what was last deployed, with the version (timestamp) of the
+pending changes. plan_deployment() reads it once and splits the requested
+devices into pending and up to date; deployment_request() then builds a
+single DeploymentRequest for every pending device, carrying the newest
+version so all changes up to that point go out in one incremental deploy.
+forceDeploy (a full configuration push, much slower) is only set when
+asked for.
+"""
+
+DEPLOYABLE_DEVICES_PATH = "deployment/deployabledevices"
+DEPLOYMENT_REQUESTS_PATH = "deployment/deploymentrequests"
+
+
+def _version(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def deployable_devices(client, config_url, headers):
+    """Device ID -> deployable entry ({"version", "upToDate", "canBeDeployed", ...}) for every listed device"""
+    devices = {}
+    for item in client.paginate(config_url + DEPLOYABLE_DEVICES_PATH, headers=headers, expanded=True):
+        device_id = (item.get('device') or {}).get('id') or item.get('id')
+        if device_id:
+            devices[device_id] = item
+    return devices
+
+
+def plan_deployment(client, config_url, headers, device_ids=None):
+    """Which of device_ids need a deploy; all listed devices when device_ids is None
+
+    Returns {"pending": [ids], "up_to_date": [ids], "blocked": [ids], "version": newest pending version}.
+    A device that isn't listed has nothing to deploy; one listed with
+    canBeDeployed false (e.g. a deployment already running) is blocked.
+    """
+    listed = deployable_devices(client, config_url, headers)
+    wanted = list(listed) if device_ids is None else list(dict.fromkeys(device_ids))
+    plan = {"pending": [], "up_to_date": [], "blocked": [], "version": 0}
+    for device_id in wanted:
+        entry = listed.get(device_id)
+        if entry is None or entry.get('upToDate') is True:
+            plan["up_to_date"].append(device_id)
+        elif entry.get('canBeDeployed') is False:
+            plan["blocked"].append(device_id)
+        else:
+            plan["pending"].append(device_id)
+            plan["version"] = max(plan["version"], _version(entry.get('version')))
+    return plan
+
+
+def deployment_request(device_ids, version, force=False):
+    """One DeploymentRequest for all devices (incremental unless force)"""
+    payload = {
+        "type": "DeploymentRequest",
+        "deviceList": list(device_ids),
+        "forceDeploy": bool(force),
+        "ignoreWarning": True
+    }
+    if version:
+        payload["version"] = str(version)
+    return payload
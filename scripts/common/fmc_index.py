@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+On-disk name -> (id, type) index of FMC objects
+
+Object collections (e.g. "policy/ftdplatformsettingspolicies",
+"object/securityzones") are listed once with expanded=true, following
+pagination, and cached per (host, domain UUID) under FMC_CACHE_DIR.
+Entries expire after FMC_INDEX_TTL seconds, and a collection is dropped
+from the cache as soon as the shared client writes to it (the client holds
+the index's listener weakly, so a short-lived index doesn't outlive its use).
+Objects can also be deleted and recreated outside this process (the
+Terraform provider, teardown.py): a 404 for a URL carrying a cached ID drops
+that name, so the next lookup re-lists and finds the new ID.
+
+Can also be run as a script to resolve names for a Terraform external data source:
+    python3 fmc_index.py --host HOST --token TOKEN object/securityzones WAN DMZ
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from fmc_client import PAGE_LIMIT, get_client
+
+CACHE_DIR = Path(os.getenv('FMC_CACHE_DIR', Path.home() / ".cache" / "fmc-automation"))
+INDEX_TTL = float(os.getenv('FMC_INDEX_TTL', "900"))
+
+CDFMC_DOMAIN_UUID = "e276abec-e0f2-11e3-8169-6d9ed49b625f"
+CONFIG_API_TPL = "{base_url}/api/fmc_config/v1/domain/{domain_uuid}/"
+
+
+class ObjectIndex:
+    """Cached name -> (id, type) lookups for FMC object collections"""
+
+    def __init__(self, client, headers, domain_uuid=CDFMC_DOMAIN_UUID, ttl=INDEX_TTL, cache_dir=CACHE_DIR):
+        self.client = client
+        self.headers = headers
+        self.domain_uuid = domain_uuid
+        self.ttl = ttl
+        self.config_url = CONFIG_API_TPL.format(base_url=client.base_url, domain_uuid=domain_uuid)
+        key = hashlib.sha256(f"{client.base_url}|{domain_uuid}".encode()).hexdigest()[:16]
+        self.path = Path(cache_dir) / f"index-{key}.json"
+        self._lock = threading.Lock()
+        self._types = self._load().get('types', {})
+        client.add_write_listener(self._on_write)
+        client.add_not_found_listener(self._on_not_found)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, removed=()):
+        """Merge our collections into the cache file and replace it atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        on_disk = self._load().get('types', {})
+        on_disk.update(self._types)
+        for object_type in removed:
+            on_disk.pop(object_type, None)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".index-")
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'host': self.client.base_url, 'domain_uuid': self.domain_uuid, 'types': on_disk}, f)
+        os.replace(tmp_path, self.path)
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def _fetch(self, object_type):
+        """List every page of a collection and map names to (id, type)"""
+        items = {}
+        for item in self.client.paginate(self.config_url + object_type, headers=self.headers,
+                                         expanded=True, limit=PAGE_LIMIT):
+            if item.get('name') is not None:
+                items[item['name']] = [item.get('id'), item.get('type')]
+        return items
+
+    def is_cached(self, object_type):
+        """Whether items() would answer from the cache rather than list the collection"""
+        return self._fresh(self._types.get(object_type.strip('/')))
+
+    def items(self, object_type, refresh=False):
+        """Return {name: [id, type]} for a collection, from cache when still fresh"""
+        object_type = object_type.strip('/')
+        with self._lock:
+            entry = self._types.get(object_type)
+            if not refresh and self._fresh(entry):
+                return entry['items']
+            items = self._fetch(object_type)
+            self._types[object_type] = {'fetched_at': time.time(), 'items': items}
+            self._save()
+            return items
+
+    def lookup(self, object_type, name):
+        """Return (id, type) for a named object, or (None, None) if it doesn't exist
+
+        A miss on a cached listing re-lists once, since objects may have been
+        created outside this process (e.g. by a config import).
+        """
+        object_type = object_type.strip('/')
+        cached = self.is_cached(object_type)
+        found = self.items(object_type).get(name)
+        if not found and cached:
+            found = self.items(object_type, refresh=True).get(name)
+        return tuple(found) if found else (None, None)
+
+    def invalidate(self, object_type):
+        """Forget a collection so the next lookup re-lists it"""
+        object_type = object_type.strip('/')
+        with self._lock:
+            self._types.pop(object_type, None)
+            self._save(removed=[object_type])
+
+    def _on_write(self, method, url):
+        """Client hook: a POST/PUT/DELETE under a cached collection invalidates it"""
+        path = urlsplit(url).path
+        prefix = urlsplit(self.config_url).path
+        if not path.startswith(prefix):
+            return
+        written = path[len(prefix):].strip('/')
+        for object_type in list(self._types):
+            if written == object_type or written.startswith(object_type + '/'):
+                self.invalidate(object_type)
+
+    def _on_not_found(self, method, url):
+        """Client hook: a 404 for a URL carrying a cached ID means that object is gone; forget its name"""
+        segments = set(urlsplit(url).path.split('/'))
+        with self._lock:
+            changed = False
+            for entry in self._types.values():
+                # Replaced rather than mutated: callers may be iterating a dict items() returned
+                kept = {name: item for name, item in entry['items'].items() if item[0] not in segments}
+                if len(kept) != len(entry['items']):
+                    entry['items'] = kept
+                    changed = True
+            if changed:
+                self._save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve FMC object names to IDs using the cached index.")
+    parser.add_argument('--host', required=True, help="cdFMC host")
+    parser.add_argument('--token', required=True, help="API token for cdFMC")
+    parser.add_argument('--domain-uuid', default=CDFMC_DOMAIN_UUID, help="Domain UUID (defaults to cdFMC global)")
+    parser.add_argument('object_type', help="Collection path, e.g. object/securityzones")
+    parser.add_argument('names', nargs='+', help="Object names to resolve")
+    args = parser.parse_args()
+
+    index = ObjectIndex(get_client(args.host), {'Authorization': 'Bearer ' + args.token}, args.domain_uuid)
+    result = {}
+    for name in args.names:
+        object_id, _ = index.lookup(args.object_type, name)
+        if not object_id:
+            print(f"Error: {args.object_type} '{name}' not found.", file=sys.stderr)
+            sys.exit(1)
+        result[name] = object_id
+    # Flat {name: id} map so Terraform's external data source can parse it
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
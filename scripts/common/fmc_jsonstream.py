@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Incremental parser for FMC collection responses
+
+With expanded=true a single page can be tens of MB; response.json() holds
+the whole body and then the whole object tree in memory at once.
+CollectionStream reads the body in chunks and yields each element of the
+top-level "items" array as soon as it is complete, so peak memory is one
+item plus one read chunk. The other top-level members (paging, links) are
+small and are kept in `fields` once parsed; FMC sends "paging" after
+"items", so read it only when the items are exhausted.
+"""
+
+import codecs
+import json
+
+READ_CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+class CollectionStream:
+    """Iterate the items of one collection page from an iterable of byte chunks"""
+
+    def __init__(self, chunks, items_key='items'):
+        self.chunks = iter(chunks)
+        self.items_key = items_key
+        self.fields = {}
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    @classmethod
+    def from_response(cls, response, chunk_size=READ_CHUNK_SIZE, **kwargs):
+        """Stream a requests response (sent with stream=True to avoid buffering the body)"""
+        return cls(response.iter_content(chunk_size=chunk_size), **kwargs)
+
+    def _fill(self):
+        """Read one more chunk; returns False at the end of the body"""
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self.chunks:
+            if chunk:
+                self._buf += self._text.decode(chunk)
+                return True
+        self._buf += self._text.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self):
+        """Next non-whitespace character (reading more as needed), or '' at the end"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars):
+        char = self._peek()
+        if char == '' or char not in chars:
+            raise ValueError(f"malformed collection response: expected {chars!r}, got {char or 'end of body'!r}")
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decode the next complete JSON value, reading more until it is whole"""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number followed only by characters that could continue it may be cut
+            # short by the chunk boundary ("3." + "5", "1e" + "3"): read more and decode again
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and all(c in _NUMBER_CHARS for c in self._buf[end:]) and self._fill()):
+                continue
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError("malformed collection response: expected a member name")
+            self._expect(':')
+            if key == self.items_key and self._peek() == '[':
+                yield from self._array()
+            else:
+                self.fields[key] = self._value()
+            if self._expect(',}') == '}':
+                return
+
+    def _array(self):
+        self._pos += 1
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
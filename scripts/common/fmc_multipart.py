@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Streaming multipart/form-data encoder for large uploads (e.g. .sfo imports)
+
+requests builds a files= body fully in memory. MultipartStream instead
+yields the body in fixed-size chunks straight from disk. It also has a
+known length, so requests sends a Content-Length header instead of
+chunked encoding, and progress/throughput can be reported as it goes.
+"""
+
+import os
+import sys
+import time
+import uuid
+
+UPLOAD_CHUNK_SIZE = 256 * 1024
+PROGRESS_INTERVAL = 2.0  # Seconds between progress lines
+
+
+class MultipartStream:
+    """Iterable multipart body; pass as data= with headers={'Content-Type': stream.content_type}"""
+
+    def __init__(self, fields, chunk_size=UPLOAD_CHUNK_SIZE, progress=None):
+        """fields: list of (name, value) for form fields or (name, (filename, path, content_type)) for files"""
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.parts = []
+        for name, value in fields:
+            if isinstance(value, tuple):
+                filename, path, content_type = value
+                header = (f'--{self.boundary}\r\n'
+                          f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                          f'Content-Type: {content_type}\r\n\r\n').encode()
+                self.parts.append((header, path, os.path.getsize(path)))
+            else:
+                header = (f'--{self.boundary}\r\n'
+                          f'Content-Disposition: form-data; name="{name}"\r\n\r\n').encode()
+                self.parts.append((header + str(value).encode(), None, 0))
+        self.trailer = f'--{self.boundary}--\r\n'.encode()
+        self.total = sum(len(header) + size + 2 for header, _, size in self.parts) + len(self.trailer)
+        self.sent = 0
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        # requests uses len() to send Content-Length rather than chunked encoding
+        return self.total
+
+    def __iter__(self):
+        self.sent = 0
+        for header, path, _ in self.parts:
+            yield self._count(header)
+            if path:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                        yield self._count(chunk)
+            yield self._count(b'\r\n')
+        yield self._count(self.trailer)
+
+    def _count(self, data):
+        self.sent += len(data)
+        if self.progress:
+            self.progress(self.sent, self.total)
+        return data
+
+
+class UploadProgress:
+    """Progress callback printing bytes transferred and throughput at a fixed interval
+
+    direction ("sent" or "received") tells an upload's lines from a
+    download's; export.py reuses this for its downloads.
+    """
+
+    def __init__(self, label, interval=PROGRESS_INTERVAL, file=sys.stdout, direction="sent"):
+        self.label = label
+        self.direction = direction
+        self.interval = interval
+        self.file = file
+        self.start = None
+        self.last_report = 0.0
+
+    def __call__(self, sent, total):
+        now = time.monotonic()
+        if self.start is None:
+            self.start = self.last_report = now
+        if sent < total and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        elapsed = max(now - self.start, 1e-6)
+        print(f"{self.label}: {sent / 1048576:.1f}/{total / 1048576:.1f} MB {self.direction} "
+              f"({sent * 100 // max(total, 1)}%) at {sent / elapsed / 1048576:.2f} MB/s", file=self.file)
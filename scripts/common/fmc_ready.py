@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Wait until cdFMC is ready for the next pipeline step, then exit immediately
+
+Replaces fixed sleeps: every round checks all pending conditions (one
+listing per collection, shared by all conditions on it), backs off with
+jitter between rounds and stops as soon as everything holds or the
+deadline passes. Reports how long each condition took to become true.
+
+Conditions:
+    --device NAME          device record exists (add --healthy to also require a healthy status)
+    --zone NAME            security zone exists
+    --access-policy NAME   access control policy exists
+    --object TYPE=NAME     any collection, e.g. policy/ftdnatpolicies=DC-NAT
+    --task ID              task reached a terminal state (a failed task fails the wait)
+
+Usage:
+    python3 fmc_ready.py --host HOST --token TOKEN --device FTD-1 --device FTD-2 --healthy --deadline 900
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import requests
+
+from fmc_client import PAGE_LIMIT, get_client, print_all_stats, stats_enabled
+from fmc_index import CDFMC_DOMAIN_UUID, CONFIG_API_TPL, ObjectIndex
+from fmc_tasks import TASK_STATUS_API_TPL, PollTimeout, poll_until, task_outcome
+
+DEFAULT_DEADLINE = 900
+DEVICE_RECORDS = "devices/devicerecords"
+HEALTHY_STATES = {"green", "yellow", "recovered"}
+
+
+class ConditionFailed(Exception):
+    """Raised by a check when its condition can never become true (e.g. the task failed)"""
+
+
+class Condition:
+    """One thing to wait for; check() returns (done, detail) or raises ConditionFailed"""
+
+    def __init__(self, label, check):
+        self.label = label
+        self.check = check
+        self.ready_after = None
+        self.detail = "not checked"
+        self.failed = False
+
+
+class ReadinessChecker:
+    """Evaluates conditions against cdFMC, listing each collection at most once per round"""
+
+    def __init__(self, client, headers, domain_uuid=CDFMC_DOMAIN_UUID, healthy_states=HEALTHY_STATES):
+        self.client = client
+        self.headers = headers
+        self.domain_uuid = domain_uuid
+        self.healthy_states = {s.lower() for s in healthy_states}
+        self.index = ObjectIndex(client, headers, domain_uuid)
+        self.config_url = CONFIG_API_TPL.format(base_url=client.base_url, domain_uuid=domain_uuid)
+        self.conditions = []
+        self._round = {}
+
+    def add_object(self, object_type, name):
+        self.conditions.append(Condition(f"{object_type.strip('/')}={name}",
+                                         lambda: self._check_object(object_type, name)))
+
+    def add_device(self, name, healthy=False):
+        self.conditions.append(Condition(f"device={name}{' (healthy)' if healthy else ''}",
+                                         lambda: self._check_device(name, healthy)))
+
+    def add_task(self, task_id):
+        self.conditions.append(Condition(f"task={task_id}", lambda: self._check_task(task_id)))
+
+    def _listing(self, object_type):
+        """Names in a collection, refreshed once per round"""
+        if object_type not in self._round:
+            self._round[object_type] = self.index.items(object_type, refresh=True)
+        return self._round[object_type]
+
+    def _devices(self):
+        """Expanded device records by name (health is only in the expanded form), once per round"""
+        if DEVICE_RECORDS not in self._round:
+            self._round[DEVICE_RECORDS] = {
+                item.get('name'): item
+                for item in self.client.paginate(self.config_url + DEVICE_RECORDS, headers=self.headers,
+                                                 expanded=True, limit=PAGE_LIMIT)
+            }
+        return self._round[DEVICE_RECORDS]
+
+    def _check_object(self, object_type, name):
+        found = self._listing(object_type.strip('/')).get(name)
+        return (True, f"id {found[0]}") if found else (False, "not found")
+
+    def _check_device(self, name, healthy):
+        device = self._devices().get(name)
+        if device is None:
+            return False, "not registered"
+        health = str(device.get('healthStatus') or "unknown").lower()
+        if healthy and health not in self.healthy_states:
+            return False, f"registered, health {health}"
+        return True, f"registered, health {health}"
+
+    def _check_task(self, task_id):
+        url = TASK_STATUS_API_TPL.format(base_url=self.client.base_url, domain_uuid=self.domain_uuid, task_id=task_id)
+        response = self.client.get(url, headers=self.headers)
+        response.raise_for_status()
+        status = response.json().get('status')
+        outcome = task_outcome(status)
+        if outcome == "failure":
+            raise ConditionFailed(f"{status}: {response.json().get('message', '')}".rstrip(': '))
+        return outcome is not None, str(status)
+
+    def check_round(self, elapsed_start):
+        """Check every pending condition once; returns the number still pending"""
+        self._round = {}
+        for condition in self.conditions:
+            if condition.ready_after is not None or condition.failed:
+                continue
+            try:
+                done, condition.detail = condition.check()
+            except ConditionFailed as e:
+                condition.failed, condition.detail = True, str(e)
+                continue
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # Transient while the tenant is still settling; keep polling
+                done, condition.detail = False, f"error: {e}"
+            if done:
+                condition.ready_after = time.monotonic() - elapsed_start
+        return sum(1 for c in self.conditions if c.ready_after is None and not c.failed)
+
+    def wait(self, deadline=DEFAULT_DEADLINE, on_round=None):
+        """Poll until every condition holds (True), one fails or the deadline passes (False)"""
+        start = time.monotonic()
+
+        def done(pending):
+            return pending == 0 or any(c.failed for c in self.conditions)
+
+        def report(pending, elapsed):
+            if on_round:
+                on_round(pending, elapsed)
+
+        try:
+            poll_until(lambda: self.check_round(start), done, deadline=deadline,
+                       initial=2.0, factor=1.5, maximum=20.0, on_poll=report)
+        except PollTimeout:
+            pass
+        return all(c.ready_after is not None and not c.failed for c in self.conditions)
+
+    def report(self):
+        return [{"condition": c.label,
+                 "status": "failed" if c.failed else ("ready" if c.ready_after is not None else "pending"),
+                 "seconds": round(c.ready_after, 1) if c.ready_after is not None else None,
+                 "detail": c.detail} for c in self.conditions]
+
+
+def format_report(rows):
+    lines = [f"{'CONDITION':<44} {'STATUS':<8} {'TIME(s)':>8}  DETAIL"]
+    for row in rows:
+        seconds = f"{row['seconds']:.1f}" if row['seconds'] is not None else "-"
+        lines.append(f"{row['condition'][:44]:<44} {row['status']:<8} {seconds:>8}  {row['detail']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wait until cdFMC devices, objects and tasks are ready.")
+    parser.add_argument('--host', required=True, help="cdFMC host")
+    parser.add_argument('--token', required=True, help="API token for cdFMC")
+    parser.add_argument('--domain-uuid', default=CDFMC_DOMAIN_UUID, help="Domain UUID (defaults to cdFMC global)")
+    parser.add_argument('--device', action='append', default=[], help="Device name that must be registered (repeatable)")
+    parser.add_argument('--healthy', action='store_true', help=f"Devices must also report a healthy status ({', '.join(sorted(HEALTHY_STATES))})")
+    parser.add_argument('--zone', action='append', default=[], help="Security zone name that must exist (repeatable)")
+    parser.add_argument('--access-policy', action='append', default=[], help="Access policy name that must exist (repeatable)")
+    parser.add_argument('--object', action='append', default=[], metavar='TYPE=NAME', help="Object that must exist, e.g. policy/ftdnatpolicies=NAT (repeatable)")
+    parser.add_argument('--task', action='append', default=[], help="Task ID that must finish successfully (repeatable)")
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE, help=f"Seconds to wait in total (default {DEFAULT_DEADLINE})")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    client = get_client(args.host)
+    checker = ReadinessChecker(client, {'Authorization': 'Bearer ' + args.token}, args.domain_uuid)
+    for name in args.device:
+        checker.add_device(name, args.healthy)
+    for name in args.zone:
+        checker.add_object("object/securityzones", name)
+    for name in args.access_policy:
+        checker.add_object("policy/accesspolicies", name)
+    for spec in args.object:
+        object_type, sep, name = spec.partition('=')
+        if not sep or not name:
+            parser.error(f"--object expects TYPE=NAME, got {spec!r}")
+        checker.add_object(object_type, name)
+    for task_id in args.task:
+        checker.add_task(task_id)
+    if not checker.conditions:
+        parser.error("nothing to wait for; give at least one --device, --zone, --access-policy, --object or --task")
+
+    def progress(pending, elapsed):
+        ready_count = sum(1 for c in checker.conditions if c.ready_after is not None)
+        print(f"{elapsed:6.1f}s: {ready_count}/{len(checker.conditions)} conditions ready", file=sys.stderr)
+
+    ready = checker.wait(args.deadline, on_round=progress)
+    rows = checker.report()
+    print(json.dumps({"ready": ready, "conditions": rows}, indent=2) if args.json else format_report(rows))
+    if stats_enabled():
+        print_all_stats()
+    return ready
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
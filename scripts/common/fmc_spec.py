@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Shared pieces of the declarative spec modules (ospf_spec, interface_spec, load_objects)
+
+A spec is read from a YAML/JSON file or an inline string and validated
+offline; every problem found is collected and raised together as one
+SpecError, so a bad spec is fixed in one pass instead of one error per run.
+"""
+
+import json
+from pathlib import Path
+
+
+class SpecError(Exception):
+    """Raised with every problem found in a spec; `errors` lists them one per line"""
+
+    def __init__(self, errors, subject="spec"):
+        self.errors = list(errors)
+        super().__init__(f"{len(self.errors)} problem(s) in {subject}:\n  " + "\n  ".join(self.errors))
+
+
+def read_spec_text(value):
+    """(text, path or None) for a file path or an inline spec string"""
+    path = Path(value)
+    try:
+        is_file = path.is_file()
+    except OSError:  # An inline spec can be longer than a file name may be
+        is_file = False
+    return (path.read_text(), path) if is_file else (value, None)
+
+
+def terraform_key(name):
+    """The --network-ids key Terraform uses for an object name ("Data-Center" -> "data_center_id")"""
+    return name.strip().lower().replace('-', '_').replace(' ', '_') + "_id"
+
+
+def load_spec(value, subject="spec"):
+    """Read a spec from a file path (.yaml/.yml/.json) or an inline JSON/YAML string"""
+    text, path = read_spec_text(value)
+    if (path is not None and path.suffix.lower() == '.json') or text.lstrip().startswith(('{', '[')):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise SpecError([f"invalid JSON: {e}"], subject)
+    try:
+        import yaml
+    except ImportError:
+        raise SpecError(["YAML specs need PyYAML (pip install -r requirements.txt), or give the spec as JSON"], subject)
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise SpecError([f"invalid YAML: {e}"], subject)
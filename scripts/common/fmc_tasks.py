@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Polling helpers for long-running FMC tasks (deployments, imports, ...)
+
+poll_until() re-checks a condition with capped exponential backoff plus
+jitter until it holds or a total deadline passes, so callers move on as
+soon as the server reports a terminal state instead of sleeping a fixed time.
+"""
+
+import random
+import time
+
+import fmc_trace
+
+TASK_STATUS_API_TPL = "{base_url}/api/fmc_config/v1/domain/{domain_uuid}/job/taskstatuses/{task_id}"
+
+# FMC reports task states with inconsistent casing/wording across task types
+SUCCESS_STATES = {"SUCCESS", "SUCCEEDED", "SUCCESSFUL", "COMPLETED", "DEPLOYED",
+                  "DEPLOYMENT_SUCCEEDED", "IMPORT_SUCCESS", "EXPORT_SUCCESS"}
+FAILURE_STATES = {"FAILED", "FAILURE", "ERROR", "CANCELLED", "ABORTED",
+                  "DEPLOYMENT_FAILED", "IMPORT_FAILED", "EXPORT_FAILED"}
+
+
+class PollTimeout(Exception):
+    """Raised when a condition does not hold before the deadline"""
+
+    def __init__(self, message, last_value=None, elapsed=0.0):
+        super().__init__(message)
+        self.last_value = last_value
+        self.elapsed = elapsed
+
+
+def backoff_delays(initial=2.0, factor=1.6, maximum=30.0, jitter=0.2):
+    """Yield sleep intervals: exponential, capped at maximum, +/- jitter fraction"""
+    delay = initial
+    while True:
+        yield max(0.0, delay * random.uniform(1 - jitter, 1 + jitter))
+        delay = min(delay * factor, maximum)
+
+
+def poll_until(fetch, is_done, deadline=600.0, initial=2.0, factor=1.6, maximum=30.0,
+               jitter=0.2, on_poll=None):
+    """Call fetch() until is_done(value) is true; return (value, elapsed seconds)
+
+    Raises PollTimeout when the total deadline passes first. Exceptions from
+    fetch() propagate so callers decide what counts as transient.
+    """
+    start = time.monotonic()
+    delays = backoff_delays(initial, factor, maximum, jitter)
+    while True:
+        value = fetch()
+        elapsed = time.monotonic() - start
+        if on_poll:
+            on_poll(value, elapsed)
+        if is_done(value):
+            return value, elapsed
+
+        remaining = deadline - elapsed
+        if remaining <= 0:
+            raise PollTimeout(f"condition not met after {elapsed:.0f}s", value, elapsed)
+        delay = min(next(delays), remaining)
+        fmc_trace.record_wait('poll', delay)
+        time.sleep(delay)
+
+
+def normalize_state(status):
+    """Upper-case a status string and turn spaces/dashes into underscores"""
+    return str(status or "").strip().upper().replace(" ", "_").replace("-", "_")
+
+
+def task_outcome(status):
+    """Return 'success', 'failure' or None (still running) for an FMC task status"""
+    state = normalize_state(status)
+    if state in SUCCESS_STATES:
+        return "success"
+    if state in FAILURE_STATES or "FAIL" in state:
+        return "failure"
+    return None
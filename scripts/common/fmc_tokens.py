@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of on-prem FMC access/refresh tokens
+
+FMC limits how many tokens a user may hold and rate-limits generatetoken,
+so every run generating its own token makes parallel runs lock each other
+out. TokenManager keeps the access/refresh pair and the domain UUID per
+(host, user) under FMC_CACHE_DIR/tokens, refreshes it with auth/refreshtoken
+shortly before it expires and only generates a new one when the refreshes
+are used up or rejected. An exclusive file lock around read-refresh-write
+makes the cache safe to share between concurrent processes and threads.
+
+A token can still be revoked early (logout, another session, an FMC
+restart). The manager registers with the shared client so that a 401 for
+one of its tokens drops the cached token and the request is retried once
+with a new one.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; fall back to the in-process lock only
+    fcntl = None
+
+import requests
+
+from fmc_client import get_client, normalize_host
+from fmc_index import CACHE_DIR
+
+TOKEN_API_TPL = "{base_url}/api/fmc_platform/v1/auth/generatetoken"
+REFRESH_API_TPL = "{base_url}/api/fmc_platform/v1/auth/refreshtoken"
+
+TOKEN_TTL = float(os.getenv('FMC_TOKEN_TTL', "1800"))  # FMC access tokens last 30 minutes
+REFRESH_MARGIN = float(os.getenv('FMC_TOKEN_REFRESH_MARGIN', "120"))  # Refresh this long before expiry
+MAX_REFRESHES = 3  # FMC allows three refreshes per generated token
+
+_thread_lock = threading.Lock()
+
+
+class TokenError(Exception):
+    """Raised when no token could be generated"""
+
+
+class TokenManager:
+    """Shared, file-locked access token for one (host, user)"""
+
+    def __init__(self, host, username, password, cache_dir=CACHE_DIR, client=None):
+        self.base_url = normalize_host(host)
+        self.username = username
+        self.password = password
+        self.client = client or get_client(self.base_url)
+        key = hashlib.sha256(f"{self.base_url}|{username}".encode()).hexdigest()[:16]
+        self.dir = Path(cache_dir) / "tokens"
+        self.path = self.dir / f"token-{key}.json"
+        self.lock_path = self.dir / f"token-{key}.lock"
+        self.state = {}
+        self.issued = set()  # Access tokens handed out, so a 401 for another user's token is left alone
+        self.client.add_auth_handler(self.on_unauthorized)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock across threads (threading.Lock) and processes (flock on a side file)"""
+        self.dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+        with _thread_lock:
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, state):
+        """Write atomically and readable by the owner only (the file holds live tokens)"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.dir, prefix=".token-")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.path)
+
+    def _from_response(self, response, refreshes):
+        now = time.time()
+        return {
+            'host': self.base_url,
+            'user': self.username,
+            'access_token': response.headers['X-auth-access-token'],
+            'refresh_token': response.headers.get('X-auth-refresh-token'),
+            'domain_uuid': response.headers.get('DOMAIN_UUID'),
+            'issued_at': now,
+            'expires_at': now + TOKEN_TTL,
+            'refreshes': refreshes
+        }
+
+    def _generate(self):
+        response = self.client.post(TOKEN_API_TPL.format(base_url=self.base_url),
+                                    auth=(self.username, self.password), data={})
+        if response.status_code not in (200, 204) or 'X-auth-access-token' not in response.headers:
+            raise TokenError(f"generatetoken failed: {response.status_code} {response.text}")
+        return self._from_response(response, 0)
+
+    def _refresh(self, state):
+        """Return a refreshed state, or None when FMC rejects the refresh"""
+        response = self.client.post(REFRESH_API_TPL.format(base_url=self.base_url), headers={
+            'X-auth-access-token': state['access_token'],
+            'X-auth-refresh-token': state['refresh_token']
+        }, data={})
+        if response.status_code not in (200, 204) or 'X-auth-access-token' not in response.headers:
+            return None
+        refreshed = self._from_response(response, state.get('refreshes', 0) + 1)
+        refreshed['domain_uuid'] = refreshed['domain_uuid'] or state.get('domain_uuid')
+        return refreshed
+
+    def token(self, force_new=False):
+        """Return a valid token state: cached, refreshed, or newly generated (in that order)"""
+        with self._locked():
+            state = {} if force_new else self._load()
+            now = time.time()
+            if state.get('access_token') and now < state.get('expires_at', 0) - REFRESH_MARGIN:
+                self.state = state
+                self.issued.add(state['access_token'])
+                return state
+
+            new_state = None
+            if (state.get('refresh_token') and state.get('refreshes', 0) < MAX_REFRESHES
+                    and now < state.get('expires_at', 0)):
+                new_state = self._refresh(state)
+            if new_state is None:
+                new_state = self._generate()
+            self._save(new_state)
+            self.state = new_state
+            self.issued.add(new_state['access_token'])
+            return new_state
+
+    def headers(self):
+        """Auth header for API calls"""
+        return {'X-auth-access-token': self.token()['access_token']}
+
+    @property
+    def domain_uuid(self):
+        return (self.state or self.token()).get('domain_uuid')
+
+    def invalidate(self, stale=None):
+        """Drop the cached token, e.g. after the API answered 401 with it
+
+        With `stale`, only while the cache still holds that token, so threads
+        that got a 401 for the same token replace it once between them.
+        """
+        with self._locked():
+            if stale is not None and self._load().get('access_token') not in (None, stale):
+                return
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            self.state = {}
+
+    def on_unauthorized(self, headers):
+        """Client hook: after a 401 for one of our tokens, the headers with a new token (else None)"""
+        stale = headers.get('X-auth-access-token')
+        if stale not in self.issued or 'X-auth-refresh-token' in headers:  # A rejected refresh falls back to generatetoken
+            return None
+        self.invalidate(stale)
+        try:
+            return self.headers()
+        except (requests.RequestException, TokenError):
+            return None
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Opt-in request tracing and phase timing for the cdFMC scripts
+
+When enabled (--trace FILE on the scripts, or FMC_TRACE=FILE) every HTTP
+attempt made through the shared client, every wait (rate limiter, retry
+backoff, task polling) and every named phase is appended to a JSON-lines
+file, and a per-phase summary is printed to stderr on exit. --profile FILE
+(or FMC_PROFILE) additionally writes a cProfile dump for `python -m pstats`.
+Disabled, every hook is a no-op.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_FILE = os.getenv('FMC_TRACE', "")
+PROFILE_FILE = os.getenv('FMC_PROFILE', "")
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+class Tracer:
+    """Appends trace events to a JSON-lines file and aggregates them per phase"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'a', buffering=1)  # Line-buffered so a killed run keeps its events
+        self.script = Path(sys.argv[0]).name
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.phases = {}
+        self.totals = {'requests': 0, 'http': 0.0, 'throttle': 0.0, 'retry': 0.0, 'poll': 0.0}
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_phase(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def _write(self, event):
+        event.update(ts=round(time.time(), 3), script=self.script, pid=os.getpid(),
+                     thread=threading.current_thread().name, phase=self.current_phase())
+        line = json.dumps(event)
+        with self._lock:
+            self.file.write(line + "\n")
+
+    def _phase_entry(self, name):
+        return self.phases.setdefault(name, {'count': 0, 'seconds': 0.0, 'requests': 0, 'http': 0.0, 'wait': 0.0})
+
+    def record_request(self, method, endpoint, status, request_bytes, response_bytes, seconds, ttfb, attempt):
+        self._write({'event': 'request', 'method': method, 'endpoint': endpoint, 'status': status,
+                     'request_bytes': request_bytes, 'response_bytes': response_bytes,
+                     'seconds': round(seconds, 4), 'ttfb': round(ttfb, 4) if ttfb is not None else None,
+                     'attempt': attempt})
+        phase = self.current_phase()
+        with self._lock:
+            self.totals['requests'] += 1
+            self.totals['http'] += seconds
+            if phase:
+                entry = self._phase_entry(phase)
+                entry['requests'] += 1
+                entry['http'] += seconds
+
+    def record_wait(self, kind, seconds, endpoint=None):
+        self._write({'event': 'wait', 'kind': kind, 'endpoint': endpoint, 'seconds': round(seconds, 4)})
+        phase = self.current_phase()
+        with self._lock:
+            self.totals[kind] = self.totals.get(kind, 0.0) + seconds
+            if phase:
+                self._phase_entry(phase)['wait'] += seconds
+
+    @contextmanager
+    def phase(self, name):
+        stack = self._stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._write({'event': 'phase', 'name': name, 'seconds': round(seconds, 4)})
+            stack.pop()
+            with self._lock:
+                entry = self._phase_entry(name)
+                entry['count'] += 1
+                entry['seconds'] += seconds
+
+    def format_summary(self):
+        """Per-phase table: wall time split into HTTP, waits and everything else (our own code)"""
+        wall = time.perf_counter() - self.started
+        with self._lock:
+            lines = [f"Trace summary for {self.script}: {wall:.2f}s wall, {self.totals['requests']} requests "
+                     f"({self.totals['http']:.2f}s HTTP, {self.totals['throttle']:.2f}s throttled, "
+                     f"{self.totals['retry']:.2f}s retry backoff, {self.totals['poll']:.2f}s task polling)",
+                     f"{'PHASE':<28} {'RUNS':>4} {'TIME(s)':>8} {'REQS':>5} {'HTTP(s)':>8} {'WAIT(s)':>8} {'OTHER(s)':>9}"]
+            for name, e in self.phases.items():
+                # Phases run on worker threads overlap, so HTTP can exceed the phase's own time
+                other = max(0.0, e['seconds'] - e['http'] - e['wait'])
+                lines.append(f"{name[:28]:<28} {e['count']:>4} {e['seconds']:>8.2f} {e['requests']:>5} "
+                             f"{e['http']:>8.2f} {e['wait']:>8.2f} {other:>9.2f}")
+            lines.append(f"Trace written to {self.path}")
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+def start_tracing(trace_file=None, profile_file=None):
+    """Enable tracing (and profiling) for this process; falls back to FMC_TRACE / FMC_PROFILE"""
+    global _tracer
+    trace_file = trace_file or TRACE_FILE
+    profile_file = profile_file or PROFILE_FILE
+
+    if trace_file:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(trace_file)
+                atexit.register(_finish, _tracer)
+
+    if profile_file:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def dump():
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+            print(f"Profile written to {profile_file} (inspect with: python3 -m pstats {profile_file})", file=sys.stderr)
+        atexit.register(dump)
+    return _tracer
+
+
+def _finish(tracer):
+    print(tracer.format_summary(), file=sys.stderr)
+    tracer.close()
+
+
+def tracing_enabled():
+    return _tracer is not None
+
+
+def record_request(method, endpoint, status, request_bytes, response_bytes, seconds, ttfb=None, attempt=0):
+    if _tracer is not None:
+        _tracer.record_request(method, endpoint, status, request_bytes, response_bytes, seconds, ttfb, attempt)
+
+
+def record_wait(kind, seconds, endpoint=None):
+    """kind is 'throttle' (rate limiter / Retry-After), 'retry' (backoff) or 'poll' (task polling)"""
+    if _tracer is not None and seconds > 0:
+        _tracer.record_wait(kind, seconds, endpoint)
+
+
+@contextmanager
+def phase(name):
+    """Time a named step; requests and waits on this thread are attributed to it"""
+    if _tracer is None:
+        yield
+        return
+    with _tracer.phase(name):
+        yield
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Export device configuration from FMC/cdFMC into a local content-addressed store
+
+The counterpart of main.py's import: starts an export job for the given
+devices, follows the task with backoff and streams the resulting file to
+disk in chunks. The size (Content-Length) and hash (a sha-256 Digest
+header, or --sha256) are checked while the bytes arrive, so the file is
+never held in memory. Exports are stored by their sha256 under
+FMC_EXPORT_STORE; an export identical to an earlier one costs no extra
+space. --output places a copy (a hard link when possible) where a golden
+backup is expected, e.g. automation_backup.sfo.
+
+Usage:
+    python3 export.py --host HOST --token TOKEN --device-id ID --output automation_backup.sfo
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+import shutup
+
+# Shared pooled HTTP client lives in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import get_client, normalize_host, print_all_stats, stats_enabled
+from fmc_index import CACHE_DIR, CDFMC_DOMAIN_UUID
+from fmc_multipart import UploadProgress
+from fmc_tasks import TASK_STATUS_API_TPL, PollTimeout, poll_until, task_outcome
+from fmc_tokens import TokenError, TokenManager
+from fmc_trace import phase, start_tracing
+
+shutup.please()
+
+# Same resource family as IMPORT_API_TPL in main.py
+EXPORT_API_TPL = "{base_url}/api/fmc_config/v1/domain/{domain_uuid}/devices/operational/exports"
+DOWNLOAD_API_TPL = EXPORT_API_TPL + "/{task_id}/download"
+
+EXPORT_DEADLINE = 900  # Seconds to wait for the export task
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 300  # Seconds without data before a download is abandoned
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_ATTEMPTS = 3  # A broken or truncated download starts over
+STORE_DIR = Path(os.getenv('FMC_EXPORT_STORE', str(CACHE_DIR / "exports")))
+DEFAULT_EXPORT_OPTIONS = {"includeSharedPolicies": True}
+
+
+class DownloadError(Exception):
+    """Raised when an export or its download fails; retryable for broken transfers"""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def digest_from_headers(response):
+    """Hex sha256 from a `Digest: sha-256=<base64>` header, or None"""
+    for part in response.headers.get('Digest', '').split(','):
+        algorithm, _, value = part.strip().partition('=')
+        if algorithm.lower() == 'sha-256' and value:
+            try:
+                return base64.b64decode(value).hex()
+            except (binascii.Error, ValueError):
+                return None
+    return None
+
+
+class ContentStore:
+    """Files stored once by sha256 (sha256/ab/abcd...), plus an index of what was exported when"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "sha256"
+        self.index_path = self.root / "index.json"
+
+    def path_for(self, digest):
+        return self.objects / digest[:2] / digest
+
+    def put(self, chunks, expected_size=None, expected_sha256=None, progress=None):
+        """Write chunks to a temp file while hashing; returns (sha256, size, newly stored)
+
+        Raises DownloadError (and keeps nothing) on a size or hash mismatch.
+        """
+        self.objects.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects, prefix=".part-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if expected_size is not None and size > expected_size:
+                        raise DownloadError(f"received more than the announced {expected_size} bytes", retryable=True)
+                    f.write(chunk)
+                    digest.update(chunk)
+                    if progress:
+                        progress(size, expected_size or size)
+                f.flush()
+                os.fsync(f.fileno())
+            if expected_size is not None and size != expected_size:
+                raise DownloadError(f"truncated: {size} of {expected_size} bytes", retryable=True)
+            sha256 = digest.hexdigest()
+            if expected_sha256 and sha256 != expected_sha256.lower():
+                raise DownloadError(f"sha256 mismatch: got {sha256}, expected {expected_sha256.lower()}")
+
+            target = self.path_for(sha256)
+            if target.exists():
+                os.unlink(tmp_path)
+                return sha256, size, False
+            target.parent.mkdir(exist_ok=True)
+            os.chmod(tmp_path, 0o444)  # Stored objects are immutable
+            os.replace(tmp_path, target)
+            return sha256, size, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def record(self, sha256, size, details):
+        """Add an export to the index (written atomically)"""
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        entry = index.setdefault(sha256, {"size": size, "first_seen": time.time(), "exports": []})
+        entry["exports"].append(dict(details, at=time.time()))
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index-")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def materialize(self, sha256, output):
+        """Place a stored file at output: hard link if possible, else copy"""
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output.with_name(f".{output.name}.tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        try:
+            os.link(self.path_for(sha256), tmp_path)
+        except OSError:
+            shutil.copyfile(self.path_for(sha256), tmp_path)
+        os.replace(tmp_path, output)
+
+
+def auth_headers(base_url, token, username, password):
+    """(headers, domain UUID): bearer token for cdFMC, cached token for on-prem FMC"""
+    if token:
+        return {'Authorization': 'Bearer ' + token}, CDFMC_DOMAIN_UUID
+    tokens = TokenManager(base_url, username, password)
+    return tokens.headers(), tokens.domain_uuid
+
+
+def start_export(client, base_url, headers, domain_uuid, device_ids, export_options, name):
+    """POST the export request; returns the task ID"""
+    payload = {"type": "ExportRequest", "name": name, "deviceList": device_ids, "exportOptions": export_options}
+    response = client.post(EXPORT_API_TPL.format(base_url=base_url, domain_uuid=domain_uuid),
+                           headers=headers, json=payload)
+    if response.status_code not in (200, 201, 202):
+        raise DownloadError(f"export request rejected: {response.status_code} {response.text[:300]}")
+    try:
+        body = response.json()
+    except ValueError:
+        raise DownloadError(f"export response is not JSON: {response.text[:300]}")
+    if not isinstance(body, dict):
+        body = {}
+    task_id = body.get('metadata', {}).get('task', {}).get('id') or body.get('taskId')
+    if not task_id:
+        raise DownloadError("export response has no task ID to follow")
+    return task_id
+
+
+def wait_for_export(client, base_url, headers, domain_uuid, task_id, deadline):
+    """Poll the export task with backoff; returns (succeeded, task, elapsed)"""
+    task_url = TASK_STATUS_API_TPL.format(base_url=base_url, domain_uuid=domain_uuid, task_id=task_id)
+
+    def fetch():
+        try:
+            response = client.get(task_url, headers=headers)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            # Transient polling errors should not abort the wait
+            return {"status": None, "message": str(e)}
+
+    def report(task, elapsed):
+        print(f"Export task {task_id}: {task.get('status') or 'unknown'} ({elapsed:.0f}s)", file=sys.stderr)
+
+    try:
+        task, elapsed = poll_until(fetch, lambda t: task_outcome(t.get('status')) is not None,
+                                   deadline=deadline, on_poll=report)
+    except PollTimeout as e:
+        return False, e.last_value or {}, e.elapsed
+    return task_outcome(task.get('status')) == "success", task, elapsed
+
+
+def download_export(client, url, headers, store, expected_sha256=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """Stream the export into the store, starting over when the transfer breaks or is truncated"""
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        response = client.get(url, headers=headers, stream=True, timeout=timeout)
+        try:
+            if response.status_code != 200:
+                raise DownloadError(f"download failed: {response.status_code}")
+            # With a Content-Encoding the length refers to the encoded bytes, not what iter_content yields
+            length = response.headers.get('Content-Length')
+            expected_size = int(length) if length and not response.headers.get('Content-Encoding') else None
+            progress = UploadProgress("Downloading export", direction="received", file=sys.stderr)
+            return store.put(response.iter_content(DOWNLOAD_CHUNK_SIZE), expected_size,
+                             expected_sha256 or digest_from_headers(response), progress)
+        except (DownloadError, requests.exceptions.RequestException) as e:
+            if attempt == DOWNLOAD_ATTEMPTS or (isinstance(e, DownloadError) and not e.retryable):
+                raise
+            print(f"Download attempt {attempt} failed ({e}); retrying", file=sys.stderr)
+        finally:
+            response.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export device configuration from FMC/cdFMC into a local content-addressed store.")
+    parser.add_argument("--host", required=True, help="Address of Cisco FMC/cdFMC.")
+    parser.add_argument("--token", help="Bearer token for cdFMC.")
+    parser.add_argument("--user", help="Username for on-prem FMC.")
+    parser.add_argument("--password", help="Password for on-prem FMC.")
+    parser.add_argument("--device-id", action="append", required=True, help="Device to export (repeatable).")
+    parser.add_argument("--export-options", default=json.dumps(DEFAULT_EXPORT_OPTIONS), help=f"exportOptions JSON (default {json.dumps(DEFAULT_EXPORT_OPTIONS)}).")
+    parser.add_argument("--name", default="Automation_Export", help="Name of the export job.")
+    parser.add_argument("--output", help="Also place the exported file here (e.g. automation_backup.sfo).")
+    parser.add_argument("--store", default=str(STORE_DIR), help=f"Content-addressed store directory (default {STORE_DIR}).")
+    parser.add_argument("--sha256", help="Expected sha256 of the file; the download fails on a mismatch.")
+    parser.add_argument("--wait-timeout", type=float, default=EXPORT_DEADLINE, help=f"Seconds to wait for the export task (default {EXPORT_DEADLINE}).")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT, help=f"Seconds without data before the download is abandoned (default {READ_TIMEOUT}).")
+    parser.add_argument("--trace", help="Append a JSON-lines trace of every request, wait and phase to this file (or set FMC_TRACE).")
+    parser.add_argument("--profile", help="Write a cProfile dump to this file (or set FMC_PROFILE).")
+    args = parser.parse_args(argv)
+    start_tracing(args.trace, args.profile)
+
+    if not args.token and not (args.user and args.password):
+        parser.error("either --token (cdFMC) or --user and --password (on-prem FMC) are required")
+    try:
+        export_options = json.loads(args.export_options)
+    except json.JSONDecodeError as e:
+        parser.error(f"--export-options is not valid JSON: {e}")
+
+    base_url = normalize_host(args.host)
+    client = get_client(base_url)
+    store = ContentStore(args.store)
+    start = time.monotonic()
+    try:
+        with phase("1. auth"):
+            headers, domain_uuid = auth_headers(base_url, args.token, args.user, args.password)
+        with phase("2. start export"):
+            task_id = start_export(client, base_url, headers, domain_uuid, args.device_id, export_options, args.name)
+        with phase("3. wait for export"):
+            succeeded, task, elapsed = wait_for_export(client, base_url, headers, domain_uuid, task_id, args.wait_timeout)
+        if not succeeded:
+            print(f"Error: Export did not succeed after {elapsed:.1f}s: {task.get('status') or 'TIMEOUT'} "
+                  f"{task.get('message', '')}".rstrip(), file=sys.stderr)
+            return False
+        with phase("4. download"):
+            url = DOWNLOAD_API_TPL.format(base_url=base_url, domain_uuid=domain_uuid, task_id=task_id)
+            sha256, size, created = download_export(client, url, headers, store, args.sha256,
+                                                    (CONNECT_TIMEOUT, args.read_timeout))
+    except (requests.exceptions.RequestException, DownloadError, TokenError, OSError) as e:
+        print(f"Error: Export failed: {e}", file=sys.stderr)
+        return False
+
+    store.record(sha256, size, {"host": base_url, "devices": args.device_id, "name": args.name, "task": task_id})
+    if args.output:
+        store.materialize(sha256, args.output)
+    print(json.dumps({
+        "sha256": sha256,
+        "size": size,
+        "stored": str(store.path_for(sha256)),
+        "deduplicated": not created,
+        "output": args.output,
+        "seconds": round(time.monotonic() - start, 1)
+    }, indent=2))
+    if stats_enabled():
+        print_all_stats()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
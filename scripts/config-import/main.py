@@ -1,13 +1,26 @@
 #! .venv/bin/env python3
 
 import argparse
+import hashlib
 import json
+import os
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 import requests
 import shutup
 
+# Shared pooled HTTP client lives in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import get_client, normalize_host, print_all_stats, stats_enabled
+from fmc_index import CACHE_DIR
+from fmc_multipart import MultipartStream, UploadProgress
+from fmc_tasks import TASK_STATUS_API_TPL, PollTimeout, poll_until, task_outcome
+from fmc_tokens import TokenManager
+from fmc_trace import phase, start_tracing
+
 shutup.please()
 
 # --- Configuration ---
@@ -16,10 +29,13 @@ CDFMC_BASE_URL = ""
 API_TOKEN = ""
 BACKUP_FILE = "automation_backup.sfo"  # Default backup file name
 IS_CDFMC = True # Set to False for on-prem FMC
+IMPORT_DEADLINE = 900  # Seconds --wait polls the import task before giving up
+IMPORT_STATE_FILE = CACHE_DIR / "imports.json"  # Last successful import per target
+CONNECT_TIMEOUT = 10  # Seconds to establish the connection
+READ_TIMEOUT = 300  # Seconds to wait for the server's answer once the upload is sent
 
 # --- API Definitions ---
 # Note: These will be formatted later
-TOKEN_API_TPL = "{base_url}/api/fmc_platform/v1/auth/generatetoken"
 IMPORT_API_TPL = "{base_url}/api/fmc_config/v1/domain/{domainUUID}/devices/operational/imports"
 
 # --- Global Variables ---
@@ -32,27 +48,114 @@ def fmc_auth(base_url, is_cdfmc, token, username, password):
         headers = {'Authorization': 'Bearer ' + token}
         return
 
-    # On-prem FMC authentication
-    token_api = TOKEN_API_TPL.format(base_url=base_url)
-    response = requests.post(
-        url=token_api, auth=(username, password),
-        data={}, verify=False
-    )
-    response.raise_for_status() # Will raise an exception for non-2xx status codes
-    
-    auth_headers = response.headers
-    headers['X-auth-access-token'] = auth_headers['X-auth-access-token']
-    domainUUID = auth_headers["DOMAIN_UUID"]
+    # On-prem FMC authentication: reuse/refresh the cached token instead of generating one per run
+    tokens = TokenManager(base_url, username, password)
+    headers = tokens.headers()
+    domainUUID = tokens.domain_uuid
     print("Successfully authenticated with on-prem FMC.")
 
 
+def import_task_id(import_response):
+    """The import task's ID from the 202 response, or None."""
+    return import_response.get('metadata', {}).get('task', {}).get('id') or import_response.get('taskId')
+
+
+def wait_for_import(base_url, import_response, deadline):
+    """Poll the import task with backoff until it reaches a terminal state.
+
+    Returns (succeeded, final task status, elapsed seconds).
+    """
+    task_id = import_task_id(import_response)
+    if not task_id:
+        print("Error: Import response has no task ID to follow.")
+        return False, {}, 0.0
+
+    task_url = TASK_STATUS_API_TPL.format(base_url=base_url, domain_uuid=domainUUID, task_id=task_id)
+
+    def fetch():
+        try:
+            response = get_client(base_url).get(task_url, headers=headers)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            # Transient polling errors should not abort the wait
+            return {"status": None, "message": str(e)}
+
+    def report(task, elapsed):
+        print(f"Import task {task_id}: {task.get('status') or 'unknown'} ({elapsed:.0f}s)")
+
+    try:
+        task, elapsed = poll_until(fetch, lambda t: task_outcome(t.get('status')) is not None,
+                                   deadline=deadline, on_poll=report)
+    except PollTimeout as e:
+        print(f"Error: Import did not finish within {deadline:.0f}s.")
+        return False, e.last_value or {}, e.elapsed
+
+    return task_outcome(task.get('status')) == "success", task, elapsed
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in chunks so large backups are never read into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def import_target_key(base_url, device_list, import_options):
+    """Identify an import target: host, domain, devices and import options."""
+    target = [normalize_host(base_url), domainUUID, sorted(device_list), import_options]
+    return hashlib.sha256(json.dumps(target, sort_keys=True).encode()).hexdigest()
+
+
+def load_import_state():
+    try:
+        with open(IMPORT_STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_import(target_key, sfo_hash, file_name, elapsed, task_id):
+    """Remember a confirmed successful import (written atomically)."""
+    state = load_import_state()
+    state[target_key] = {"sha256": sfo_hash, "file": file_name, "task_id": task_id, "imported_at": time.time(),
+                         "seconds": round(elapsed, 1)}
+    IMPORT_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=IMPORT_STATE_FILE.parent, prefix=".imports-")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, IMPORT_STATE_FILE)
+
+
+def import_still_on_server(base_url, previous):
+    """Whether the recorded import's task still reports success on the server.
+
+    The record is local and the cdFMC domain UUID is the same on every tenant,
+    so a tenant reset or re-provisioned behind the same host would match it.
+    Its import task is gone there, so the import runs again.
+    """
+    if not previous.get("task_id"):
+        return False
+    task_url = TASK_STATUS_API_TPL.format(base_url=base_url, domain_uuid=domainUUID, task_id=previous["task_id"])
+    try:
+        response = get_client(base_url).get(task_url, headers=headers)
+        if response.status_code != 200:
+            return False
+        return task_outcome(response.json().get('status')) == "success"
+    except (requests.exceptions.RequestException, ValueError):
+        return False
+
+
 def main(args):
     base_url = args.host if args.host else CDFMC_BASE_URL
     token = args.token if args.token else API_TOKEN
     backup_file = args.backup_file if args.backup_file else BACKUP_FILE
     
     try:
-        fmc_auth(base_url, IS_CDFMC, token, args.user, args.password)
+        with phase("1. auth"):
+            fmc_auth(base_url, IS_CDFMC, token, args.user, args.password)
     except Exception as e:
         print(f"Authentication failed: {e}")
         sys.exit(1)
@@ -79,27 +182,44 @@ def main(args):
         "cf76391c-1087-11ee-a9af-e1a3028a9c82"
     ]
 
+    # Skip the upload and server-side import when this exact file was already imported to this target
+    with phase("2. hash backup"):
+        sfo_hash = file_sha256(backup_file_path)
+    target_key = import_target_key(base_url, device_list, import_options)
+    previous = load_import_state().get(target_key)
+    if (previous and previous.get("sha256") == sfo_hash and not args.force
+            and import_still_on_server(base_url, previous)):
+        print(f"'{backup_file_path.name}' (sha256 {sfo_hash[:12]}) was already imported to this target; "
+              f"skipping (use --force to re-import).")
+        return
+
     print(f"Attempting to import '{backup_file_path.name}' to '{import_url}'...")
 
     try:
-        with open(backup_file_path, 'rb') as f:
-            # Combine all fields into a single dictionary for the 'files' parameter
-            multipart_payload = {
-                'deviceList': (None, json.dumps(device_list)),
-                'importOptions': (None, json.dumps(import_options)),
-                'payloadFile': (backup_file_path.name, f, 'application/octet-stream'),
-                'name': "Automation_Backup"
-            }
-            
-            # The 'requests' library sets the 'Content-Type' with boundary automatically
-            response = requests.post(import_url, headers=headers, files=multipart_payload, verify=False)
-            
-            # Check for HTTP errors
-            # response.raise_for_status()
-
-            print(f"Status Code: {response.status_code}")
-            print("Response JSON:")
-            print(json.dumps(response.json(), indent=2))
+        # Stream the multipart body from disk in fixed-size chunks with a known Content-Length
+        multipart_payload = MultipartStream([
+            ('deviceList', json.dumps(device_list)),
+            ('importOptions', json.dumps(import_options)),
+            ('payloadFile', (backup_file_path.name, backup_file_path, 'application/octet-stream')),
+            ('name', "Automation_Backup")
+        ], progress=UploadProgress(f"Uploading {backup_file_path.name}"))
+        upload_headers = dict(headers, **{'Content-Type': multipart_payload.content_type})
+
+        upload_start = time.monotonic()
+        with phase("3. upload"):
+            response = get_client(base_url).post(import_url, headers=upload_headers, data=multipart_payload,
+                                                 timeout=(args.connect_timeout, args.read_timeout))
+        upload_seconds = time.monotonic() - upload_start
+        print(f"Uploaded {len(multipart_payload)} bytes in {upload_seconds:.1f}s "
+              f"({len(multipart_payload) / max(upload_seconds, 1e-6) / 1048576:.2f} MB/s)")
+
+        # Check for HTTP errors
+        # response.raise_for_status()
+
+        print(f"Status Code: {response.status_code}")
+        print("Response JSON:")
+        import_response = response.json()
+        print(json.dumps(import_response, indent=2))
 
     except (requests.exceptions.RequestException, ConnectionError, OSError, Exception) as e:
         print(f"An error occurred during the request: {e}")
@@ -108,15 +228,44 @@ def main(args):
             print(f"Response Body: {e.response.text}")
         sys.exit(1)
 
-if __name__ == "__main__":
+    if args.wait:
+        if response.status_code not in (200, 201, 202):
+            print(f"Error: Import request was rejected ({response.status_code}).")
+            sys.exit(1)
+        with phase("4. wait for import"):
+            succeeded, task, elapsed = wait_for_import(base_url, import_response, args.wait_timeout)
+        if not succeeded:
+            print(f"Import failed after {elapsed:.1f}s: {task.get('status')} {task.get('message', '')}".rstrip())
+            sys.exit(1)
+        print(f"Import completed in {elapsed:.1f}s.")
+        # Only a confirmed import is recorded, so a failed or unverified one is never skipped later
+        record_import(target_key, sfo_hash, backup_file_path.name, elapsed, import_task_id(import_response))
+
+    if stats_enabled():
+        print_all_stats()
+
+def parse_args(argv=None):
+    """Parses the command line (argv defaults to sys.argv, so fmcctl can call it in-process)."""
     parser = argparse.ArgumentParser(description="Import device configuration to Cisco FMC or cdFMC.")
     parser.add_argument("--host", help="Address of Cisco FMC/cdFMC. Defaults to pre-configured cdFMC URL.")
     parser.add_argument("--token", help="Bearer Token for cdFMC. Defaults to pre-configured token.")
     parser.add_argument("--backup-file", help="Backup SFO file to pass configuration with.")
     parser.add_argument("--user", help="Username for on-prem FMC.")
     parser.add_argument("--password", help="Password for on-prem FMC.")
-    args = parser.parse_args()
-    main(args)
+    parser.add_argument("--wait", action="store_true", help="Wait for the import task to finish; exit non-zero if it fails. Only a confirmed import is recorded, so the skip of an already imported file only applies to runs with --wait.")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT, help=f"Seconds to establish the connection (default {CONNECT_TIMEOUT}).")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT, help=f"Seconds to wait for the import response after uploading (default {READ_TIMEOUT}).")
+    parser.add_argument("--force", action="store_true", help="Re-import even if this file was already imported to the same target (the skip is checked against the recorded import task on the server).")
+    parser.add_argument("--wait-timeout", type=float, default=IMPORT_DEADLINE, help=f"Seconds to wait for the import (default {IMPORT_DEADLINE}).")
+    parser.add_argument("--trace", help="Append a JSON-lines trace of every request, wait and phase to this file (or set FMC_TRACE).")
+    parser.add_argument("--profile", help="Write a cProfile dump to this file (or set FMC_PROFILE).")
+    args = parser.parse_args(argv)
+    start_tracing(args.trace, args.profile)
+    return args
+
+
+if __name__ == "__main__":
+    main(parse_args())
 
 
 # {
@@ -2,15 +2,22 @@
 import argparse
 import json
 import sys
+from pathlib import Path
 
 import requests
 import shutup
 
+# Shared pooled HTTP client lives in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import get_client, normalize_host, print_all_stats, stats_enabled
+from fmc_index import ObjectIndex
+from fmc_tokens import TokenError, TokenManager
+from fmc_trace import phase, start_tracing
+
 shutup.please()
 
 # API Endpoint Templates
-TOKEN_API_TPL = "{base_url}/api/fmc_platform/v1/auth/generatetoken"
-Plat_API_TPL = "{base_url}/api/fmc_config/v1/domain/{domain_uuid}/policy/ftdplatformsettingspolicies"
+PLAT_OBJECT_TYPE = "policy/ftdplatformsettingspolicies"
 ATTACH_API_TPL = "{base_url}/api/fmc_config/v1/domain/{domain_uuid}/assignment/policyassignments"
 
 # Global variables to store auth details
@@ -24,98 +31,162 @@ def fmc_auth(base_url, is_cdfmc, token, username, password):
         headers = {'Authorization': 'Bearer ' + token}
         return
 
-    # On-prem FMC authentication
+    # On-prem FMC authentication: reuse/refresh the cached token instead of generating one per run
     try:
-        response = requests.post(
-            url=TOKEN_API_TPL.format(base_url=base_url),
-            auth=(username, password),
-            data={},
-            verify=False
-        )
-        response.raise_for_status()
-        auth_headers = response.headers
-        headers['X-auth-access-token'] = auth_headers['X-auth-access-token']
-        domain_uuid = auth_headers["DOMAIN_UUID"]
-    except requests.exceptions.RequestException as e:
+        tokens = TokenManager(base_url, username, password)
+        headers = tokens.headers()
+        domain_uuid = tokens.domain_uuid
+    except (requests.exceptions.RequestException, TokenError) as e:
         print(f"Error: Authentication failed: {e}", file=sys.stderr)
         sys.exit(1)
 
-def get_plat_settings_id(base_url, plat_policy_name):
-    """Finds and returns the ID of an Platform policy by its name."""
-    api_url = Plat_API_TPL.format(base_url=base_url, domain_uuid=domain_uuid)
+def get_plat_settings_id(index, plat_policy_name):
+    """Finds and returns the ID of an Platform policy by its name (via the run's cached object index)."""
     try:
-        response = requests.get(url=api_url, headers=headers, verify=False)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'items' not in data:
-            print(f"Error: No 'items' key found in Platform policy list response.", file=sys.stderr)
-            return None, None
-
-        for policy in data['items']:
-            if policy.get('name') == plat_policy_name:
-                return policy.get('id'), policy.get('type')
+        policy_id, policy_type = index.lookup(PLAT_OBJECT_TYPE, plat_policy_name)
+        if policy_id:
+            return policy_id, policy_type
 
         print(f"Error: Plat Policy with name '{plat_policy_name}' not found.", file=sys.stderr)
         return None, None
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Error: Failed to retrieve Plat policies: {e}", file=sys.stderr)
         return None, None
 
-def attach_to_device(base_url, policy_id, policy_type, device_id):
+def get_policy_assignment(base_url, policy_id):
+    """Returns the existing PolicyAssignment for a policy, or None if it isn't assigned yet."""
+    api_url = f"{ATTACH_API_TPL.format(base_url=base_url, domain_uuid=domain_uuid)}/{policy_id}"
+    response = get_client(base_url).get(api_url, headers=headers)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def attach_to_devices(base_url, policy_id, policy_type, policy_name, device_ids):
+    """Assigns a policy to all devices with one call, merging into an existing assignment via PUT."""
+    targets = [{"id": device_id, "type": "Device"} for device_id in device_ids]
     payload = {
         "type": "PolicyAssignment",
         "policy": {
             "type": policy_type,
             "id": policy_id,
-            "name": "vFTD-platform-policy"
+            "name": policy_name
         },
-        "targets": [
-            {
-            "id": device_id,
-            "type": "Device"
-            }]
+        "targets": targets
         }
     api_url = ATTACH_API_TPL.format(base_url=base_url, domain_uuid=domain_uuid)
     try:
-        response = requests.post(url=api_url, headers=headers, json=payload, verify=False)
-        if response.status_code != 201:
-            raise requests.exceptions.RequestException
-        
-        print("Successfully created policy assignment.")
+        existing = get_policy_assignment(base_url, policy_id)
+        if existing is None:
+            response = get_client(base_url).post(api_url, headers=headers, json=payload)
+            if response.status_code != 201:
+                raise requests.exceptions.RequestException(f"{response.status_code} {response.text}")
+            print(f"Successfully created policy assignment for '{policy_name}' ({len(targets)} devices).")
+            return True
+
+        # The assignment ID is the policy ID; keep its current targets and add ours
+        current = existing.get('targets', [])
+        known = {target.get('id') for target in current}
+        added = [target for target in targets if target['id'] not in known]
+        if not added:
+            print(f"Policy '{policy_name}' is already assigned to all {len(targets)} devices.")
+            return True
+
+        payload["id"] = policy_id
+        payload["targets"] = [{"id": t.get('id'), "type": t.get('type', "Device")} for t in current] + added
+        response = get_client(base_url).put(f"{api_url}/{policy_id}", headers=headers, json=payload)
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(f"{response.status_code} {response.text}")
+        print(f"Successfully updated policy assignment for '{policy_name}' (+{len(added)} devices).")
+        return True
 
     except requests.exceptions.RequestException as e:
-        print(f"ERROR: Failed to attach policy. API responded with: {e}", file=sys.stderr)
-        sys.exit(1)
-
-def main():
-    """Main execution function."""
-    parser = argparse.ArgumentParser(description="Fetch FMC Plat Policy ID for Terraform.")
+        print(f"ERROR: Failed to attach policy '{policy_name}'. API responded with: {e}", file=sys.stderr)
+        return False
+
+def parse_list_args(values):
+    """Flattens repeated options, each a JSON list or a comma-separated string, keeping order.
+
+    Raises ValueError for a value that starts like a JSON list but isn't one.
+    """
+    items = []
+    for value in values or []:
+        value = value.strip()
+        parsed = json.loads(value) if value.startswith('[') else value.split(',')
+        for item in parsed:
+            item = str(item).strip()
+            if item and item not in items:
+                items.append(item)
+    return items
+
+def main(argv=None):
+    """Main execution function (argv defaults to sys.argv, so fmcctl can call it in-process)."""
+    parser = argparse.ArgumentParser(description="Assign FMC Platform Settings policies to devices.")
     parser.add_argument('--host', required=True, help="FMC host URL (e.g., https://fmc.example.com)")
-    parser.add_argument('--platformpolicy_name', required=True, help="Name of the Plat policy to find.")
+    parser.add_argument('--platformpolicy_name', required=True, action='append',
+                        help="Name of the Plat policy to assign (repeat, or a JSON list / comma-separated names).")
     parser.add_argument('--is_cdfmc', help="Flag for cisco Defense Orchestrator (CDO/cdFMC).")
     parser.add_argument('--token', help="API token for cdFMC.")
     parser.add_argument('--user', help="Username for on-prem FMC.")
     parser.add_argument('--password', help="Password for on-prem FMC.")
-    parser.add_argument('--deviceid', help="Device to attach to policy")
-    args = parser.parse_args()
+    parser.add_argument('--deviceid', action='append',
+                        help="Device(s) to attach to the policy (repeat, or a JSON list / comma-separated IDs).")
+    parser.add_argument('--trace', help="Append a JSON-lines trace of every request, wait and phase to this file (or set FMC_TRACE).")
+    parser.add_argument('--profile', help="Write a cProfile dump to this file (or set FMC_PROFILE).")
+    args = parser.parse_args(argv)
+    start_tracing(args.trace, args.profile)
 
-    # Authenticate
-    fmc_auth(args.host, args.is_cdfmc, args.token, args.user, args.password)
-
-    # Get the Policy ID
-    policy_id, policy_type = get_plat_settings_id(f"https://{args.host}", args.platformpolicy_name)
+    try:
+        device_ids = parse_list_args(args.deviceid)
+        policy_names = parse_list_args(args.platformpolicy_name)
+    except ValueError as e:
+        parser.error(f"--deviceid/--platformpolicy_name must be a JSON list or comma-separated values: {e}")
+    if not device_ids:
+        parser.error("at least one --deviceid is required")
 
-    if not policy_id:
-        sys.exit(1)
+    # Bare hosts get https://; an explicit scheme is kept (e.g. the local mock)
+    base_url = normalize_host(args.host)
 
+    # Authenticate
+    with phase("1. auth"):
+        fmc_auth(base_url, args.is_cdfmc, args.token, args.user, args.password)
+
+    # Resolve every policy first (one listing, served from the index cache after that)
+    index = ObjectIndex(get_client(base_url), headers, domain_uuid)
+    policies = {}
+    with phase("2. resolve policies"):
+        for policy_name in policy_names:
+            policy_id, policy_type = get_plat_settings_id(index, policy_name)
+            if not policy_id:
+                sys.exit(1)
+            policies[policy_name] = (policy_id, policy_type)
+
+    # One assignment call per policy, carrying all device targets
+    failed = []
+    with phase("3. assign"):
+        for name, (policy_id, policy_type) in policies.items():
+            if attach_to_devices(base_url, policy_id, policy_type, name, device_ids):
+                continue
+            # A 404 for a cached ID drops it from the index; a policy recreated since then gets one retry
+            new_id, new_type = get_plat_settings_id(index, name)
+            if new_id and new_id != policy_id:
+                print(f"Policy '{name}' was recreated (ID {new_id}); retrying the assignment.", file=sys.stderr)
+                policies[name] = (new_id, new_type)
+                if attach_to_devices(base_url, new_id, new_type, name, device_ids):
+                    continue
+            failed.append(name)
 
-    attach_to_device(f"https://{args.host}", policy_id, policy_type, args.deviceid)
     # IMPORTANT: Print the output as a JSON object to stdout.
-    # Terraform's external data source will parse this.
-    output = {"platform_policy_id": policy_id}
+    # Terraform's external data source will parse this (string values only).
+    output = {"platform_policy_id": policies[policy_names[0]][0],
+              "platform_policy_ids": ",".join(policy_id for policy_id, _ in policies.values())}
     print(json.dumps(output))
 
+    if stats_enabled():
+        print_all_stats()
+    if failed:
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
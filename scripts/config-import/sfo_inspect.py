@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Inspect an FMC .sfo backup without importing or extracting it.
+
+An .sfo is a gzip'd tar holding metadata.json and, per device, nested .sfo
+archives (gzip'd tars) with CSMExportFile.pol - a zip of XML object streams.
+This walks all of it in a single streaming pass (nothing is written to disk
+and no member is held in memory whole) and emits a JSON index of the
+devices, policies, archive members and objects (type, name, count, size).
+
+Usage:
+    python3 sfo_inspect.py automation_backup.sfo
+    python3 sfo_inspect.py new_backup.sfo --diff automation_backup.sfo
+"""
+
+import argparse
+import hashlib
+import json
+import struct
+import sys
+import tarfile
+import time
+import xml.etree.ElementTree as ET
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+MAX_JSON_MEMBER = 8 * 1024 * 1024  # metadata files are small; bigger ones are only sized
+OBJECT_DEPTH = 4  # <object-stream><map><entry><OBJECT>
+
+ZIP_LOCAL_HEADER = 0x04034b50
+ZIP_DATA_DESCRIPTOR = 0x08074b50
+
+
+class HashingReader:
+    """File wrapper that hashes and counts the raw bytes as they are read"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.sha256.update(data)
+        self.bytes_read += len(data)
+        return data
+
+
+class PushbackReader:
+    """Sequential reader that lets the zip walker return over-read bytes"""
+
+    def __init__(self, f):
+        self.f = f
+        self.pending = b''
+
+    def read(self, size):
+        if self.pending:
+            data, self.pending = self.pending[:size], self.pending[size:]
+            if len(data) < size:
+                data += self.f.read(size - len(data))
+            return data
+        return self.f.read(size)
+
+    def read_exact(self, size):
+        data = self.read(size)
+        while len(data) < size:
+            more = self.read(size - len(data))
+            if not more:
+                raise EOFError("truncated zip stream")
+            data += more
+        return data
+
+    def unread(self, data):
+        self.pending = data + self.pending
+
+
+class ObjectStreamIndexer:
+    """Incrementally parses an XML object stream, recording each top-level object"""
+
+    def __init__(self, index, source):
+        self.index = index
+        self.source = source
+        self.parser = ET.XMLPullParser(events=('start', 'end'))
+        self.depth = 0
+
+    def feed(self, data):
+        self.parser.feed(data)
+        self._drain()
+
+    def close(self):
+        self.parser.close()
+        self._drain()
+
+    def _drain(self):
+        for event, elem in self.parser.read_events():
+            if event == 'start':
+                self.depth += 1
+                continue
+            if self.depth == OBJECT_DEPTH:
+                name = elem.findtext('name')
+                if name is not None:
+                    object_type = elem.findtext('type') or elem.tag.rsplit('.', 1)[-1]
+                    self.index.add_object(object_type, elem.findtext('subtype'), name,
+                                          len(ET.tostring(elem)), self.source)
+            if self.depth <= OBJECT_DEPTH:
+                elem.clear()  # Drop finished objects so memory stays bounded
+            self.depth -= 1
+
+
+class SfoIndex:
+    """Accumulates what the streaming walk finds"""
+
+    def __init__(self):
+        self.fmc = {}
+        self.devices = []
+        self.policies = []
+        self.members = []
+        self.objects = {}
+        self.notes = []
+
+    def add_member(self, path, size):
+        self.members.append({"path": path, "size": size})
+
+    def add_object(self, object_type, subtype, name, size, source):
+        entry = self.objects.setdefault((object_type, name), {
+            "type": object_type, "subtype": subtype, "name": name, "count": 0, "size": 0, "sources": []
+        })
+        entry["count"] += 1
+        entry["size"] = max(entry["size"], size)
+        if source not in entry["sources"]:
+            entry["sources"].append(source)
+
+    def add_metadata(self, data):
+        """Merge metadata.json / DeviceMetadata.json (both list devices and their policies)"""
+        self.fmc = self.fmc or data.get('fmcInfo', {})
+        for device in data.get('devices', []):
+            uid = device.get('uid') or device.get('deviceUuid')
+            known = next((d for d in self.devices if d["uid"] == uid), None)
+            if known is None:
+                known = {"uid": uid, "name": None, "version": None}
+                self.devices.append(known)
+            for field in ("name", "version"):
+                known[field] = known[field] or device.get(field)
+            for policy in device.get('policies', []):
+                entry = {"device": uid, "type": policy.get('type'), "name": policy.get('name')}
+                if entry not in self.policies:
+                    self.policies.append(entry)
+
+    def to_dict(self):
+        objects = sorted(self.objects.values(), key=lambda o: (o["type"], o["name"]))
+        summary = {}
+        for obj in objects:
+            summary[obj["type"]] = summary.get(obj["type"], 0) + 1
+        return {
+            "fmc": self.fmc,
+            "devices": self.devices,
+            "policies": self.policies,
+            "members": self.members,
+            "object_counts": dict(sorted(summary.items())),
+            "objects": objects,
+            "notes": self.notes
+        }
+
+
+def read_chunks(f, chunk_size=CHUNK_SIZE):
+    return iter(lambda: f.read(chunk_size), b'')
+
+
+def walk_tar(fileobj, index, prefix=""):
+    """Stream a gzip'd tar; nested .sfo archives are walked recursively"""
+    with tarfile.open(fileobj=fileobj, mode='r|gz') as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            path = f"{prefix}{member.name}"
+            index.add_member(path, member.size)
+            stream = tar.extractfile(member)
+            name = member.name.lower()
+            if name.endswith('.sfo'):
+                walk_tar(stream, index, prefix=f"{path}!")
+            elif name.endswith('.pol'):
+                walk_zip(stream, index, prefix=f"{path}!")
+            elif name.endswith('.json') and member.size <= MAX_JSON_MEMBER:
+                try:
+                    index.add_metadata(json.loads(stream.read()))
+                except ValueError:
+                    index.notes.append(f"{path}: not valid JSON")
+
+
+def walk_zip(fileobj, index, prefix=""):
+    """Stream a zip by its local headers (no central directory, so no seeking)"""
+    reader = PushbackReader(fileobj)
+    while True:
+        header = reader.read(30)
+        if len(header) < 30 or struct.unpack('<I', header[:4])[0] != ZIP_LOCAL_HEADER:
+            return  # Central directory (or end of stream) reached
+        (_, _, flags, method, _, _, _, comp_size, size,
+         name_len, extra_len) = struct.unpack('<IHHHHHIIIHH', header)
+        name = reader.read_exact(name_len).decode('utf-8', 'replace')
+        reader.read_exact(extra_len)
+        path = f"{prefix}{name}"
+        has_descriptor = bool(flags & 0x08)
+
+        if method not in (0, 8) or (method == 0 and has_descriptor):
+            index.notes.append(f"{path}: unsupported zip entry (method {method}); stopped walking this archive")
+            return
+
+        xml_indexer = ObjectStreamIndexer(index, path) if name.lower().endswith('.xml') else None
+        if method == 8:
+            size = inflate_entry(reader, None if has_descriptor else comp_size, xml_indexer)
+        else:
+            size = 0
+            remaining = comp_size
+            while remaining:
+                data = reader.read_exact(min(CHUNK_SIZE, remaining))
+                remaining -= len(data)
+                size += len(data)
+                if xml_indexer:
+                    xml_indexer.feed(data)
+        if xml_indexer:
+            xml_indexer.close()
+
+        if has_descriptor:
+            signature = reader.read_exact(4)
+            # The descriptor signature is optional: crc32, compressed size, size follow
+            reader.read_exact(12 if struct.unpack('<I', signature)[0] == ZIP_DATA_DESCRIPTOR else 8)
+        index.add_member(path, size)
+
+
+def inflate_entry(reader, comp_size, xml_indexer):
+    """Inflate one deflated entry chunk by chunk; returns the uncompressed size"""
+    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+    size = 0
+    remaining = comp_size
+    while not inflater.eof:
+        want = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+        data = reader.read(want)
+        if not data:
+            raise EOFError("truncated deflate stream")
+        if remaining is not None:
+            remaining -= len(data)
+        out = inflater.decompress(data, CHUNK_SIZE)
+        while True:
+            size += len(out)
+            if xml_indexer and out:
+                xml_indexer.feed(out)
+            # At end of stream the leftover input is in unused_data (unconsumed_tail may repeat it)
+            if inflater.eof or not inflater.unconsumed_tail:
+                break
+            out = inflater.decompress(inflater.unconsumed_tail, CHUNK_SIZE)
+    if inflater.unused_data:
+        reader.unread(inflater.unused_data)
+    return size
+
+
+def inspect_sfo(path):
+    """Build the index for one .sfo file in a single streaming pass"""
+    start = time.perf_counter()
+    index = SfoIndex()
+    with open(path, 'rb') as f:
+        raw = HashingReader(f)
+        walk_tar(raw, index)
+        for _ in read_chunks(raw):  # Hash any trailing bytes after the tar end
+            pass
+    result = {"file": str(path), "compressed_bytes": raw.bytes_read, "sha256": raw.sha256.hexdigest()}
+    result.update(index.to_dict())
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def diff_indexes(new, old):
+    """Compare two indexes by policy and by (object type, name)"""
+    def keys(index, field):
+        return {(item["type"], item["name"]) for item in index[field]}
+
+    def as_list(pairs):
+        return [{"type": t, "name": n} for t, n in sorted(pairs)]
+
+    new_objects, old_objects = keys(new, "objects"), keys(old, "objects")
+    new_policies, old_policies = keys(new, "policies"), keys(old, "policies")
+    old_sizes = {(o["type"], o["name"]): o["size"] for o in old["objects"]}
+    changed = [{"type": o["type"], "name": o["name"], "old_size": old_sizes[(o["type"], o["name"])], "new_size": o["size"]}
+               for o in new["objects"]
+               if (o["type"], o["name"]) in old_sizes and old_sizes[(o["type"], o["name"])] != o["size"]]
+    return {
+        "new": new["file"],
+        "old": old["file"],
+        "identical": new["sha256"] == old["sha256"],
+        "policies_added": as_list(new_policies - old_policies),
+        "policies_removed": as_list(old_policies - new_policies),
+        "objects_added": as_list(new_objects - old_objects),
+        "objects_removed": as_list(old_objects - new_objects),
+        "objects_resized": changed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the contents of an FMC .sfo backup without importing it.")
+    parser.add_argument("backup_file", help="Backup SFO file to inspect.")
+    parser.add_argument("--diff", metavar="OTHER_SFO", help="Compare against another backup instead of printing the index.")
+    parser.add_argument("--output", help="Write the JSON to this file instead of stdout.")
+    args = parser.parse_args()
+
+    try:
+        result = inspect_sfo(args.backup_file)
+        if args.diff:
+            result = diff_indexes(result, inspect_sfo(args.diff))
+    except (OSError, tarfile.TarError, zlib.error, EOFError, ET.ParseError) as e:
+        print(f"Error: Could not read backup: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,122 @@
 import Devmiko
 import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_WORKERS = 8
+CONNECT_TIMEOUT = 60  # Seconds to open the SSH session to one FTD
+COMMAND_TIMEOUT = 300  # Seconds for the generated command to finish on one FTD
+DISCONNECT_TIMEOUT = 10
+
+def run_with_timeout(fn, timeout):
+    """Run fn on a daemon thread; raise TimeoutError if it hasn't returned in time
+
+    Devmiko calls can't be interrupted, so a hung session is abandoned rather
+    than joined (a daemon thread doesn't keep the process alive).
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome['value'] = fn()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"no response after {timeout:.0f}s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('value')
+
+def onboard_host(spec, connect_timeout=CONNECT_TIMEOUT, command_timeout=COMMAND_TIMEOUT):
+    """Run the generated command on one FTD; returns a result dict (never raises)"""
+    host = spec['host']
+    result = {"host": host, "ok": False, "stage": "connect", "seconds": 0.0, "output": None, "error": None}
+    start = time.perf_counter()
+    client = Devmiko.FTDClient(debug=False, filename=None, level='DEBUG')
+    connected = False
+    try:
+        run_with_timeout(lambda: client.connect(host, username=spec['username'], password=spec['password']),
+                         connect_timeout)
+        connected = True
+        result["stage"] = "command"
+        run_with_timeout(lambda: client.send_command(command=spec['gen_command']), command_timeout)
+        result["output"] = client.output
+        result["stage"] = "done"
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if connected:
+            try:
+                run_with_timeout(client.disconnect, DISCONNECT_TIMEOUT)
+            except Exception:
+                pass
+        result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+def load_hosts(value, username=None, password=None):
+    """Parse --hosts (inline JSON or a JSON file); username/password fill in missing credentials"""
+    if Path(value).is_file():
+        with open(value) as f:
+            hosts = json.load(f)
+    else:
+        hosts = json.loads(value)
+    specs = []
+    for entry in hosts:
+        spec = {
+            "host": entry.get("host"),
+            "username": entry.get("username", username),
+            "password": entry.get("password", password),
+            "gen_command": entry.get("gen_command") or entry.get("command")
+        }
+        missing = [key for key, val in spec.items() if not val]
+        if missing:
+            raise ValueError(f"host entry {entry.get('host')!r} is missing {', '.join(missing)}")
+        specs.append(spec)
+    return specs
+
+def onboard_hosts(specs, workers=DEFAULT_WORKERS, connect_timeout=CONNECT_TIMEOUT, command_timeout=COMMAND_TIMEOUT):
+    """Onboard every host on a bounded thread pool; results keep the input order"""
+    workers = max(1, min(workers, len(specs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(onboard_host, spec, connect_timeout, command_timeout) for spec in specs]
+        results = []
+        for future in futures:
+            result = future.result()
+            status = "OK" if result["ok"] else f"FAILED at {result['stage']}: {result['error']}"
+            print(f"{result['host']}: {status} ({result['seconds']}s)", file=sys.stderr)
+            results.append(result)
+    return results
 
 def main(args):
+    if args.hosts:
+        try:
+            specs = load_hosts(args.hosts, args.username, args.password)
+        except (ValueError, OSError, AttributeError) as e:
+            print(f"Error: Invalid --hosts: {e}", file=sys.stderr)
+            sys.exit(2)
+        start = time.perf_counter()
+        results = onboard_hosts(specs, args.workers, args.connect_timeout, args.command_timeout)
+        failed = [r for r in results if not r["ok"]]
+        # Machine-readable summary on stdout; progress lines went to stderr
+        print(json.dumps({
+            "ok": len(results) - len(failed),
+            "failed": len(failed),
+            "seconds": round(time.perf_counter() - start, 2),
+            "results": results
+        }, indent=2))
+        if failed:
+            sys.exit(1)
+        return
+
     host = args.host
     username = args.username
     password = args.password
@@ -14,11 +129,20 @@ def main(args):
     print(client.output)
     client.disconnect()
 
-if __name__ == "__main__":
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
-    parser.add_argument("--host", required=True, help="Address of Cisco FTD")
-    parser.add_argument("--username", required=True, help="Username of Cisco FTD")
-    parser.add_argument("--password", required=True, help="Password of Cisco FTD")
-    parser.add_argument("--gen_command", required=True, help="Generated Command")
-    args = parser.parse_args()
-    main(args)
\ No newline at end of file
+    parser.add_argument("--host", help="Address of Cisco FTD")
+    parser.add_argument("--username", help="Username of Cisco FTD (default for --hosts entries)")
+    parser.add_argument("--password", help="Password of Cisco FTD (default for --hosts entries)")
+    parser.add_argument("--gen_command", help="Generated Command")
+    parser.add_argument("--hosts", help="JSON list (inline or file) of {host, gen_command[, username, password]} to onboard concurrently")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"SSH sessions run at once (default {DEFAULT_WORKERS})")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT, help=f"Seconds to connect to each FTD (default {CONNECT_TIMEOUT})")
+    parser.add_argument("--command-timeout", type=float, default=COMMAND_TIMEOUT, help=f"Seconds for the command on each FTD (default {COMMAND_TIMEOUT})")
+    args = parser.parse_args(argv)
+    if not args.hosts and not (args.host and args.username and args.password and args.gen_command):
+        parser.error("either --hosts or --host, --username, --password and --gen_command are required")
+    return args
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+fmcctl - one entry point for the cdFMC automation scripts
+
+Each subcommand runs an existing script in-process; its module (and heavy
+dependencies such as requests or Devmiko) is only imported when that
+subcommand is used. `run-plan` executes a JSON list of steps in a single
+process, so interpreter startup, imports and the pooled keep-alive session
+to the FMC host are paid once instead of once per step.
+
+Usage:
+    python3 fmcctl.py ospf --fmc-url HOST --api-key TOKEN --device-ids '[...]' --network-ids '{...}'
+    python3 fmcctl.py interfaces --host HOST --token TOKEN --spec interfaces.yaml --zone-ids '{...}'
+    python3 fmcctl.py objects --host HOST --token TOKEN --spec objects.csv --output network_ids.json
+    python3 fmcctl.py deploy --host HOST --token TOKEN --device-ids '[...]'
+    python3 fmcctl.py export --host HOST --token TOKEN --device-id ID --output automation_backup.sfo
+    python3 fmcctl.py ready --host HOST --token TOKEN --device FTD-1 --zone WAN --deadline 900
+    python3 fmcctl.py teardown --state terraform.tfstate --tfvars terraform.tfvars --dry-run
+    python3 fmcctl.py run-plan plan.json
+
+Plan file:
+    {
+      "defaults": {"host": "https://tenant.app.us.cdo.cisco.com", "token": "..."},
+      "steps": [
+        {"command": "import", "args": {"backup-file": "automation_backup.sfo", "wait": true}},
+        {"command": "platsettings", "args": {"is_cdfmc": "true", "deviceid": ["id1", "id2"],
+                                             "platformpolicy_name": "vFTD-platform-policy"}},
+        {"command": "ospf", "args": {"device-ids": ["id1", "id2"], "network-ids": {...}, "reconcile": true}},
+        {"command": "deploy", "args": {"device-ids": ["id1", "id2"]}, "continue_on_error": true}
+      ]
+    }
+A bare list of steps is accepted too. "args" values: true adds the flag,
+false/null omit it, lists and objects are passed as JSON; "argv" may be
+given instead of "args" as a literal argument list.
+"""
+
+import argparse
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+COMMON_DIR = SCRIPTS_DIR / "common"
+
+
+def _run_main_with_args(module, argv):
+    """Scripts whose main() takes an already parsed namespace"""
+    return module.main(module.parse_args(argv))
+
+
+def _run_main(module, argv):
+    """Scripts whose main() parses argv itself"""
+    return module.main(argv)
+
+
+# command -> (script path, module name, runner, host flag, token flag)
+COMMANDS = {
+    "import": ("config-import/main.py", "fmc_config_import", _run_main_with_args, "--host", "--token"),
+    "platsettings": ("config-import/platsettings.py", "fmc_platsettings", _run_main, "--host", "--token"),
+    "export": ("config-import/export.py", "fmc_export", _run_main, "--host", "--token"),
+    "ospf": ("ospf/cdfmc_ospf_automation.py", "fmc_ospf", _run_main, "--fmc-url", "--api-key"),
+    "interfaces": ("interfaces/apply_interfaces.py", "fmc_interfaces", _run_main, "--host", "--token"),
+    "objects": ("objects/load_objects.py", "fmc_objects", _run_main, "--host", "--token"),
+    "onboard": ("device-onboarding/cdo.py", "fmc_onboard", _run_main_with_args, None, None),
+    "deploy": (None, None, None, "--host", "--token"),
+    "ready": ("common/fmc_ready.py", "fmc_ready", _run_main, "--host", "--token"),
+    "teardown": ("teardown/teardown.py", "fmc_teardown", _run_main, "--host", "--token"),
+}
+
+
+def load_script(relative_path, module_name):
+    """Import a script by path on first use (each script dir goes on sys.path for its sibling imports)"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    path = SCRIPTS_DIR / relative_path
+    for directory in (str(COMMON_DIR), str(path.parent)):
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
+
+
+def run_deploy(argv):
+    """Deploy the given devices that have pending changes (one request) and wait for the task"""
+    parser = argparse.ArgumentParser(prog="fmcctl deploy", description="Deploy pending changes and wait for the task.")
+    parser.add_argument("--host", required=True, help="cdFMC host")
+    parser.add_argument("--token", required=True, help="API token for cdFMC")
+    parser.add_argument("--device-ids", required=True, help="JSON list or comma-separated device IDs")
+    parser.add_argument("--timeout", type=float, help="Seconds to wait for the deployment")
+    parser.add_argument("--force", action="store_true", help="Full push to every device, even without pending changes")
+    args = parser.parse_args(argv)
+
+    ospf = load_script(COMMANDS["ospf"][0], COMMANDS["ospf"][1])
+    from fmc_client import normalize_host
+    api = ospf.CdFMCRestAPI(normalize_host(args.host), args.token)
+    device_ids = ospf.parse_device_ids(args.device_ids)
+    result = api.deploy_and_wait(device_ids, deadline=args.timeout or ospf.DEPLOY_DEADLINE, force=args.force)
+    ospf.print_deployment_results(result)
+    return result["success"]
+
+
+def run_command(command, argv):
+    """Run one subcommand in-process; returns an exit code"""
+    path, module_name, runner, _, _ = COMMANDS[command]
+    try:
+        if command == "deploy":
+            result = run_deploy(argv)
+        else:
+            result = runner(load_script(path, module_name), argv)
+    except SystemExit as e:
+        # The scripts sys.exit() on errors (argparse does too); keep the plan process alive
+        code = e.code
+        return code if isinstance(code, int) else (0 if code is None else 1)
+    except KeyboardInterrupt:
+        raise
+    except Exception as e:
+        print(f"fmcctl {command}: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    # main() returns False (ospf, deploy) or None (the others) when it didn't exit
+    return 1 if result is False else 0
+
+
+def args_to_argv(args):
+    """{"device-ids": [...], "wait": true} -> ["--device-ids", "[...]", "--wait"]"""
+    argv = []
+    for key, value in args.items():
+        flag = f"--{key}"
+        if value is None or value is False:
+            continue
+        if value is True:
+            argv.append(flag)
+        elif isinstance(value, (list, dict)):
+            argv += [flag, json.dumps(value)]
+        else:
+            argv += [flag, str(value)]
+    return argv
+
+
+def _has_flag(argv, flag):
+    """Whether argv already sets flag, as `--flag value` or `--flag=value`"""
+    return any(arg == flag or arg.startswith(flag + '=') for arg in argv)
+
+
+def step_argv(step, defaults):
+    """Build a step's argument list, filling in the plan's host/token under the command's flag names"""
+    command = step["command"]
+    _, _, _, host_flag, token_flag = COMMANDS[command]
+    if "argv" in step:
+        argv = [str(arg) for arg in step["argv"]]
+    else:
+        argv = args_to_argv(step.get("args", {}))
+    if host_flag and defaults.get("host") and not _has_flag(argv, host_flag):
+        from fmc_client import normalize_host
+        argv += [host_flag, normalize_host(defaults["host"])]
+    if token_flag and defaults.get("token") and not _has_flag(argv, token_flag):
+        argv += [token_flag, defaults["token"]]
+    return argv
+
+
+def run_plan(plan_file):
+    """Execute every step of a plan in this process; stops at the first failure unless continue_on_error"""
+    with open(plan_file) as f:
+        plan = json.load(f)
+    if isinstance(plan, list):
+        plan = {"steps": plan}
+    defaults = plan.get("defaults", {})
+    steps = plan.get("steps", [])
+    for number, step in enumerate(steps, 1):
+        if step.get("command") not in COMMANDS:
+            print(f"Error: step {number} has unknown command {step.get('command')!r}", file=sys.stderr)
+            return 2
+
+    if str(COMMON_DIR) not in sys.path:
+        sys.path.insert(0, str(COMMON_DIR))
+    results = []
+    start = time.perf_counter()
+    for number, step in enumerate(steps, 1):
+        name = step.get("name", step["command"])
+        print(f"\n===== fmcctl step {number}/{len(steps)}: {name} =====", flush=True)
+        step_start = time.perf_counter()
+        code = run_command(step["command"], step_argv(step, defaults))
+        sys.stdout.flush()
+        results.append((number, name, code, time.perf_counter() - step_start))
+        if code != 0 and not step.get("continue_on_error"):
+            print(f"Step {number} ({name}) failed with exit code {code}; stopping.", file=sys.stderr)
+            break
+
+    print(f"\n{'STEP':>4} {'NAME':<24} {'EXIT':>4} {'TIME(s)':>8}")
+    for number, name, code, seconds in results:
+        print(f"{number:>4} {name[:24]:<24} {code:>4} {seconds:>8.1f}")
+    skipped = len(steps) - len(results)
+    print(f"{len(results)} step(s) run{f', {skipped} skipped' if skipped else ''} in {time.perf_counter() - start:.1f}s")
+
+    if "fmc_client" in sys.modules:
+        import fmc_client
+        if fmc_client.stats_enabled():
+            fmc_client.print_all_stats()
+    return 0 if all(code == 0 for _, _, code, _ in results) and not skipped else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fmcctl", description="Run the cdFMC automation scripts from one entry point.")
+    parser.add_argument("command", choices=sorted(COMMANDS) + ["run-plan"], help="Subcommand to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the subcommand (see fmcctl COMMAND --help)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run-plan":
+        if len(args.args) != 1:
+            parser.error("run-plan takes exactly one plan file")
+        return run_plan(args.args[0])
+    return run_command(args.command, args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
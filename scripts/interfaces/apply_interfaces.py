@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Apply a declarative physical interface spec to many devices at once
+
+modules/fmc-interfaces manages every interface as its own provider
+resource: a GET and a PUT per interface, with the provider's parallelism
+working against FMC's per-device locking. Here each device's
+physicalinterfaces collection is listed once (expanded), compared with
+the spec, and only the interfaces that differ are PUT. Writes to one
+device are serialized; devices are worked on concurrently, so the run
+time grows with the number of devices rather than interfaces.
+
+The spec format is described in interface_spec.py. --check validates it
+offline; --dry-run also reads the devices and prints what would change.
+
+Usage:
+    python3 apply_interfaces.py --spec interfaces.yaml --zone-ids zones.json \\
+        --host HOST --token TOKEN
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+
+# Shared pooled HTTP client lives in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import get_client, print_all_stats, stats_enabled
+from fmc_index import CDFMC_DOMAIN_UUID, CONFIG_API_TPL
+from fmc_trace import phase, start_tracing
+from interface_spec import FIELDS, SpecError, build_plan, format_plan, interface_payload, load_spec, prefix_length, zone_ids
+
+INTERFACES_PATH = "devices/devicerecords/{device_id}/physicalinterfaces"
+DEFAULT_WORKERS = 8
+READ_ONLY_KEYS = ("links", "metadata")  # Returned by GET, rejected or ignored by PUT
+
+
+def _live_value(interface, key):
+    """The live value of a spec key, normalized the way the spec is"""
+    value = interface
+    for part in FIELDS[key]:
+        value = value.get(part) if isinstance(value, dict) else None
+    if key == "ipv4_static_netmask" and value is not None:
+        return prefix_length(value)
+    if key == "description" and value is None:
+        return ""
+    return value
+
+
+def diff_interface(fields, interface):
+    """Spec keys whose live value differs: {key: (live, wanted)}"""
+    drift = {}
+    for key, wanted in fields.items():
+        live = _live_value(interface, key)
+        if live != wanted and str(live) != str(wanted):
+            drift[key] = (live, wanted)
+    return drift
+
+
+def put_body(interface, fields):
+    """The live interface with the spec's fields laid over it
+
+    Nested objects (ipv4, securityZone) are replaced as a whole, so e.g. a
+    DHCP setting doesn't linger next to a new static address.
+    """
+    body = {key: value for key, value in interface.items() if key not in READ_ONLY_KEYS}
+    body.update(interface_payload(fields))
+    return body
+
+
+class InterfaceApplier:
+    """Reconciles physical interfaces: one listing per device, PUTs serialized per device"""
+
+    def __init__(self, client, headers, domain_uuid=CDFMC_DOMAIN_UUID, workers=DEFAULT_WORKERS, dry_run=False):
+        self.client = client
+        self.headers = headers
+        self.config_url = CONFIG_API_TPL.format(base_url=client.base_url, domain_uuid=domain_uuid)
+        self.workers = workers
+        self.dry_run = dry_run
+
+    def live_interfaces(self, device_id):
+        """Hardware name -> expanded PhysicalInterface for one device"""
+        url = self.config_url + INTERFACES_PATH.format(device_id=device_id)
+        return {item.get('name'): item for item in self.client.paginate(url, headers=self.headers, expanded=True)}
+
+    def apply_device(self, device):
+        """Bring one device's interfaces in line with the spec; returns a result dict"""
+        start = time.perf_counter()
+        result = {"device_id": device["device_id"], "name": device["name"], "changed": [], "unchanged": [],
+                  "failed": [], "seconds": 0.0}
+        try:
+            with phase("2. read"):
+                live = self.live_interfaces(device["device_id"])
+        except (requests.RequestException, ValueError) as e:
+            result["failed"].append({"interface": "*", "error": f"listing interfaces failed: {e}"})
+            result["seconds"] = time.perf_counter() - start
+            return result
+
+        for name, fields in device["interfaces"].items():
+            interface = live.get(name)
+            if interface is None:
+                result["failed"].append({"interface": name, "error": "no such interface on the device"})
+                continue
+            drift = diff_interface(fields, interface)
+            if not drift:
+                result["unchanged"].append(name)
+                continue
+            change = {"interface": name, "fields": {key: {"from": live_value, "to": wanted}
+                                                    for key, (live_value, wanted) in drift.items()}}
+            if not self.dry_run:
+                with phase("3. apply"):
+                    url = f"{self.config_url}{INTERFACES_PATH.format(device_id=device['device_id'])}/{interface['id']}"
+                    try:
+                        response = self.client.put(url, headers=self.headers, json=put_body(interface, fields))
+                    except requests.RequestException as e:
+                        result["failed"].append(dict(change, error=str(e)))
+                        continue
+                if response.status_code not in (200, 201):
+                    result["failed"].append(dict(change, error=f"{response.status_code} {response.text[:200]}"))
+                    continue
+            result["changed"].append(change)
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    def apply(self, plan):
+        """Apply every device concurrently (one worker per device); results in plan order"""
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            futures = {pool.submit(self.apply_device, device): device["device_id"] for device in plan}
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                print(f"   {result['name']}: {len(result['changed'])} changed, {len(result['unchanged'])} unchanged, "
+                      f"{len(result['failed'])} failed ({result['seconds']:.1f}s)", file=sys.stderr)
+        return [results[device["device_id"]] for device in plan]
+
+
+def format_results(results, dry_run=False):
+    """A line per device, followed by its changed and failed interfaces"""
+    verb = "would change" if dry_run else "changed"
+    lines = []
+    for result in results:
+        lines.append(f"{result['name']} ({result['device_id']}): {len(result['changed'])} {verb}, "
+                     f"{len(result['unchanged'])} unchanged, {len(result['failed'])} failed")
+        for change in result["changed"]:
+            fields = ", ".join(f"{key} {value['from']!r} -> {value['to']!r}" for key, value in change["fields"].items())
+            lines.append(f"   {change['interface']}: {fields}")
+        for failure in result["failed"]:
+            lines.append(f"   FAILED {failure['interface']}: {failure['error']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a declarative physical interface spec to FTD devices on cdFMC.")
+    parser.add_argument('--spec', required=True, help="YAML/JSON spec (file or inline) of devices and interfaces; see interface_spec.py")
+    parser.add_argument('--zone-ids', help="JSON (or path to JSON) mapping security zone names to IDs or to objects with an `id`, e.g. the security_zones output of modules/fmc-devices")
+    parser.add_argument('--host', help="cdFMC host")
+    parser.add_argument('--token', help="API token for cdFMC")
+    parser.add_argument('--domain-uuid', default=CDFMC_DOMAIN_UUID, help="Domain UUID (defaults to cdFMC global)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f"Devices worked on concurrently (default {DEFAULT_WORKERS})")
+    parser.add_argument('--check', action='store_true', help="Validate the spec offline and print the plan without any API call")
+    parser.add_argument('--dry-run', action='store_true', help="Read the devices and print what would change without writing")
+    parser.add_argument('--json', action='store_true', help="Print the result as JSON")
+    parser.add_argument('--trace', help="Append a JSON-lines trace of every request, wait and phase to this file (or set FMC_TRACE)")
+    parser.add_argument('--profile', help="Write a cProfile dump to this file (or set FMC_PROFILE)")
+    args = parser.parse_args(argv)
+    start_tracing(args.trace, args.profile)
+
+    try:
+        zones = {}
+        if args.zone_ids:
+            zones_path = Path(args.zone_ids)
+            zones = zone_ids(json.loads(zones_path.read_text() if zones_path.is_file() else args.zone_ids))
+        with phase("1. plan"):
+            plan = build_plan(load_spec(args.spec), zones)
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Error: Invalid --zone-ids or spec: {e}", file=sys.stderr)
+        return False
+    except SpecError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+
+    interface_count = sum(len(device["interfaces"]) for device in plan)
+    if args.check:
+        print(format_plan(plan))
+        print(f"\nSpec OK: {interface_count} interface(s) on {len(plan)} device(s)")
+        return True
+    if not args.host or not args.token:
+        parser.error("--host and --token are required unless --check")
+
+    start = time.perf_counter()
+    print(f"{'Checking' if args.dry_run else 'Applying'} {interface_count} interface(s) on {len(plan)} device(s)...",
+          file=sys.stderr)
+    applier = InterfaceApplier(get_client(args.host), {'Authorization': 'Bearer ' + args.token},
+                               args.domain_uuid, args.workers, args.dry_run)
+    results = applier.apply(plan)
+    ok = not any(result["failed"] for result in results)
+
+    if args.json:
+        print(json.dumps({"ok": ok, "dry_run": args.dry_run, "seconds": round(time.perf_counter() - start, 2),
+                          "devices": results}, indent=2))
+    else:
+        print(format_results(results, args.dry_run))
+        changed = sum(len(result["changed"]) for result in results)
+        print(f"{'OK' if ok else 'FAILED'}: {changed} of {interface_count} interface(s) "
+              f"{'would change' if args.dry_run else 'changed'} in {time.perf_counter() - start:.1f}s")
+    if stats_enabled():
+        print_all_stats()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
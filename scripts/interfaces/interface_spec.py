@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Declarative physical interface spec: any number of devices in one file
+
+Read from YAML or JSON and validated entirely offline, like ospf_spec.py:
+every problem (unknown keys, bad addresses, zone names without an ID, an
+interface or logical name used twice on a device) is reported together
+before the first API call. apply_interfaces.py then applies the plan.
+
+Spec format:
+    security_zones:            # optional name -> zone ID (merged over --zone-ids)
+      WAN: 0050568A-...
+    defaults:                  # optional, merged under every interface
+      mode: NONE
+      enabled: true
+    devices:
+      - id: 0f5c...            # device record ID
+        name: DC_FTDv          # optional, only used in messages
+        interfaces:
+          - name: GigabitEthernet0/0     # hardware name, as listed by FMC
+            logical_name: WAN
+            description: PHY-Interface G0/0
+            security_zone: WAN           # or security_zone_id: <ID>
+            ipv4: 198.18.8.2/24          # or ipv4_static_address + ipv4_static_netmask
+            mtu: 1500
+            enable_sgt_propagate: true
+            ip_based_monitoring: true
+            ip_based_monitoring_type: AUTO
+
+Keys use the fmc_device_physical_interface attribute names, so a
+Terraform resource block converts line by line. Only the keys given are
+managed; everything else on the interface is left as FMC has it, except
+that an IPv4 address or a security zone replaces the interface's whole
+ipv4 / securityZone object (so e.g. a DHCP setting doesn't linger next
+to a new static address).
+"""
+
+import ipaddress
+
+from fmc_spec import SpecError
+from fmc_spec import load_spec as _load_spec
+
+MODES = ("NONE", "INLINE", "PASSIVE", "TAP", "ERSPAN", "SWITCHPORT")
+MONITORING_TYPES = ("AUTO", "PEER_IPV4", "PEER_IPV6", "AUTO4", "AUTO6")
+MTU_RANGE = (64, 9198)
+
+# Spec key -> path of the field in the PhysicalInterface payload
+FIELDS = {
+    "logical_name": ("ifname",),
+    "description": ("description",),
+    "mode": ("mode",),
+    "enabled": ("enabled",),
+    "mtu": ("MTU",),
+    "security_zone_id": ("securityZone", "id"),
+    "ipv4_static_address": ("ipv4", "static", "address"),
+    "ipv4_static_netmask": ("ipv4", "static", "netmask"),
+    "enable_sgt_propagate": ("enableSGTPropagate",),
+    "ip_based_monitoring": ("ipBasedMonitoring",),
+    "ip_based_monitoring_type": ("ipBasedMonitoringType",),
+}
+SPEC_KEYS = set(FIELDS) | {"name", "security_zone", "ipv4"}
+BOOLEAN_KEYS = ("enabled", "enable_sgt_propagate", "ip_based_monitoring")
+SPEC_SUBJECT = "interface spec"  # As named in SpecError messages
+
+
+def load_spec(value):
+    """Read a spec from a file path (.yaml/.yml/.json) or an inline JSON/YAML string"""
+    return _load_spec(value, SPEC_SUBJECT)
+
+
+def zone_ids(value):
+    """Zone name -> ID from a mapping of IDs or of Terraform zone objects ({"id": ...})"""
+    zones = {}
+    for name, zone in (value or {}).items():
+        zone_id = zone.get("id") if isinstance(zone, dict) else zone
+        if zone_id:
+            zones[str(name)] = str(zone_id)
+    return zones
+
+
+def prefix_length(netmask):
+    """Netmask as a prefix length string ("255.255.255.0" or 24 -> "24"), or None if invalid"""
+    if isinstance(netmask, bool):
+        return None
+    text = str(netmask).strip().lstrip('/')
+    try:
+        return str(ipaddress.IPv4Network(f"0.0.0.0/{text}").prefixlen)
+    except ValueError:
+        return None
+
+
+def interface_payload(fields):
+    """Nested PhysicalInterface fragment for {spec key: value}"""
+    payload = {}
+    for key, value in fields.items():
+        *parents, leaf = FIELDS[key]
+        node = payload
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[leaf] = value
+    if "securityZone" in payload:
+        payload["securityZone"]["type"] = "SecurityZone"
+    return payload
+
+
+def _build_interface(interface, where, zones, errors):
+    """Validate one interface entry; returns ({spec key: value}, hardware name) or (None, None)"""
+    if not isinstance(interface, dict):
+        errors.append(f"{where}: expected a mapping")
+        return None, None
+    for key in sorted(set(interface) - SPEC_KEYS, key=str):  # YAML keys can be numbers
+        errors.append(f"{where}.{key}: unknown key (expected one of {', '.join(sorted(SPEC_KEYS))})")
+    name = interface.get("name")
+    if not name:
+        errors.append(f"{where}.name: the interface's hardware name is required")
+
+    fields = {key: interface[key] for key in FIELDS if interface.get(key) is not None}
+    for key in BOOLEAN_KEYS:
+        if key in fields and not isinstance(fields[key], bool):
+            errors.append(f"{where}.{key}: expected true or false, got {fields[key]!r}")
+    for key in ("logical_name", "description", "security_zone_id"):
+        if key in fields:
+            fields[key] = str(fields[key])
+
+    if "mode" in fields:
+        fields["mode"] = str(fields["mode"]).upper()
+        if fields["mode"] not in MODES:
+            errors.append(f"{where}.mode: invalid mode {interface['mode']!r} (expected {', '.join(MODES)})")
+    if "ip_based_monitoring_type" in fields:
+        fields["ip_based_monitoring_type"] = str(fields["ip_based_monitoring_type"]).upper()
+        if fields["ip_based_monitoring_type"] not in MONITORING_TYPES:
+            errors.append(f"{where}.ip_based_monitoring_type: invalid type {interface['ip_based_monitoring_type']!r} "
+                          f"(expected {', '.join(MONITORING_TYPES)})")
+    if "mtu" in fields:
+        mtu = fields["mtu"]
+        if isinstance(mtu, bool) or not str(mtu).isdigit() or not MTU_RANGE[0] <= int(mtu) <= MTU_RANGE[1]:
+            errors.append(f"{where}.mtu: invalid MTU {mtu!r} (expected {MTU_RANGE[0]}-{MTU_RANGE[1]})")
+        else:
+            fields["mtu"] = int(mtu)
+
+    zone = interface.get("security_zone")
+    if zone is not None:
+        if "security_zone_id" in fields:
+            errors.append(f"{where}: give security_zone or security_zone_id, not both")
+        elif str(zone) not in zones:
+            errors.append(f"{where}.security_zone: zone {zone!r} has no ID (add it to `security_zones` or --zone-ids)")
+        else:
+            fields["security_zone_id"] = zones[str(zone)]
+
+    if interface.get("ipv4") is not None:
+        if "ipv4_static_address" in fields or "ipv4_static_netmask" in fields:
+            errors.append(f"{where}: give ipv4 or ipv4_static_address/ipv4_static_netmask, not both")
+        else:
+            address, _, netmask = str(interface["ipv4"]).partition('/')
+            if netmask:
+                fields["ipv4_static_address"], fields["ipv4_static_netmask"] = address, netmask
+            else:
+                errors.append(f"{where}.ipv4: expected ADDRESS/PREFIX, got {interface['ipv4']!r}")
+    if "ipv4_static_address" in fields:
+        try:
+            fields["ipv4_static_address"] = str(ipaddress.IPv4Address(str(fields["ipv4_static_address"]).strip()))
+        except ValueError:
+            errors.append(f"{where}: invalid IPv4 address {fields['ipv4_static_address']!r}")
+        if fields.get("ipv4_static_netmask") is None:
+            errors.append(f"{where}: an IPv4 address needs a netmask")
+    if fields.get("ipv4_static_netmask") is not None:
+        netmask = prefix_length(fields["ipv4_static_netmask"])
+        if netmask is None:
+            errors.append(f"{where}: invalid netmask {fields['ipv4_static_netmask']!r}")
+        fields["ipv4_static_netmask"] = netmask
+        if "ipv4_static_address" not in fields:
+            errors.append(f"{where}: a netmask needs an IPv4 address")
+    return fields, name and str(name)
+
+
+def build_plan(spec, zones=None):
+    """Validate a spec and resolve every interface offline
+
+    Returns [{"device_id", "name", "interfaces": {hardware name: {spec key: value}}}]
+    in spec order; raises SpecError listing every problem found.
+    """
+    if not isinstance(spec, dict):
+        raise SpecError(["the spec must be a mapping with a `devices` list"], SPEC_SUBJECT)
+    errors = []
+    zones = dict(zones or {})
+    zones.update(zone_ids(spec.get("security_zones")))
+    defaults = spec.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        errors.append("defaults: expected a mapping")
+        defaults = {}
+    devices = spec.get("devices")
+    if not isinstance(devices, list) or not devices:
+        raise SpecError(errors + ["devices: at least one device is required"], SPEC_SUBJECT)
+
+    plan = []
+    seen_devices = {}
+    for d, device in enumerate(devices):
+        where = f"devices[{d}]"
+        if not isinstance(device, dict):
+            errors.append(f"{where}: expected a mapping")
+            continue
+        device_id = device.get("id")
+        if not device_id:
+            errors.append(f"{where}.id: device ID is required")
+        elif str(device_id) in seen_devices:
+            errors.append(f"{where}.id: device {device_id} is already defined at {seen_devices[str(device_id)]}")
+        else:
+            seen_devices[str(device_id)] = where
+
+        interface_list = device.get("interfaces")
+        if not isinstance(interface_list, list) or not interface_list:
+            errors.append(f"{where}.interfaces: at least one interface is required")
+            interface_list = []
+        interfaces = {}
+        logical_names = {}
+        for i, interface in enumerate(interface_list):
+            interface_where = f"{where}.interfaces[{i}]"
+            merged = {**defaults, **interface} if isinstance(interface, dict) else interface
+            fields, name = _build_interface(merged, interface_where, zones, errors)
+            if fields is None or not name:
+                continue
+            if name in interfaces:
+                errors.append(f"{interface_where}.name: {name} is listed twice on this device")
+                continue
+            logical_name = fields.get("logical_name")
+            if logical_name and logical_name.lower() in logical_names:
+                errors.append(f"{interface_where}.logical_name: {logical_name} is already used by "
+                              f"{logical_names[logical_name.lower()]}")
+            elif logical_name:
+                logical_names[logical_name.lower()] = name
+            interfaces[name] = fields
+        plan.append({"device_id": str(device_id), "name": device.get("name") or str(device_id),
+                     "interfaces": interfaces})
+
+    if errors:
+        raise SpecError(errors, SPEC_SUBJECT)
+    return plan
+
+
+def format_plan(plan):
+    """One line per device/interface"""
+    lines = []
+    for device in plan:
+        lines.append(f"{device['name']} ({device['device_id']})")
+        for name, fields in device["interfaces"].items():
+            address = ""
+            if "ipv4_static_address" in fields:
+                address = f" {fields['ipv4_static_address']}/{fields['ipv4_static_netmask']}"
+            lines.append(f"   {name}: {fields.get('logical_name', '-')}{address} ({len(fields)} field(s))")
+    return "\n".join(lines)
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Bulk loader for network objects, host objects and static routes
+
+modules/fmc-network-objects and modules/fmc-networking POST every object
+and route on its own. This loader reads the same definitions from a JSON
+or CSV spec, looks the names up in the object index (scripts/common/
+fmc_index.py) and creates only what is missing: networks and hosts with
+`?bulk=true`, up to 1000 per request. Static routes are compared with
+each device's ipv4staticroutes listing (one GET per device) and the
+missing ones are created per device, devices concurrently.
+
+The name -> ID map of every network and host in the spec is printed (or
+written to --output) in the shape cdfmc_ospf_automation.py --network-ids
+expects: {"attacker_id": "...", "data_center_id": "...", ...}.
+
+Spec (JSON):
+    {
+      "networks": [{"name": "Attacker", "prefix": "198.18.14.0/24", "description": "..."}],
+      "hosts": [{"name": "AWS1", "ip": "169.254.6.1"}],
+      "routes": [{"device_id": "0f5c...", "interface": "WAN", "networks": ["Coinforge1_net"],
+                  "gateway": "En-Cat8Kv", "metric": 1}]
+    }
+A route's networks and gateway may name objects from the spec or existing
+ones (e.g. any-ipv4); a gateway given as an address is used as a literal.
+
+Spec (CSV), one object or route per row:
+    type,name,value,description,device_id,interface,networks,gateway,metric
+    network,Attacker,198.18.14.0/24,Attacker network segment,,,,,
+    host,AWS1,169.254.6.1,,,,,,
+    route,,,,0f5c...,WAN,Branch-EVPN-Overlay-Main;Branch-EVPN-Underlay,198.18.8.1,1
+
+Usage:
+    python3 load_objects.py --spec objects.json --host HOST --token TOKEN --output network_ids.json
+"""
+
+import argparse
+import csv
+import ipaddress
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+# Shared pooled HTTP client lives in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import get_client, print_all_stats, stats_enabled
+from fmc_index import CDFMC_DOMAIN_UUID, ObjectIndex
+from fmc_spec import SpecError, read_spec_text, terraform_key
+from fmc_trace import phase, start_tracing
+
+BULK_LIMIT = 1000  # FMC maximum objects per bulk request
+DEFAULT_WORKERS = 8
+ROUTES_PATH = "devices/devicerecords/{device_id}/routing/ipv4staticroutes"
+
+# Spec section -> (collection, object type, value attribute as in the Terraform resource)
+OBJECT_KINDS = {
+    "networks": ("object/networks", "Network", "prefix"),
+    "hosts": ("object/hosts", "Host", "ip"),
+}
+CSV_TYPES = {"network": "networks", "host": "hosts", "route": "routes"}
+SPEC_SUBJECT = "object spec"  # As named in SpecError messages
+
+
+def _csv_spec(text):
+    """Turn CSV rows into the JSON spec layout"""
+    spec = {"networks": [], "hosts": [], "routes": []}
+    for line, row in enumerate(csv.DictReader(text.splitlines()), start=2):
+        row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        section = CSV_TYPES.get(row.get("type", "").lower())
+        if section is None:
+            raise SpecError([f"line {line}: type must be network, host or route, got {row.get('type')!r}"], SPEC_SUBJECT)
+        if section == "routes":
+            spec["routes"].append({"device_id": row.get("device_id"), "interface": row.get("interface"),
+                                   "networks": [n.strip() for n in row.get("networks", "").split(';') if n.strip()],
+                                   "gateway": row.get("gateway"), "metric": row.get("metric") or 1})
+        else:
+            spec[section].append({"name": row.get("name"), OBJECT_KINDS[section][2]: row.get("value"),
+                                  "description": row.get("description") or None})
+    return spec
+
+
+def load_spec(value):
+    """Read a spec from a .csv/.json file or an inline JSON string"""
+    text, path = read_spec_text(value)
+    if path is not None and path.suffix.lower() == '.csv':
+        return _csv_spec(text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise SpecError([f"invalid JSON: {e}"], SPEC_SUBJECT)
+
+
+def validate_spec(spec):
+    """Check a spec offline; returns {"networks", "hosts", "routes"} with values normalized
+
+    Raises SpecError listing every problem found.
+    """
+    if not isinstance(spec, dict):
+        raise SpecError(["the spec must be a mapping of networks, hosts and routes"], SPEC_SUBJECT)
+    errors = []
+    result = {"networks": [], "hosts": [], "routes": []}
+    names = {}
+    for section, (_, object_type, attribute) in OBJECT_KINDS.items():
+        for i, item in enumerate(spec.get(section) or []):
+            where = f"{section}[{i}]"
+            if not isinstance(item, dict):
+                errors.append(f"{where}: expected a mapping")
+                continue
+            name = str(item.get("name") or "").strip()
+            value = str(item.get(attribute, item.get("value")) or "").strip()
+            if not name:
+                errors.append(f"{where}.name: a name is required")
+            elif name.lower() in names:
+                errors.append(f"{where}.name: {name} is already defined at {names[name.lower()]}")
+            else:
+                names[name.lower()] = where
+            try:
+                value = str(ipaddress.ip_network(value, strict=False) if section == "networks"
+                            else ipaddress.ip_address(value))
+            except ValueError:
+                errors.append(f"{where}.{attribute}: invalid {'prefix' if section == 'networks' else 'address'} {value!r}")
+            entry = {"name": name, "type": object_type, "value": value}
+            if item.get("description"):
+                entry["description"] = str(item["description"])
+            result[section].append(entry)
+
+    for i, route in enumerate(spec.get("routes") or []):
+        where = f"routes[{i}]"
+        if not isinstance(route, dict):
+            errors.append(f"{where}: expected a mapping")
+            continue
+        for key in ("device_id", "interface", "gateway"):
+            if not route.get(key):
+                errors.append(f"{where}.{key}: required")
+        networks = route.get("networks")
+        if not isinstance(networks, list) or not networks:
+            errors.append(f"{where}.networks: at least one destination network is required")
+            networks = []
+        metric = route.get("metric", 1)
+        if isinstance(metric, bool) or not str(metric).isdigit() or not 1 <= int(metric) <= 254:
+            errors.append(f"{where}.metric: invalid metric {metric!r} (expected 1-254)")
+            metric = 1
+        result["routes"].append({"device_id": str(route.get("device_id")), "interface": str(route.get("interface")),
+                                 "networks": [str(n) for n in networks], "gateway": str(route.get("gateway")),
+                                 "metric": int(metric)})
+    if errors:
+        raise SpecError(errors, SPEC_SUBJECT)
+    return result
+
+
+def _is_address(value):
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def route_payload(route, resolve):
+    """IPv4StaticRoute payload; resolve(name) -> {"id", "type", "name"} for networks and hosts"""
+    gateway = route["gateway"]
+    if _is_address(gateway):
+        gateway_ref = {"literal": {"type": "Host", "value": gateway}}
+    else:
+        gateway_ref = {"object": resolve(gateway)}
+    return {
+        "type": "IPv4StaticRoute",
+        "interfaceName": route["interface"],
+        "selectedNetworks": [resolve(name) for name in route["networks"]],
+        "gateway": gateway_ref,
+        "metricValue": route["metric"],
+        "isTunneled": False
+    }
+
+
+def route_key(payload):
+    """What makes two static routes the same: interface, destinations, gateway and metric"""
+    gateway = payload.get("gateway") or {}
+    literal = (gateway.get("literal") or {}).get("value")
+    return (payload.get("interfaceName"),
+            tuple(sorted(str(n.get("id")) for n in payload.get("selectedNetworks") or [])),
+            literal or (gateway.get("object") or {}).get("id"),
+            int(payload.get("metricValue") or 1))
+
+
+class ObjectLoader:
+    """Creates the missing objects in bulk and the missing routes per device"""
+
+    def __init__(self, client, headers, domain_uuid=CDFMC_DOMAIN_UUID, chunk_size=BULK_LIMIT,
+                 workers=DEFAULT_WORKERS, dry_run=False):
+        self.client = client
+        self.headers = headers
+        self.index = ObjectIndex(client, headers, domain_uuid)
+        self.config_url = self.index.config_url
+        self.chunk_size = max(1, min(chunk_size, BULK_LIMIT))
+        self.workers = workers
+        self.dry_run = dry_run
+        self.known = {}  # name -> {"id", "type", "name"} for every network and host seen
+
+    def load_existing(self, wanted_names):
+        """Fill `known` from the index; a wanted name missing from a cached listing re-lists it once
+
+        Names are unique across networks and hosts, so both are checked
+        together. Like ObjectIndex.lookup, only listings that came from the
+        on-disk cache are refreshed; one fetched just now is already current.
+        """
+        collections = [collection for collection, _, _ in OBJECT_KINDS.values()]
+        cached = [collection for collection in collections if self.index.is_cached(collection)]
+        listings = {collection: self.index.items(collection) for collection in collections}
+        if cached and any(all(name not in items for items in listings.values()) for name in wanted_names):
+            listings.update({collection: self.index.items(collection, refresh=True) for collection in cached})
+        for items in listings.values():
+            for name, (object_id, object_type) in items.items():
+                self.known.setdefault(name, {"id": object_id, "type": object_type, "name": name})
+
+    def create_objects(self, section, objects):
+        """Bulk POST the objects whose names are unknown; returns (created names, errors)"""
+        collection = OBJECT_KINDS[section][0]
+        missing = [o for o in objects if o["name"] not in self.known]
+        created, errors = [], []
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            if self.dry_run:  # Known without an ID, so routes to it can still be checked
+                self.known.update({o["name"]: {"id": None, "type": o["type"], "name": o["name"]} for o in chunk})
+                created += [o["name"] for o in chunk]
+                continue
+            where = f"{section} {start + 1}-{start + len(chunk)}"
+            try:
+                response = self.client.post(self.config_url + collection, headers=self.headers,
+                                            params={"bulk": "true"}, json=chunk)
+                if response.status_code not in (200, 201, 202):
+                    errors.append(f"{where}: {response.status_code} {response.text[:300]}")
+                    continue
+                body = response.json()
+            except (requests.RequestException, ValueError) as e:
+                errors.append(f"{where}: {e}")
+                continue
+            for item in body.get("items", []) if isinstance(body, dict) else body:
+                self.known[item["name"]] = {"id": item["id"], "type": item.get("type"), "name": item["name"]}
+                created.append(item["name"])
+            errors += [f"{section} {o['name']}: not in the bulk response" for o in chunk if o["name"] not in self.known]
+        return created, errors
+
+    def resolve(self, name):
+        found = self.known.get(name)
+        if found is None:
+            raise KeyError(name)
+        return dict(found)
+
+    def _device_routes(self, device_id, routes):
+        """List one device's static routes once and POST the missing ones in order"""
+        url = self.config_url + ROUTES_PATH.format(device_id=device_id)
+        result = {"device_id": device_id, "created": 0, "existing": 0, "errors": []}
+        try:
+            live = {route_key(item) for item in self.client.paginate(url, headers=self.headers, expanded=True)}
+        except (requests.RequestException, ValueError) as e:
+            result["errors"].append(f"listing static routes failed: {e}")
+            return result
+        for route in routes:
+            label = f"{route['interface']} -> {', '.join(route['networks'])} via {route['gateway']}"
+            try:
+                payload = route_payload(route, self.resolve)
+            except KeyError as e:
+                result["errors"].append(f"{label}: unknown network or host {e.args[0]!r}")
+                continue
+            if route_key(payload) in live:
+                result["existing"] += 1
+                continue
+            if not self.dry_run:
+                try:
+                    response = self.client.post(url, headers=self.headers, json=payload)
+                except requests.RequestException as e:
+                    result["errors"].append(f"{label}: {e}")
+                    continue
+                if response.status_code not in (200, 201):
+                    result["errors"].append(f"{label}: {response.status_code} {response.text[:200]}")
+                    continue
+            live.add(route_key(payload))
+            result["created"] += 1
+        return result
+
+    def create_routes(self, routes):
+        """Missing routes per device: serialized on a device, devices concurrently"""
+        by_device = {}
+        for route in routes:
+            by_device.setdefault(route["device_id"], []).append(route)
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            return list(pool.map(lambda item: self._device_routes(*item), by_device.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create missing network/host objects (in bulk) and static routes on cdFMC.")
+    parser.add_argument('--spec', required=True, help="JSON or CSV spec (file or inline JSON) of networks, hosts and routes")
+    parser.add_argument('--host', help="cdFMC host")
+    parser.add_argument('--token', help="API token for cdFMC")
+    parser.add_argument('--domain-uuid', default=CDFMC_DOMAIN_UUID, help="Domain UUID (defaults to cdFMC global)")
+    parser.add_argument('--chunk-size', type=int, default=BULK_LIMIT, help=f"Objects per bulk request (default and maximum {BULK_LIMIT})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f"Devices whose routes are created concurrently (default {DEFAULT_WORKERS})")
+    parser.add_argument('--output', help="Write the name -> ID map (--network-ids shape) to this file instead of stdout")
+    parser.add_argument('--check', action='store_true', help="Validate the spec offline, without any API call")
+    parser.add_argument('--dry-run', action='store_true', help="Look up what exists and report what would be created")
+    parser.add_argument('--trace', help="Append a JSON-lines trace of every request, wait and phase to this file (or set FMC_TRACE)")
+    parser.add_argument('--profile', help="Write a cProfile dump to this file (or set FMC_PROFILE)")
+    args = parser.parse_args(argv)
+    start_tracing(args.trace, args.profile)
+
+    try:
+        with phase("1. spec"):
+            spec = validate_spec(load_spec(args.spec))
+    except (OSError, SpecError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+    counts = {section: len(items) for section, items in spec.items()}
+    if args.check:
+        print(f"Spec OK: {counts['networks']} network(s), {counts['hosts']} host(s), {counts['routes']} route(s)")
+        return True
+    if not args.host or not args.token:
+        parser.error("--host and --token are required unless --check")
+
+    start = time.perf_counter()
+    loader = ObjectLoader(get_client(args.host), {'Authorization': 'Bearer ' + args.token}, args.domain_uuid,
+                          args.chunk_size, args.workers, args.dry_run)
+    verb = "would create" if args.dry_run else "created"
+    errors = []
+    try:
+        with phase("2. index"):
+            loader.load_existing([o["name"] for section in OBJECT_KINDS for o in spec[section]])
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error: Listing existing objects failed: {e}", file=sys.stderr)
+        return False
+
+    with phase("3. objects"):
+        for section in OBJECT_KINDS:
+            created, section_errors = loader.create_objects(section, spec[section])
+            errors += section_errors
+            print(f"   {section}: {len(created)} {verb}, {counts[section] - len(created) - len(section_errors)} "
+                  f"already present", file=sys.stderr)
+
+    if spec["routes"]:
+        with phase("4. routes"):
+            for result in loader.create_routes(spec["routes"]):
+                errors += [f"route on {result['device_id']}: {error}" for error in result["errors"]]
+                print(f"   routes on {result['device_id']}: {result['created']} {verb}, "
+                      f"{result['existing']} already present", file=sys.stderr)
+
+    for error in errors:
+        print(f"   ❌ {error}", file=sys.stderr)
+    network_ids = {terraform_key(o["name"]): (loader.known.get(o["name"]) or {}).get("id")
+                   for section in OBJECT_KINDS for o in spec[section]}
+    network_ids = {key: object_id for key, object_id in network_ids.items() if object_id}
+    output = json.dumps(network_ids, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    print(f"{'OK' if not errors else 'FAILED'}: {len(network_ids)} object ID(s) in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+    if stats_enabled():
+        print_all_stats()
+    return not errors
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
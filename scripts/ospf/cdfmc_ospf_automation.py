@@ -8,18 +8,47 @@ All configuration is read from config.py - no user prompts.
 """
 
 import argparse
+import io
 import json
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
 import requests
-# Disable SSL warnings for self-signed certificates
-import urllib3
+
 from config import (API_KEY, DEVICE_ID, DEVICE_NAME, DOMAIN_UUID, FMC_URL,
                     NETWORK_IDS, OSPF_AREA_ID, OSPF_NETWORKS, OSPF_PROCESS_ID,
-                    OSPF_ROUTER_ID, update_config_from_terraform)
+                    OSPF_ROUTER_ID, reset_config, update_config_from_terraform)
+
+# Shared pooled HTTP client lives in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import get_client, print_all_stats, stats_enabled
+from fmc_deploy import DEPLOYMENT_REQUESTS_PATH, deployment_request, plan_deployment
+from fmc_index import CONFIG_API_TPL
+from fmc_tasks import TASK_STATUS_API_TPL, PollTimeout, poll_until, task_outcome
+from fmc_trace import phase, start_tracing
+from ospf_spec import SpecError, build_plan, format_plan, load_spec, ospf_route_payload
+
+DEPLOY_DEADLINE = 1200  # Seconds to wait for a deployment task before giving up
+
+_job_output = threading.local()  # .buffer: the running device job's output (see run_device_jobs)
+
+def log(*args, **kwargs):
+    """print() into the current device job's buffer, so device logs don't interleave; stdout outside a job"""
+    buffer = getattr(_job_output, 'buffer', None)
+    if buffer is not None:
+        kwargs['file'] = buffer
+    print(*args, **kwargs)
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+def build_ospf_payload(found_networks):
+    """Build the OspfRoute payload matching the screenshot (Process 1, Area 0, normal)"""
+    return ospf_route_payload(OSPF_PROCESS_ID, [{
+        "areaId": OSPF_AREA_ID,
+        "type": "normal",
+        "networks": found_networks
+    }])
 
 class CdFMCRestAPI:
     def __init__(self, fmc_url, api_key):
@@ -27,6 +56,8 @@ class CdFMCRestAPI:
         self.fmc_url = fmc_url.rstrip('/')
         self.api_key = api_key
         self.domain_uuid = DOMAIN_UUID  # Use static domain UUID
+        self.client = get_client(self.fmc_url)  # Pooled keep-alive session
+        self.config_url = CONFIG_API_TPL.format(base_url=self.fmc_url, domain_uuid=self.domain_uuid)
         self.headers = {
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json',
@@ -38,10 +69,10 @@ class CdFMCRestAPI:
         try:
             # First, get the current routing configuration
             url = f"{self.fmc_url}/api/fmc_config/v1/domain/{self.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2process"
-            response = requests.get(url, headers=self.headers, verify=False, timeout=30)
+            response = self.client.get(url, headers=self.headers)
             
             if response.status_code == 200:
-                print(f"   ℹ️  OSPF process already enabled")
+                log(f"   ℹ️  OSPF process already enabled")
                 return True
             
             # Enable OSPF Process 1
@@ -51,287 +82,553 @@ class CdFMCRestAPI:
                 "enabled": True
             }
             
-            response = requests.post(
+            response = self.client.post(
                 url,
                 headers=self.headers,
-                data=json.dumps(process_payload),
-                verify=False,
-                timeout=30
+                data=json.dumps(process_payload)
             )
             
             if response.status_code in [200, 201]:
-                print(f"   ✅ Enabled OSPF Process 1")
+                log(f"   ✅ Enabled OSPF Process 1")
                 return True
             else:
-                print(f"   ❌ Failed to enable OSPF process: {response.status_code}")
-                print(f"   Response: {response.text}")
+                log(f"   ❌ Failed to enable OSPF process: {response.status_code}")
+                log(f"   Response: {response.text}")
                 return False
                 
         except Exception as e:
-            print(f"   ❌ Error enabling OSPF process: {str(e)}")
+            log(f"   ❌ Error enabling OSPF process: {str(e)}")
             return False
     
-    def get_existing_ospf_routes(self, device_id):
-        """Get existing OSPF routes for a device"""
+    def get_existing_ospf_routes(self, device_id, expanded=False, strict=False):
+        """Get existing OSPF routes for a device (expanded=True returns full objects)
+
+        Any failure reads as "no routes" unless strict is set: then only a
+        404 does, and other errors are raised, so callers that create what
+        is missing don't mistake a failed GET for an unconfigured device.
+        """
         try:
             url = f"{self.fmc_url}/api/fmc_config/v1/domain/{self.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2routes"
-            response = requests.get(url, headers=self.headers, verify=False, timeout=30)
-            
-            if response.status_code == 200:
-                ospf_data = response.json()
-                return ospf_data.get('items', [])
-            else:
-                return []
+            # Every page, not just the first (pages after the first are prefetched concurrently)
+            return list(self.client.paginate(url, headers=self.headers, expanded=expanded))
                 
+        except requests.HTTPError as e:
+            if strict and (e.response is None or e.response.status_code != 404):
+                raise
+            return []
         except Exception as e:
-            print(f"   ❌ Error getting OSPF routes: {str(e)}")
+            if strict:
+                raise
+            log(f"   ❌ Error getting OSPF routes: {str(e)}")
             return []
     
-    def create_ospf_route(self, device_id, found_networks):
-        """Create OSPF route configuration"""
+    def create_ospf_route(self, device_id, found_networks=None, payload=None):
+        """Create OSPF route configuration (from found_networks, or a prebuilt payload)"""
         try:
-            ospf_payload = {
-                "type": "OspfRoute",
-                "processId": OSPF_PROCESS_ID,
-                "enableProcess": "PROCESS_1",  # Enable Process 1
-                "processConfiguration": {
-                    "rfc1583Compatible": False,
-                    "ignoreLsaMospf": False,
-                    "administrativeDistance": {
-                        "interArea": 110,
-                        "intraArea": 110, 
-                        "external": 110
-                    },
-                    "timers": {
-                        "lsaGroup": 10  # Default LSA group pacing timer
-                    }
-                },
-                "redistributeProtocols": [],  # Explicitly set empty to avoid ASBR role
-                "filterRules": [],  # Explicitly set empty filter rules
-                "summaryAddresses": [],  # Explicitly set empty summary addresses
-                "areas": [{
-                    "areaId": OSPF_AREA_ID,
-                    "areaType": {"type": "normal"},
-                    "areaNetworks": [
-                        {
-                            "type": network["type"],
-                            "id": network["id"],
-                            "name": network["name"]
-                        }
-                        for network in found_networks
-                    ]
-                }]
-            }
+            ospf_payload = payload or build_ospf_payload(found_networks)
             
             url = f"{self.fmc_url}/api/fmc_config/v1/domain/{self.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2routes"
-            response = requests.post(
+            response = self.client.post(
                 url,
                 headers=self.headers,
-                data=json.dumps(ospf_payload),
-                verify=False,
-                timeout=30
+                data=json.dumps(ospf_payload)
             )
             
             if response.status_code in [200, 201]:
                 result = response.json()
-                print(f"   ✅ Created OSPF Process 1 successfully!")
+                log(f"   ✅ Created OSPF Process {ospf_payload['processId']} successfully!")
                 return result
             else:
-                print(f"   ❌ Failed to create OSPF route: {response.status_code}")
-                print(f"   Response: {response.text}")
+                log(f"   ❌ Failed to create OSPF route: {response.status_code}")
+                log(f"   Response: {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"   ❌ Error creating OSPF route: {str(e)}")
+            log(f"   ❌ Error creating OSPF route: {str(e)}")
             return None
     
-    def update_ospf_route(self, device_id, ospf_id, found_networks):
-        """Update existing OSPF route configuration"""
+    def update_ospf_route(self, device_id, ospf_id, found_networks=None, payload=None):
+        """Update existing OSPF route configuration (from found_networks, or a prebuilt payload)"""
         try:
-            ospf_payload = {
-                "type": "OspfRoute",
-                "id": ospf_id,
-                "processId": OSPF_PROCESS_ID,
-                "enableProcess": "PROCESS_1",  # Enable Process 1
-                "processConfiguration": {
-                    "rfc1583Compatible": False,
-                    "ignoreLsaMospf": False,
-                    "administrativeDistance": {
-                        "interArea": 110,
-                        "intraArea": 110, 
-                        "external": 110
-                    },
-                    "timers": {
-                        "lsaGroup": 10  # Default LSA group pacing timer
-                    }
-                },
-                "redistributeProtocols": [],  # Explicitly set empty to avoid ASBR role
-                "filterRules": [],  # Explicitly set empty filter rules
-                "summaryAddresses": [],  # Explicitly set empty summary addresses
-                "areas": [{
-                    "areaId": OSPF_AREA_ID,
-                    "areaType": {"type": "normal"},
-                    "areaNetworks": [
-                        {
-                            "type": network["type"],
-                            "id": network["id"],
-                            "name": network["name"]
-                        }
-                        for network in found_networks
-                    ]
-                }]
-            }
+            ospf_payload = dict(payload or build_ospf_payload(found_networks))
+            ospf_payload["id"] = ospf_id
             
             url = f"{self.fmc_url}/api/fmc_config/v1/domain/{self.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2routes/{ospf_id}"
-            response = requests.put(
+            response = self.client.put(
                 url,
                 headers=self.headers,
-                data=json.dumps(ospf_payload),
-                verify=False,
-                timeout=30
+                data=json.dumps(ospf_payload)
             )
             
             if response.status_code == 200:
                 result = response.json()
-                print(f"   ✅ Updated OSPF Process 1 successfully!")
+                log(f"   ✅ Updated OSPF Process {ospf_payload['processId']} successfully!")
                 return result
             else:
-                print(f"   ❌ Failed to update OSPF route: {response.status_code}")
-                print(f"   Response: {response.text}")
+                log(f"   ❌ Failed to update OSPF route: {response.status_code}")
+                log(f"   Response: {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"   ❌ Error updating OSPF route: {str(e)}")
+            log(f"   ❌ Error updating OSPF route: {str(e)}")
             return None
     
     def create_fresh_ospf_configuration(self, device_id, found_networks):
         """Create completely fresh OSPF configuration matching screenshot exactly"""
         try:
-            print("   📸 Creating OSPF configuration to match screenshot exactly...")
+            log("   📸 Creating OSPF configuration to match screenshot exactly...")
             
             # Create the exact configuration shown in screenshot
-            ospf_payload = {
-                "type": "OspfRoute",
-                "processId": "1",  # ID: 1 (as shown in screenshot)
-                "enableProcess": "PROCESS_1",  # Process 1 checkbox enabled
-                "processConfiguration": {
-                    "rfc1583Compatible": False,
-                    "ignoreLsaMospf": False,
-                    "administrativeDistance": {
-                        "interArea": 110,
-                        "intraArea": 110, 
-                        "external": 110
-                    },
-                    "timers": {
-                        "lsaGroup": 10
-                    }
-                },
-                "redistributeProtocols": [],  # Empty for Internal Router role
-                "filterRules": [],  # Empty filter rules
-                "summaryAddresses": [],  # Empty summary addresses  
-                "logAdjacencyChanges": {
-                    "logType": "DEFAULT"  # Standard OSPF logging
-                },
-                "areas": [{
-                    "areaId": "0",  # Area ID: 0 (as shown in screenshot)
-                    "areaType": {
-                        "type": "normal"  # Area Type: normal (as shown in screenshot)
-                    },
-                    "areaNetworks": [
-                        {
-                            "type": network["type"],
-                            "id": network["id"],
-                            "name": network["name"]
-                        }
-                        for network in found_networks
-                    ]
-                }]
-            }
+            ospf_payload = build_ospf_payload(found_networks)
             
-            print(f"   📋 Configuration details:")
-            print(f"   - Process ID: {ospf_payload['processId']}")
-            print(f"   - Enable Process: {ospf_payload['enableProcess']}")
-            print(f"   - Area ID: {ospf_payload['areas'][0]['areaId']}")
-            print(f"   - Area Type: {ospf_payload['areas'][0]['areaType']['type']}")
-            print(f"   - Networks: {len(ospf_payload['areas'][0]['areaNetworks'])} networks")
-            print(f"   - Redistribute Protocols: {len(ospf_payload['redistributeProtocols'])} (empty for Internal Router)")
+            log(f"   📋 Configuration details:")
+            log(f"   - Process ID: {ospf_payload['processId']}")
+            log(f"   - Enable Process: {ospf_payload['enableProcess']}")
+            log(f"   - Area ID: {ospf_payload['areas'][0]['areaId']}")
+            log(f"   - Area Type: {ospf_payload['areas'][0]['areaType']['type']}")
+            log(f"   - Networks: {len(ospf_payload['areas'][0]['areaNetworks'])} networks")
+            log(f"   - Redistribute Protocols: {len(ospf_payload['redistributeProtocols'])} (empty for Internal Router)")
             
             url = f"{self.fmc_url}/api/fmc_config/v1/domain/{self.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2routes"
-            response = requests.post(
+            response = self.client.post(
                 url,
                 headers=self.headers,
-                data=json.dumps(ospf_payload),
-                verify=False,
-                timeout=30
+                data=json.dumps(ospf_payload)
             )
             
             if response.status_code in [200, 201]:
                 result = response.json()
-                print(f"   ✅ Created OSPF Process 1 configuration successfully!")
-                print(f"   📸 Configuration matches screenshot requirements")
+                log(f"   ✅ Created OSPF Process 1 configuration successfully!")
+                log(f"   📸 Configuration matches screenshot requirements")
                 return result
             else:
-                print(f"   ❌ Failed to create OSPF configuration: {response.status_code}")
-                print(f"   Response: {response.text}")
+                log(f"   ❌ Failed to create OSPF configuration: {response.status_code}")
+                log(f"   Response: {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"   ❌ Error creating fresh OSPF configuration: {str(e)}")
+            log(f"   ❌ Error creating fresh OSPF configuration: {str(e)}")
             return None
 
-    def deploy_configuration(self, device_id):
-        """Deploy configuration to device"""
+    def plan_deployment(self, device_ids):
+        """Split devices into pending / up to date / blocked using deployabledevices"""
         try:
-            # Try force deploy to overcome timestamp issues
-            deploy_payload = {
-                "type": "DeploymentRequest",
-                "deviceList": [device_id],
-                "forceDeploy": True,  # Force deploy to overcome timestamp issues
-                "ignoreWarning": True
-            }
-            
-            url = f"{self.fmc_url}/api/fmc_config/v1/domain/{self.domain_uuid}/deployment/deploymentrequests"
-            response = requests.post(
+            return plan_deployment(self.client, self.config_url, self.headers, device_ids)
+        except (requests.RequestException, ValueError) as e:
+            # Without the listing every device is treated as pending (still incremental)
+            log(f"   ⚠️  Could not list deployable devices ({e}); deploying all {len(device_ids)}")
+            return {"pending": list(device_ids), "up_to_date": [], "blocked": [], "version": 0}
+
+    def deploy_configuration(self, device_id, version=None, force=False):
+        """Deploy to a device (or list of devices) with one DeploymentRequest
+
+        Incremental unless force is set; version is the newest pending
+        change (from plan_deployment) the deploy should include.
+        """
+        try:
+            deploy_payload = deployment_request(device_id if isinstance(device_id, list) else [device_id],
+                                                version, force)
+            url = self.config_url + DEPLOYMENT_REQUESTS_PATH
+            response = self.client.post(
                 url,
                 headers=self.headers,
-                data=json.dumps(deploy_payload),
-                verify=False,
-                timeout=30
+                data=json.dumps(deploy_payload)
             )
             
             if response.status_code in [200, 202]:
                 result = response.json()
-                print(f"   ✅ Deployment initiated successfully!")
+                log(f"   ✅ {'Forced' if force else 'Incremental'} deployment initiated successfully!")
                 return result
-            else:
-                print(f"   ❌ Failed to deploy: {response.status_code}")
-                print(f"   Response: {response.text}")
-                
-                # If force deploy fails, try without force
-                print(f"   🔄 Trying deployment without force...")
-                deploy_payload["forceDeploy"] = False
-                response = requests.post(
-                    url,
-                    headers=self.headers,
-                    data=json.dumps(deploy_payload),
-                    verify=False,
-                    timeout=30
-                )
-                
-                if response.status_code in [200, 202]:
-                    result = response.json()
-                    print(f"   ✅ Standard deployment initiated successfully!")
-                    return result
-                else:
-                    print(f"   ❌ Standard deployment also failed: {response.status_code}")
-                    return None
+            log(f"   ❌ Failed to deploy: {response.status_code}")
+            log(f"   Response: {response.text}")
+            return None
                 
         except Exception as e:
-            print(f"   ❌ Error deploying configuration: {str(e)}")
+            log(f"   ❌ Error deploying configuration: {str(e)}")
             return None
 
-def main():
-    """Main automation function"""
+    def get_task_status(self, task_id):
+        """Get the status of an FMC background task"""
+        url = TASK_STATUS_API_TPL.format(base_url=self.fmc_url, domain_uuid=self.domain_uuid, task_id=task_id)
+        response = self.client.get(url, headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def wait_for_deployment(self, deploy_result, device_ids, deadline=DEPLOY_DEADLINE, started=None):
+        """Follow a deployment task with backoff until it finishes or the deadline passes
+
+        Returns {"success", "status", "devices": {device_id: {"success", "status", "message"}}, "seconds"}
+        """
+        started = started if started is not None else time.monotonic()
+        task_id = (deploy_result or {}).get('metadata', {}).get('task', {}).get('id')
+        if not task_id:
+            log(f"   ❌ Deployment response has no task ID to follow")
+            return {"success": False, "status": "NO_TASK", "devices": {}, "seconds": time.monotonic() - started}
+
+        def fetch():
+            try:
+                return self.get_task_status(task_id)
+            except Exception as e:
+                # Transient polling errors should not abort the wait
+                return {"status": None, "message": str(e)}
+
+        def report(task, elapsed):
+            log(f"   ⏳ Deployment task {task_id}: {task.get('status') or 'unknown'} ({elapsed:.0f}s)")
+
+        try:
+            task, _ = poll_until(fetch, lambda t: task_outcome(t.get('status')) is not None,
+                                 deadline=deadline, on_poll=report)
+            outcome = task_outcome(task.get('status'))
+        except PollTimeout as e:
+            task, outcome = e.last_value or {}, "timeout"
+            log(f"   ⌛ Deployment did not finish within {deadline:.0f}s")
+
+        # Per-device results come from subTasks when FMC reports them
+        devices = {}
+        for sub_task in task.get('subTasks') or []:
+            target_id = (sub_task.get('target') or {}).get('id')
+            if target_id:
+                devices[target_id] = {
+                    "success": task_outcome(sub_task.get('status')) == "success",
+                    "status": sub_task.get('status'),
+                    "message": sub_task.get('message', "")
+                }
+        for device_id in device_ids:
+            devices.setdefault(device_id, {
+                "success": outcome == "success",
+                "status": task.get('status') if outcome != "timeout" else "TIMEOUT",
+                "message": task.get('message', "")
+            })
+
+        result = {
+            "success": outcome == "success" and all(d["success"] for d in devices.values()),
+            "status": task.get('status') if outcome != "timeout" else "TIMEOUT",
+            "devices": devices,
+            "seconds": time.monotonic() - started
+        }
+        log(f"   {'✅' if result['success'] else '❌'} Deployment {result['status']} after {result['seconds']:.1f}s")
+        return result
+
+    def deploy_and_wait(self, device_ids, deadline=DEPLOY_DEADLINE, force=False):
+        """Deploy the devices with pending changes in one request and block until the task lands
+
+        Devices without pending changes are reported as UP_TO_DATE and not
+        deployed, unless force is set (a full push to every device).
+        """
+        started = time.monotonic()
+        plan = self.plan_deployment(list(device_ids))
+        targets = [d for d in device_ids if d not in plan["blocked"]] if force else plan["pending"]
+        skipped = {device_id: {"success": False, "status": "BLOCKED", "message": "cannot be deployed now (deployment running?)"}
+                   for device_id in plan["blocked"]}
+        if not force:
+            skipped.update({device_id: {"success": True, "status": "UP_TO_DATE", "message": "no pending changes"}
+                            for device_id in plan["up_to_date"]})
+        log(f"   📋 {len(targets)} device(s) to deploy{' (forced)' if force else ''}, {len(plan['up_to_date'])} up to date, "
+              f"{len(plan['blocked'])} blocked")
+        if not targets:
+            return {"success": not plan["blocked"], "status": "BLOCKED" if plan["blocked"] else "UP_TO_DATE",
+                    "devices": skipped, "seconds": time.monotonic() - started}
+
+        deploy_result = self.deploy_configuration(targets, plan["version"], force)
+        if not deploy_result:
+            return {"success": False, "status": "NOT_STARTED", "devices": skipped, "seconds": time.monotonic() - started}
+        result = self.wait_for_deployment(deploy_result, targets, deadline, started)
+        result["devices"].update(skipped)
+        result["success"] = result["success"] and not plan["blocked"]
+        return result
+
+# Map our expected networks to the provided IDs
+NETWORK_MAPPING = {
+    "Attacker": "attacker_id",
+    "Data-Center": "data_center_id", 
+    "Apps": "apps_id",
+    "DMZ": "dmz_id",
+    "Outside": "outside_id",
+    "Transport": "transport_id"
+}
+
+DEFAULT_WORKERS = 4
+
+def resolve_networks(network_ids):
+    """Map the OSPF_NETWORKS names to the provided network object IDs"""
+    found_networks = []
+    for network_name in OSPF_NETWORKS:
+        key = NETWORK_MAPPING.get(network_name)
+        if key and key in network_ids:
+            found_networks.append({
+                "type": "Network",
+                "id": network_ids[key],
+                "name": network_name
+            })
+            log(f"   ✅ {network_name}: {network_ids[key]}")
+        else:
+            log(f"   ❌ {network_name}: ID not found in provided network IDs")
+    return found_networks
+
+def configure_device_ospf(api, device_id, found_networks):
+    """Run the cleanup -> create -> verify sequence for a single device"""
+    # Clean up existing OSPF configuration completely
+    with phase("3. cleanup"):
+        log(f"\n3. Cleaning up existing OSPF configuration...")
+        existing_ospf = api.get_existing_ospf_routes(device_id)
+    
+        if existing_ospf:
+            for ospf_config in existing_ospf:
+                ospf_id = ospf_config['id']
+                log(f"   🗑️  Deleting existing OSPF config (ID: {ospf_id})")
+            
+                delete_url = f"{api.fmc_url}/api/fmc_config/v1/domain/{api.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2routes/{ospf_id}"
+                delete_response = api.client.delete(delete_url, headers=api.headers)
+            
+                if delete_response.status_code in [200, 204]:
+                    log(f"   ✅ Deleted OSPF configuration")
+                else:
+                    log(f"   ⚠️  Could not delete config: {delete_response.status_code}")
+        else:
+            log(f"   ℹ️  No existing OSPF configuration found")
+    
+    # Create completely fresh OSPF configuration to match screenshot
+    with phase("4. create"):
+        log(f"\n4. Creating fresh OSPF configuration to match screenshot...")
+        result = api.create_fresh_ospf_configuration(device_id, found_networks)
+    
+    if not result:
+        return False
+    
+    # Verify the configuration was saved
+    with phase("4b. verify"):
+        log(f"\n4b. Verifying configuration was saved...")
+        verify_ospf = api.get_existing_ospf_routes(device_id)
+    if verify_ospf:
+        log(f"   ✅ Verified: OSPF configuration exists in cdFMC")
+        for config in verify_ospf:
+            log(f"   - Config ID: {config.get('id', 'N/A')}")
+            log(f"   - Process ID: {config.get('processId', 'N/A')}")
+            areas = config.get('areas', [])
+            if areas:
+                area = areas[0]
+                networks = area.get('areaNetworks', [])
+                log(f"   - Area {area.get('areaId', 'N/A')}: {len(networks)} networks")
+    else:
+        log(f"   ❌ Configuration not found in cdFMC!")
+        return False
+    
+    return True
+
+def _same_value(want, have):
+    """Compare scalars loosely since FMC may echo "1" as 1 or False as false"""
+    return want == have or str(want).lower() == str(have).lower()
+
+def diff_ospf_areas(desired_areas, live_areas):
+    """Diff areas by areaId; area networks are compared as a set of object IDs"""
+    drift = []
+    live_by_id = {str(area.get('areaId')): area for area in live_areas or []}
+    for area in desired_areas:
+        area_id = str(area['areaId'])
+        live = live_by_id.pop(area_id, None)
+        if live is None:
+            drift.append(f"areas[{area_id}] (missing)")
+            continue
+        if not _same_value(area['areaType'].get('type'), (live.get('areaType') or {}).get('type')):
+            drift.append(f"areas[{area_id}].areaType")
+        want = {network['id'] for network in area.get('areaNetworks', [])}
+        have = {network.get('id') for network in live.get('areaNetworks') or []}
+        if want != have:
+            drift.append(f"areas[{area_id}].areaNetworks (+{len(want - have)} -{len(have - want)})")
+    drift.extend(f"areas[{area_id}] (unexpected)" for area_id in live_by_id)
+    return drift
+
+def diff_ospf_config(desired, live, path=""):
+    """Return the field paths where a live OspfRoute differs from the desired payload"""
+    drift = []
+    for key, want in desired.items():
+        if not path and key == "id":
+            continue
+        field = f"{path}.{key}" if path else key
+        have = live.get(key)
+        if not path and key == "areas":
+            drift.extend(diff_ospf_areas(want, have))
+        elif isinstance(want, dict):
+            drift.extend(diff_ospf_config(want, have if isinstance(have, dict) else {}, field))
+        elif isinstance(want, list):
+            if want != (have or []):
+                drift.append(field)
+        elif not _same_value(want, have):
+            drift.append(field)
+    return drift
+
+def reconcile_device_ospf(api, device_id, found_networks):
+    """Bring the device to the desired OSPF config with the fewest calls
+
+    One GET when nothing changed, GET + PUT when fields drifted, GET + POST
+    when no OSPF process exists yet. Returns {"ok", "detail"}.
+    """
+    with phase("3. reconcile"):
+        log(f"\n3. Reconciling OSPF configuration...")
+        desired = build_ospf_payload(found_networks)
+        try:
+            existing_ospf = api.get_existing_ospf_routes(device_id, expanded=True, strict=True)
+        except Exception as e:
+            log(f"   ❌ Could not read the current OSPF configuration: {e}")
+            return {"ok": False, "detail": f"listing OSPF routes failed: {e}"}
+        live = next((c for c in existing_ospf if _same_value(desired['processId'], c.get('processId'))), None)
+    
+    if live is None:
+        log(f"   ℹ️  No existing OSPF configuration found")
+        with phase("4. create"):
+            log(f"\n4. Creating OSPF configuration...")
+            result = api.create_fresh_ospf_configuration(device_id, found_networks)
+        return {"ok": bool(result), "detail": "created" if result else "create failed"}
+    
+    drift = diff_ospf_config(desired, live)
+    if not drift:
+        log(f"   ✅ OSPF configuration (ID: {live['id']}) already matches - nothing to change")
+        return {"ok": True, "detail": "unchanged"}
+    
+    log(f"   🔀 {len(drift)} drifted field(s):")
+    for field in drift:
+        log(f"   - {field}")
+    with phase("4. update"):
+        log(f"\n4. Updating OSPF configuration in place...")
+        result = api.update_ospf_route(device_id, live['id'], found_networks)
+    if not result:
+        return {"ok": False, "detail": "update failed"}
+    return {"ok": True, "detail": "updated: " + ", ".join(drift)}
+
+def apply_spec_device(api, device, prune=False):
+    """Apply one device's planned payloads: one expanded GET, then POST/PUT only what differs
+
+    Processes on the device that the spec doesn't mention are left alone
+    unless prune is set. Returns {"ok", "detail"}.
+    """
+    device_id = device["device_id"]
+    with phase("3. reconcile"):
+        log(f"\n3. Reconciling {len(device['payloads'])} OSPF process(es) on {device['name']}...")
+        try:
+            live_routes = api.get_existing_ospf_routes(device_id, expanded=True, strict=True)
+        except Exception as e:
+            log(f"   ❌ Could not read the current OSPF configuration: {e}")
+            return {"ok": False, "detail": f"listing OSPF routes failed: {e}"}
+        live_by_process = {str(c.get('processId')): c for c in live_routes}
+
+    changes, failures = [], []
+    with phase("4. apply"):
+        for payload in device["payloads"]:
+            process_id = payload["processId"]
+            live = live_by_process.pop(process_id, None)
+            if live is None:
+                log(f"\n4. Creating OSPF process {process_id}...")
+                ok = api.create_ospf_route(device_id, payload=payload)
+                (changes if ok else failures).append(f"process {process_id} created" if ok else f"process {process_id} create failed")
+                continue
+            drift = diff_ospf_config(payload, live)
+            if not drift:
+                log(f"   ✅ Process {process_id} (ID: {live['id']}) already matches")
+                continue
+            log(f"\n4. Updating process {process_id}: {', '.join(drift)}")
+            ok = api.update_ospf_route(device_id, live['id'], payload=payload)
+            (changes if ok else failures).append(f"process {process_id} updated" if ok else f"process {process_id} update failed")
+
+        for process_id, live in live_by_process.items():
+            if not prune:
+                log(f"   ℹ️  Process {process_id} (ID: {live['id']}) is not in the spec - left as is (--prune deletes it)")
+                continue
+            url = f"{api.fmc_url}/api/fmc_config/v1/domain/{api.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2routes/{live['id']}"
+            response = api.client.delete(url, headers=api.headers)
+            if response.status_code in [200, 204]:
+                log(f"   🗑️  Deleted process {process_id} (ID: {live['id']})")
+                changes.append(f"process {process_id} deleted")
+            else:
+                log(f"   ⚠️  Could not delete process {process_id}: {response.status_code}")
+                failures.append(f"process {process_id} delete failed")
+
+    return {"ok": not failures, "detail": ", ".join(failures + changes) or "unchanged"}
+
+def load_json_arg(value):
+    """Parse a JSON argument given inline or as a path to a JSON file"""
+    if Path(value).is_file():
+        with open(value) as f:
+            return json.load(f)
+    return json.loads(value)
+
+def parse_device_ids(value):
+    """Accept a JSON list or a comma-separated string of device IDs"""
+    value = value.strip()
+    if value.startswith('['):
+        return [str(device_id) for device_id in json.loads(value)]
+    return [device_id.strip() for device_id in value.split(',') if device_id.strip()]
+
+def run_device_jobs(jobs, workers, work):
+    """Run work(key, value) -> result dict for every job on a bounded pool
+
+    Each job's log() output goes to its own buffer, printed in one piece
+    when the device finishes; results come back in job order with "seconds"
+    filled in.
+    """
+
+    def worker(device_id, value):
+        _job_output.buffer = io.StringIO()
+        start = time.perf_counter()
+        result = {"device_id": device_id, "ok": False, "networks": 0, "detail": ""}
+        try:
+            log(f"\n📟 Device {device_id}")
+            result.update(work(device_id, value))
+        except Exception as e:
+            result["ok"], result["detail"] = False, str(e)
+        finally:
+            result["log"] = _job_output.buffer.getvalue()
+            _job_output.buffer = None
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(worker, device_id, value) for device_id, value in jobs.items()]
+        for future in as_completed(futures):
+            result = future.result()
+            print(result.pop("log"), end="")
+            results.append(result)
+
+    order = {device_id: i for i, device_id in enumerate(jobs)}
+    return sorted(results, key=lambda r: order[r["device_id"]])
+
+def configure_devices_concurrently(api, device_network_ids, workers, reconcile=False):
+    """Configure OSPF on many devices on a bounded worker pool"""
+
+    def work(device_id, network_ids):
+        with phase("2. networks"):
+            log(f"\n2. Using provided network IDs...")
+            found_networks = resolve_networks(network_ids)
+        result = {"networks": len(found_networks)}
+        if not found_networks:
+            result["detail"] = "no valid network IDs"
+        elif reconcile:
+            result.update(reconcile_device_ospf(api, device_id, found_networks))
+        elif configure_device_ospf(api, device_id, found_networks):
+            result["ok"] = True
+        else:
+            result["detail"] = "cleanup/create/verify failed"
+        return result
+
+    return run_device_jobs(device_network_ids, workers, work)
+
+def print_deployment_results(deploy_result):
+    """Print the per-device outcome of a deployment"""
+    for device_id, device in deploy_result["devices"].items():
+        mark = '✅' if device["success"] else '❌'
+        message = f" - {device['message']}" if device.get("message") else ""
+        print(f"   {mark} {device_id}: {device['status']}{message}")
+    print(f"   ⏱️  Deployment duration: {deploy_result['seconds']:.1f}s")
+
+def print_device_results(results):
+    """Print a per-device result table"""
+    print(f"\n{'DEVICE ID':<38} {'STATUS':<7} {'NETWORKS':>8} {'TIME(s)':>8}  DETAIL")
+    for r in results:
+        status = "OK" if r["ok"] else "FAILED"
+        print(f"{r['device_id']:<38} {status:<7} {r['networks']:>8} {r['seconds']:>8.1f}  {r['detail']}")
+
+def main(argv=None):
+    """Main automation function (argv defaults to sys.argv, so fmcctl can call it in-process)"""
     
     # Parse command line arguments for Terraform integration
     parser = argparse.ArgumentParser(description='cdFMC OSPF Configuration Automation')
@@ -339,12 +636,27 @@ def main():
     parser.add_argument('--api-key', help='API Key (overrides config.py)')
     parser.add_argument('--device-id', help='Device ID (from Terraform)')
     parser.add_argument('--network-ids', help='Network IDs JSON string (from Terraform)')
-    args = parser.parse_args()
+    parser.add_argument('--device-ids', help='Multi-device mode: JSON list or comma-separated device IDs sharing --network-ids')
+    parser.add_argument('--device-spec', help='Multi-device mode: JSON (or path to JSON file) mapping device ID to its network IDs')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f'Devices configured concurrently (default {DEFAULT_WORKERS})')
+    parser.add_argument('--spec', help='Declarative mode: YAML/JSON spec (file or inline) of devices, processes and areas; see ospf_spec.py')
+    parser.add_argument('--check', action='store_true', help='With --spec: validate the spec and build every payload offline, then exit without any API call')
+    parser.add_argument('--batch-size', type=int, default=0, help='With --spec: apply to this many devices at a time and stop after a batch with failures (default all at once)')
+    parser.add_argument('--prune', action='store_true', help='With --spec: delete OSPF processes on a device that the spec does not list')
+    parser.add_argument('--reconcile', action='store_true', help='Diff against the live config and only PUT drifted fields (no delete/recreate)')
+    parser.add_argument('--deploy', action='store_true', help='Deploy after configuring and wait for the deployment task to finish')
+    parser.add_argument('--force-deploy', action='store_true', help='With --deploy: push the full configuration to every device, even without pending changes (much slower)')
+    parser.add_argument('--deploy-timeout', type=float, default=DEPLOY_DEADLINE, help=f'Seconds to wait for the deployment (default {DEPLOY_DEADLINE})')
+    parser.add_argument('--trace', help='Append a JSON-lines trace of every request, wait and phase to this file (or set FMC_TRACE)')
+    parser.add_argument('--profile', help='Write a cProfile dump to this file (or set FMC_PROFILE)')
+    args = parser.parse_args(argv)
+    start_tracing(args.trace, args.profile)
     
-    # Update configuration from command line arguments
+    # Update configuration from command line arguments, starting from config.py's values so that
+    # overrides from an earlier in-process run (fmcctl run-plan) don't carry over
+    reset_config()
     network_ids_dict = None
     if args.network_ids:
-        import json
         try:
             network_ids_dict = json.loads(args.network_ids)
         except json.JSONDecodeError:
@@ -362,6 +674,22 @@ def main():
     current_device_id = config.DEVICE_ID
     current_network_ids = config.NETWORK_IDS
     
+    if args.spec:
+        return run_spec(current_fmc_url, current_api_key, args.spec, current_network_ids, args.workers,
+                        args.batch_size, args.check, args.deploy_timeout if args.deploy else None, args.prune,
+                        args.force_deploy)
+    
+    # Multi-device mode: device ID -> network IDs
+    device_network_ids = None
+    try:
+        if args.device_spec:
+            device_network_ids = {str(k): v for k, v in load_json_arg(args.device_spec).items()}
+        elif args.device_ids:
+            device_network_ids = {device_id: current_network_ids for device_id in parse_device_ids(args.device_ids)}
+    except (json.JSONDecodeError, AttributeError, OSError) as e:
+        print(f"❌ Invalid multi-device parameter: {e}")
+        return False
+    
     print("🚀 cdFMC OSPF Process 1 Automation - FRESH START")
     print("=" * 60)
     print("📸 Configuring to match screenshot requirements:")
@@ -382,6 +710,10 @@ def main():
         if not current_api_key:
             print("❌ Please update API_KEY in config.py or provide --api-key")
             return False
+        
+        if device_network_ids is not None:
+            return run_multi_device(current_fmc_url, current_api_key, device_network_ids, args.workers,
+                                    args.deploy_timeout if args.deploy else None, args.reconcile, args.force_deploy)
             
         if not current_device_id:
             print("❌ Please provide --device-id parameter")
@@ -405,30 +737,9 @@ def main():
         device_id = current_device_id
         
         # Use provided network IDs directly (no need for API discovery)
-        print(f"\n2. Using provided network IDs...")
-        found_networks = []
-        
-        # Map our expected networks to the provided IDs
-        network_mapping = {
-            "Attacker": "attacker_id",
-            "Data-Center": "data_center_id", 
-            "Apps": "apps_id",
-            "DMZ": "dmz_id",
-            "Outside": "outside_id",
-            "Transport": "transport_id"
-        }
-        
-        for network_name in OSPF_NETWORKS:
-            key = network_mapping.get(network_name)
-            if key and key in current_network_ids:
-                found_networks.append({
-                    "type": "Network",
-                    "id": current_network_ids[key],
-                    "name": network_name
-                })
-                print(f"   ✅ {network_name}: {current_network_ids[key]}")
-            else:
-                print(f"   ❌ {network_name}: ID not found in provided network IDs")
+        with phase("2. networks"):
+            print(f"\n2. Using provided network IDs...")
+            found_networks = resolve_networks(current_network_ids)
         
         if not found_networks:
             print("   ❌ No valid network IDs found!")
@@ -436,56 +747,23 @@ def main():
             
         print(f"   ✅ Ready to configure {len(found_networks)} networks")
         
-        # Clean up existing OSPF configuration completely
-        print(f"\n3. Cleaning up existing OSPF configuration...")
-        existing_ospf = api.get_existing_ospf_routes(device_id)
-        
-        if existing_ospf:
-            for ospf_config in existing_ospf:
-                ospf_id = ospf_config['id']
-                print(f"   🗑️  Deleting existing OSPF config (ID: {ospf_id})")
-                
-                delete_url = f"{api.fmc_url}/api/fmc_config/v1/domain/{api.domain_uuid}/devices/devicerecords/{device_id}/routing/ospfv2routes/{ospf_id}"
-                delete_response = requests.delete(delete_url, headers=api.headers, verify=False, timeout=30)
-                
-                if delete_response.status_code in [200, 204]:
-                    print(f"   ✅ Deleted OSPF configuration")
-                else:
-                    print(f"   ⚠️  Could not delete config: {delete_response.status_code}")
-        else:
-            print(f"   ℹ️  No existing OSPF configuration found")
-        
-        # Create completely fresh OSPF configuration to match screenshot
-        print(f"\n4. Creating fresh OSPF configuration to match screenshot...")
-        result = api.create_fresh_ospf_configuration(device_id, found_networks)
-        
-        if not result:
-            return False
-        
-        # Verify the configuration was saved
-        print(f"\n4b. Verifying configuration was saved...")
-        verify_ospf = api.get_existing_ospf_routes(device_id)
-        if verify_ospf:
-            print(f"   ✅ Verified: OSPF configuration exists in cdFMC")
-            for config in verify_ospf:
-                print(f"   - Config ID: {config.get('id', 'N/A')}")
-                print(f"   - Process ID: {config.get('processId', 'N/A')}")
-                areas = config.get('areas', [])
-                if areas:
-                    area = areas[0]
-                    networks = area.get('areaNetworks', [])
-                    print(f"   - Area {area.get('areaId', 'N/A')}: {len(networks)} networks")
-        else:
-            print(f"   ❌ Configuration not found in cdFMC!")
+        if args.reconcile:
+            if not reconcile_device_ospf(api, device_id, found_networks)["ok"]:
+                return False
+        elif not configure_device_ospf(api, device_id, found_networks):
             return False
         
-        # Deploy configuration
-        # print(f"\n6. Deploying configuration to device...")
-        # deploy_result = api.deploy_configuration(device_id)
-        # if not deploy_result:
-        #     print("   ⚠️  Configuration saved but deployment failed")
-        #     print("   ℹ️  You can manually deploy from FMC GUI")
-        #     print("   📍 Look for 'Deploy Changes' or pending changes indicator in cdFMC")
+        # Deploy configuration and follow the task until it lands
+        deploy_result = None
+        if args.deploy:
+            with phase("5. deploy"):
+                print(f"\n5. Deploying configuration to device...")
+                deploy_result = api.deploy_and_wait([device_id], deadline=args.deploy_timeout, force=args.force_deploy)
+            print_deployment_results(deploy_result)
+            if not deploy_result["success"]:
+                print("   ⚠️  Configuration saved but deployment failed")
+                print("   📍 Look for 'Deploy Changes' or pending changes indicator in cdFMC")
+                return False
         
         print("\n🎉 cdFMC OSPF Process 1 automation completed successfully!")
         print("\n📸 Configuration matches screenshot:")
@@ -496,8 +774,8 @@ def main():
         print("- ✅ Area 0: normal type")
         print(f"- ✅ Networks: All {len(found_networks)} networks added to Area 0")
         print("- ✅ Configuration saved to cdFMC")
-        # if deploy_result:
-        #     print("- ✅ Deployment initiated")
+        if deploy_result:
+            print(f"- ✅ Deployed in {deploy_result['seconds']:.1f}s")
         
         return True
         
@@ -508,6 +786,106 @@ def main():
         print(f"\n❌ Error: {str(e)}")
         return False
 
+def run_multi_device(fmc_url, api_key, device_network_ids, workers, deploy_timeout=None, reconcile=False,
+                     force_deploy=False):
+    """Multi-device mode: configure every device concurrently and report per device"""
+    if not device_network_ids:
+        print("❌ No device IDs provided")
+        return False
+    
+    workers = max(1, min(workers, len(device_network_ids)))
+    print(f"   ✅ FMC URL: {fmc_url}")
+    print(f"   ✅ API Key: {api_key[:8]}...")
+    print(f"   ✅ Domain UUID: {DOMAIN_UUID}")
+    print(f"   ✅ Devices: {len(device_network_ids)} ({workers} concurrent)")
+    
+    api = CdFMCRestAPI(fmc_url, api_key)
+    start = time.perf_counter()
+    with phase("3-4. configure devices"):
+        results = configure_devices_concurrently(api, device_network_ids, workers, reconcile)
+    
+    print_device_results(results)
+    failed = [r for r in results if not r["ok"]]
+    print(f"\n{'🎉' if not failed else '⚠️ '} {len(results) - len(failed)}/{len(results)} devices configured "
+          f"in {time.perf_counter() - start:.1f}s")
+    
+    # One deployment covering every device that was configured successfully
+    configured = [r["device_id"] for r in results if r["ok"]]
+    if deploy_timeout is not None and configured:
+        with phase("5. deploy"):
+            print(f"\n5. Deploying configuration to {len(configured)} devices...")
+            deploy_result = api.deploy_and_wait(configured, deadline=deploy_timeout, force=force_deploy)
+        print_deployment_results(deploy_result)
+        if not deploy_result["success"]:
+            return False
+    return not failed
+
+def run_spec(fmc_url, api_key, spec_value, network_ids, workers, batch_size=0, check_only=False,
+             deploy_timeout=None, prune=False, force_deploy=False):
+    """Declarative mode: validate the whole spec offline, then apply it in batches of devices"""
+    print("🚀 cdFMC OSPF Automation - declarative spec")
+    print("=" * 60)
+    print("\n📋 Validating spec...")
+    start = time.perf_counter()
+    try:
+        plan = build_plan(load_spec(spec_value), network_ids)
+    except SpecError as e:
+        print(f"   ❌ {e}")
+        return False
+    processes = sum(len(device["payloads"]) for device in plan)
+    print(format_plan(plan))
+    print(f"   ✅ {len(plan)} device(s), {processes} process(es) validated in "
+          f"{(time.perf_counter() - start) * 1000:.0f}ms")
+    if check_only:
+        return True
+    
+    if not fmc_url:
+        print("❌ Please update FMC_URL in config.py or provide --fmc-url")
+        return False
+    if not api_key:
+        print("❌ Please update API_KEY in config.py or provide --api-key")
+        return False
+    
+    api = CdFMCRestAPI(fmc_url, api_key)
+    devices = {device["device_id"]: device for device in plan}
+    ids = list(devices)
+    batch_size = batch_size if batch_size > 0 else len(ids)
+    workers = max(1, min(workers, batch_size))
+
+    def work(device_id, device):
+        return dict(apply_spec_device(api, device, prune), networks=device["networks"])
+
+    results = []
+    with phase("3-4. configure devices"):
+        for first in range(0, len(ids), batch_size):
+            batch = {device_id: devices[device_id] for device_id in ids[first:first + batch_size]}
+            if len(batch) < len(ids):
+                print(f"\n📦 Batch {first // batch_size + 1}: {len(batch)} device(s)")
+            results += run_device_jobs(batch, workers, work)
+            if any(not r["ok"] for r in results) and first + batch_size < len(ids):
+                skipped = ids[first + batch_size:]
+                print(f"\n⚠️  Stopping after a failed batch; {len(skipped)} device(s) not applied")
+                results += [{"device_id": device_id, "ok": False, "networks": devices[device_id]["networks"],
+                             "seconds": 0.0, "detail": "skipped (earlier batch failed)"} for device_id in skipped]
+                break
+    
+    print_device_results(results)
+    failed = [r for r in results if not r["ok"]]
+    print(f"\n{'🎉' if not failed else '⚠️ '} {len(results) - len(failed)}/{len(results)} devices applied "
+          f"in {time.perf_counter() - start:.1f}s")
+    
+    configured = [r["device_id"] for r in results if r["ok"]]
+    if deploy_timeout is not None and configured:
+        with phase("5. deploy"):
+            print(f"\n5. Deploying configuration to {len(configured)} devices...")
+            deploy_result = api.deploy_and_wait(configured, deadline=deploy_timeout, force=force_deploy)
+        print_deployment_results(deploy_result)
+        if not deploy_result["success"]:
+            return False
+    return not failed
+
 if __name__ == "__main__":
     success = main()
+    if stats_enabled():
+        print_all_stats()
     sys.exit(0 if success else 1)
@@ -25,7 +25,8 @@ def update_config_from_terraform(fmc_url=None, api_key=None, device_id=None, net
     global FMC_URL, API_KEY, DEVICE_ID, NETWORK_IDS
     
     if fmc_url:
-        FMC_URL = fmc_url if fmc_url.startswith('https://') else f"https://{fmc_url}"
+        # An explicit scheme is kept (e.g. http:// for the local mock in scripts/benchmark)
+        FMC_URL = fmc_url if fmc_url.startswith(('https://', 'http://')) else f"https://{fmc_url}"
         if not FMC_URL.endswith('/'):
             FMC_URL += '/'
     
@@ -38,6 +39,17 @@ def update_config_from_terraform(fmc_url=None, api_key=None, device_id=None, net
     if network_ids:
         NETWORK_IDS = network_ids
 
+# Values as loaded, restored before each in-process run
+_DEFAULTS = {'FMC_URL': FMC_URL, 'API_KEY': API_KEY, 'DEVICE_ID': DEVICE_ID, 'NETWORK_IDS': NETWORK_IDS}
+
+def reset_config():
+    """Restore the values update_config_from_terraform overrides (fmcctl run-plan calls main() once per step)"""
+    global FMC_URL, API_KEY, DEVICE_ID, NETWORK_IDS
+    FMC_URL = _DEFAULTS['FMC_URL']
+    API_KEY = _DEFAULTS['API_KEY']
+    DEVICE_ID = _DEFAULTS['DEVICE_ID']
+    NETWORK_IDS = dict(_DEFAULTS['NETWORK_IDS'])
+
 # Device and OSPF Settings (static configuration)
 DEVICE_NAME = "HQ_FTDv"  # Device name (note underscore, not space)
 OSPF_PROCESS_ID = "1"
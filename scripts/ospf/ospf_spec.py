@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Declarative OSPF spec: many devices, processes and areas in one file
+
+The spec is read from YAML or JSON, resolved and validated entirely
+offline: every OspfRoute payload is built before the first API call, and
+all problems (unknown area types, network names without an ID, a network
+used twice on a device, duplicate processes/areas/devices) are reported
+together. cdfmc_ospf_automation.py --spec then applies the plan.
+
+Spec format:
+    networks:                  # optional name -> object ID (merged over --network-ids)
+      Attacker: 005056BF-...
+    defaults:                  # optional, used by devices that list no processes
+      processes: [...]
+    devices:
+      - id: 0f5c...            # device record ID
+        name: HQ_FTDv          # optional, only used in messages
+        processes:
+          - id: 1              # 1 or 2 (FTD supports two OSPFv2 processes)
+            areas:
+              - id: 0          # 0-4294967295 or dotted decimal
+                type: normal   # normal, stub or nssa
+                networks: [Attacker, Data-Center, {id: 005056BF-..., name: Lab, type: Host}]
+
+A network given by name is looked up in `networks`, then in --network-ids
+under the name itself or its Terraform key ("Data-Center" -> "data_center_id").
+"""
+
+import ipaddress
+
+from fmc_spec import SpecError, terraform_key
+from fmc_spec import load_spec as _load_spec
+
+AREA_TYPES = ("normal", "stub", "nssa")
+PROCESS_IDS = (1, 2)
+NETWORK_TYPES = ("Network", "Host", "NetworkGroup")
+MAX_AREA_ID = 2 ** 32 - 1
+SPEC_SUBJECT = "OSPF spec"  # As named in SpecError messages
+
+
+def load_spec(value):
+    """Read a spec from a file path (.yaml/.yml/.json) or an inline JSON/YAML string"""
+    return _load_spec(value, SPEC_SUBJECT)
+
+
+def ospf_route_payload(process_id, areas):
+    """OspfRoute payload for one process (Internal Router: no redistribution, filters or summaries)
+
+    areas: list of {"areaId", "type", "networks": [{"type", "id", "name"}]}
+    Used for create and update alike, so both carry logAdjacencyChanges
+    (DEFAULT, FMC's own default) as the original fresh-create payload did;
+    the old create/update helpers left it out.
+    """
+    return {
+        "type": "OspfRoute",
+        "processId": str(process_id),
+        "enableProcess": f"PROCESS_{process_id}",
+        "processConfiguration": {
+            "rfc1583Compatible": False,
+            "ignoreLsaMospf": False,
+            "administrativeDistance": {
+                "interArea": 110,
+                "intraArea": 110,
+                "external": 110
+            },
+            "timers": {
+                "lsaGroup": 10  # Default LSA group pacing timer
+            }
+        },
+        "redistributeProtocols": [],  # Empty for Internal Router role (avoids ASBR)
+        "filterRules": [],
+        "summaryAddresses": [],
+        "logAdjacencyChanges": {
+            "logType": "DEFAULT"
+        },
+        "areas": [{
+            "areaId": str(area["areaId"]),
+            "areaType": {
+                "type": area["type"]
+            },
+            "areaNetworks": [
+                {"type": network["type"], "id": network["id"], "name": network["name"]}
+                for network in area["networks"]
+            ]
+        } for area in areas]
+    }
+
+
+def parse_area_id(value):
+    """Return the area ID as a string, or None when it is neither 0-4294967295 nor dotted decimal"""
+    if isinstance(value, bool):
+        return None
+    text = str(value).strip()
+    if text.isdigit():
+        return text if int(text) <= MAX_AREA_ID else None
+    try:
+        return str(ipaddress.IPv4Address(text))
+    except ValueError:
+        return None
+
+
+class _Resolver:
+    """Turns network references into {"type", "id", "name"}, collecting errors"""
+
+    def __init__(self, networks, network_ids):
+        self.networks = dict(network_ids or {})
+        self.networks.update(networks or {})
+
+    def resolve(self, ref):
+        if isinstance(ref, str):
+            ref = {"name": ref}
+        if not isinstance(ref, dict):
+            return None, f"expected a network name or {{id, name, type}}, got {ref!r}"
+        name = ref.get("name")
+        network_type = ref.get("type", "Network")
+        if network_type not in NETWORK_TYPES:
+            return None, f"invalid network type {network_type!r} (expected {', '.join(NETWORK_TYPES)})"
+        network_id = ref.get("id")
+        if not network_id and name:
+            network_id = self.networks.get(name) or self.networks.get(terraform_key(name))
+        if not network_id:
+            return None, f"network {name!r} has no ID (add it to `networks` or --network-ids)"
+        return {"type": network_type, "id": str(network_id), "name": name or str(network_id)}, None
+
+
+def _items(value, where, errors):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        errors.append(f"{where}: expected a list")
+        return []
+    return value
+
+
+def _build_process(process, where, resolver, used_networks, errors):
+    """Validate one process entry; returns its payload (or None) and the number of area networks"""
+    if not isinstance(process, dict):
+        errors.append(f"{where}: expected a mapping")
+        return None, 0
+    process_id = process.get("id", process.get("process_id"))
+    if str(process_id) not in {str(p) for p in PROCESS_IDS}:
+        errors.append(f"{where}.id: invalid process ID {process_id!r} (expected {' or '.join(map(str, PROCESS_IDS))})")
+        process_id = None
+
+    areas = []
+    area_ids = set()
+    network_count = 0
+    area_list = _items(process.get("areas"), f"{where}.areas", errors)
+    if not area_list:
+        errors.append(f"{where}.areas: at least one area is required")
+    for a, area in enumerate(area_list):
+        area_where = f"{where}.areas[{a}]"
+        if not isinstance(area, dict):
+            errors.append(f"{area_where}: expected a mapping")
+            continue
+        area_id = parse_area_id(area.get("id", area.get("area_id")))
+        if area_id is None:
+            errors.append(f"{area_where}.id: invalid area ID {area.get('id')!r}")
+        elif area_id in area_ids:
+            errors.append(f"{area_where}.id: area {area_id} is defined twice in this process")
+        area_ids.add(area_id)
+        area_type = str(area.get("type", "normal")).lower()
+        if area_type not in AREA_TYPES:
+            errors.append(f"{area_where}.type: invalid area type {area.get('type')!r} (expected {', '.join(AREA_TYPES)})")
+        elif area_type != "normal" and area_id in ("0", "0.0.0.0"):
+            errors.append(f"{area_where}.type: the backbone area 0 must be normal, not {area_type}")
+
+        networks = []
+        network_list = _items(area.get("networks"), f"{area_where}.networks", errors)
+        if not network_list:
+            errors.append(f"{area_where}.networks: at least one network is required")
+        for n, ref in enumerate(network_list):
+            network, problem = resolver.resolve(ref)
+            if problem:
+                errors.append(f"{area_where}.networks[{n}]: {problem}")
+                continue
+            first = used_networks.get(network["id"])
+            if first:
+                errors.append(f"{area_where}.networks[{n}]: {network['name']} ({network['id']}) is already in {first}")
+                continue
+            used_networks[network["id"]] = area_where
+            networks.append(network)
+        network_count += len(networks)
+        areas.append({"areaId": area_id, "type": area_type, "networks": networks})
+
+    if process_id is None:
+        return None, network_count
+    return ospf_route_payload(int(process_id), areas), network_count
+
+
+def build_plan(spec, network_ids=None):
+    """Validate a spec and build every payload offline
+
+    Returns [{"device_id", "name", "payloads": [OspfRoute...], "networks"}] in
+    spec order; raises SpecError listing every problem found.
+    """
+    if not isinstance(spec, dict):
+        raise SpecError(["the spec must be a mapping with a `devices` list"], SPEC_SUBJECT)
+    errors = []
+    resolver = _Resolver(spec.get("networks"), network_ids)
+    default_processes = (spec.get("defaults") or {}).get("processes")
+    devices = _items(spec.get("devices"), "devices", errors)
+    if not devices and not errors:
+        errors.append("devices: at least one device is required")
+
+    plan = []
+    seen_devices = {}
+    for d, device in enumerate(devices):
+        where = f"devices[{d}]"
+        if not isinstance(device, dict):
+            errors.append(f"{where}: expected a mapping")
+            continue
+        device_id = device.get("id")
+        if not device_id:
+            errors.append(f"{where}.id: device ID is required")
+        elif str(device_id) in seen_devices:
+            errors.append(f"{where}.id: device {device_id} is already defined at {seen_devices[str(device_id)]}")
+        else:
+            seen_devices[str(device_id)] = where
+
+        processes = device.get("processes", default_processes)
+        process_list = _items(processes, f"{where}.processes", errors)
+        if not process_list:
+            errors.append(f"{where}.processes: no processes (and no defaults.processes)")
+        payloads = []
+        process_ids = set()
+        used_networks = {}  # An interface belongs to one OSPF area on the whole device
+        network_count = 0
+        for p, process in enumerate(process_list):
+            process_where = f"{where}.processes[{p}]"
+            payload, count = _build_process(process, process_where, resolver, used_networks, errors)
+            network_count += count
+            if payload is None:
+                continue
+            if payload["processId"] in process_ids:
+                errors.append(f"{process_where}.id: process {payload['processId']} is defined twice on this device")
+                continue
+            process_ids.add(payload["processId"])
+            payloads.append(payload)
+        plan.append({"device_id": str(device_id), "name": device.get("name") or str(device_id),
+                     "payloads": payloads, "networks": network_count})
+
+    if errors:
+        raise SpecError(errors, SPEC_SUBJECT)
+    return plan
+
+
+def format_plan(plan):
+    """One line per device/process/area"""
+    lines = []
+    for device in plan:
+        lines.append(f"{device['name']} ({device['device_id']})")
+        for payload in device["payloads"]:
+            for area in payload["areas"]:
+                lines.append(f"   process {payload['processId']} area {area['areaId']} ({area['areaType']['type']}): "
+                             f"{', '.join(n['name'] for n in area['areaNetworks'])}")
+    return "\n".join(lines)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Dependency-ordered teardown of what the pipeline created on cdFMC
+
+Reads the objects from the Terraform state (a terraform.tfstate file or
+`terraform show -json` output) and finds the OSPF processes the OSPF
+script created on each device, then deletes them through the REST API one
+layer at a time, each layer concurrently:
+
+    VPN endpoints -> VPN topologies -> OSPF routes -> static routes
+    -> network/host objects -> interface groups
+
+A layer only starts once everything that may reference its objects is
+gone. Deletes that fail (e.g. "in use" while cdFMC catches up) are
+retried in later rounds; a 404 counts as already deleted. Afterwards
+every affected collection is listed again to confirm nothing is left.
+
+Usage:
+    python3 teardown.py --state ../../terraform.tfstate --tfvars ../../terraform.tfvars --dry-run
+    terraform show -json | python3 teardown.py --state - --host HOST --token TOKEN
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+# Shared pooled HTTP client lives in scripts/common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from fmc_client import get_client, print_all_stats, stats_enabled
+from fmc_index import CDFMC_DOMAIN_UUID, CONFIG_API_TPL
+from fmc_tasks import backoff_delays
+from fmc_trace import phase, start_tracing
+
+VPN_ENDPOINTS = "vpn endpoints"
+VPN_TOPOLOGIES = "vpn topologies"
+OSPF_ROUTES = "ospf routes"
+STATIC_ROUTES = "static routes"
+NETWORK_OBJECTS = "network objects"
+INTERFACE_GROUPS = "interface groups"
+
+# Deletion order: each layer may reference objects of the layers after it
+LAYERS = [VPN_ENDPOINTS, VPN_TOPOLOGIES, OSPF_ROUTES, STATIC_ROUTES, NETWORK_OBJECTS, INTERFACE_GROUPS]
+
+# Terraform resource type -> (layer, object path under the config API, filled from the state attributes)
+STATE_TYPES = {
+    "fmc_vpn_s2s": (VPN_TOPOLOGIES, "policy/ftds2svpns/{id}"),
+    "fmc_device_ipv4_static_route": (STATIC_ROUTES, "devices/devicerecords/{device_id}/routing/ipv4staticroutes/{id}"),
+    "fmc_network": (NETWORK_OBJECTS, "object/networks/{id}"),
+    "fmc_host": (NETWORK_OBJECTS, "object/hosts/{id}"),
+    "fmc_interface_group": (INTERFACE_GROUPS, "object/interfacegroups/{id}"),
+}
+OSPF_ROUTES_PATH = "devices/devicerecords/{device_id}/routing/ospfv2routes"
+
+DEFAULT_WORKERS = 8
+DEFAULT_ROUNDS = 3  # Attempts per object; later rounds only retry what failed
+GONE_STATUSES = {200, 204, 404}
+
+
+class Target:
+    """One object to delete"""
+
+    def __init__(self, layer, label, path):
+        self.layer = layer
+        self.label = label
+        self.path = path
+        self.status = "pending"  # pending -> deleted | gone | failed
+        self.error = None
+
+    @property
+    def collection(self):
+        return self.path.rsplit('/', 1)[0]
+
+    @property
+    def object_id(self):
+        return self.path.rsplit('/', 1)[1]
+
+
+def load_tfvars(path):
+    """String variables from a .tfvars file (name = "value" lines only)"""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            m = re.match(r'\s*(\w+)\s*=\s*"([^"]*)"', line)
+            if m:
+                values[m.group(1)] = m.group(2)
+    return values
+
+
+def load_state(value):
+    """Parse --state: a file path, or '-' for stdin"""
+    if value == '-':
+        return json.load(sys.stdin)
+    with open(value) as f:
+        return json.load(f)
+
+
+def state_resources(state):
+    """Yield (address, mode, type, attributes) from a tfstate file or `terraform show -json` output"""
+    if 'resources' in state:
+        for resource in state['resources']:
+            prefix = f"{resource['module']}." if resource.get('module') else ""
+            prefix += "data." if resource.get('mode') == 'data' else ""
+            for instance in resource.get('instances', []):
+                key = instance.get('index_key')
+                suffix = f"[{json.dumps(key)}]" if key is not None else ""
+                yield (f"{prefix}{resource['type']}.{resource['name']}{suffix}", resource.get('mode'),
+                       resource['type'], instance.get('attributes') or {})
+        return
+
+    def walk(module):
+        for resource in module.get('resources', []):
+            yield resource['address'], resource.get('mode'), resource['type'], resource.get('values') or {}
+        for child in module.get('child_modules', []):
+            yield from walk(child)
+
+    yield from walk((state.get('values') or {}).get('root_module') or {})
+
+
+def plan_from_state(resources):
+    """Return (targets, {device_id: name}) for the managed objects and the devices in the state"""
+    targets, devices = [], {}
+    for address, mode, resource_type, attrs in resources:
+        if mode == 'data':
+            if resource_type == 'fmc_device' and attrs.get('id'):
+                devices[attrs['id']] = attrs.get('name') or attrs['id']
+            continue
+        if resource_type == 'fmc_vpn_s2s_endpoints':
+            for key, item in (attrs.get('items') or {}).items():
+                if item.get('id') and attrs.get('vpn_s2s_id'):
+                    targets.append(Target(VPN_ENDPOINTS, f"{address}.items[{key}]",
+                                          f"policy/ftds2svpns/{attrs['vpn_s2s_id']}/endpoints/{item['id']}"))
+        elif resource_type in STATE_TYPES:
+            layer, template = STATE_TYPES[resource_type]
+            try:
+                targets.append(Target(layer, address, template.format(**attrs)))
+            except KeyError as e:
+                print(f"   ⚠️  {address}: no {e} in state, skipped", file=sys.stderr)
+    return targets, devices
+
+
+class Teardown:
+    """Deletes targets layer by layer and verifies they are gone"""
+
+    def __init__(self, client, headers, domain_uuid=CDFMC_DOMAIN_UUID, workers=DEFAULT_WORKERS,
+                 rounds=DEFAULT_ROUNDS):
+        self.client = client
+        self.headers = headers
+        self.config_url = CONFIG_API_TPL.format(base_url=client.base_url, domain_uuid=domain_uuid)
+        self.workers = workers
+        self.rounds = rounds
+
+    def discover_ospf(self, devices):
+        """OSPF processes on each device (created by the OSPF script, so not in the state)"""
+        def fetch(device_id):
+            path = OSPF_ROUTES_PATH.format(device_id=device_id)
+            try:
+                items = list(self.client.paginate(self.config_url + path, headers=self.headers))
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    return []
+                raise
+            return [Target(OSPF_ROUTES, f"{devices[device_id]} ospf {item.get('name') or item['id']}",
+                           f"{path}/{item['id']}") for item in items]
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(devices) or 1))) as pool:
+            return [target for found in pool.map(fetch, devices) for target in found]
+
+    def _delete(self, target):
+        try:
+            response = self.client.delete(self.config_url + target.path, headers=self.headers)
+        except requests.exceptions.RequestException as e:
+            target.error = str(e)
+            return False
+        if response.status_code in GONE_STATUSES:
+            target.status = "gone" if response.status_code == 404 else "deleted"
+            target.error = None
+            return True
+        target.error = f"{response.status_code}: {response.text[:200]}"
+        return False
+
+    def delete_layer(self, targets):
+        """Delete one layer concurrently; failures are retried in up to `rounds` rounds"""
+        pending = list(targets)
+        delays = backoff_delays(initial=2.0, factor=2.0, maximum=15.0)
+        for attempt in range(self.rounds):
+            if attempt:
+                time.sleep(next(delays))
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(pending)))) as pool:
+                outcomes = list(pool.map(self._delete, pending))
+            pending = [target for target, ok in zip(pending, outcomes) if not ok]
+            if not pending:
+                break
+        for target in pending:
+            target.status = "failed"
+        return not pending
+
+    def leftovers(self, targets):
+        """Targets still present when their collections are listed again"""
+        collections = sorted({target.collection for target in targets})
+
+        def listed_ids(collection):
+            try:
+                return {item.get('id') for item in self.client.paginate(self.config_url + collection, headers=self.headers)}
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    return set()  # The parent (device, VPN topology) is gone too
+                raise
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(collections) or 1))) as pool:
+            present = dict(zip(collections, pool.map(listed_ids, collections)))
+        return [target for target in targets if target.object_id in present[target.collection]]
+
+
+def format_plan(targets):
+    lines = []
+    for layer in LAYERS:
+        layer_targets = [t for t in targets if t.layer == layer]
+        lines.append(f"{layer} ({len(layer_targets)})")
+        lines += [f"   {t.label}  ->  {t.path}" for t in layer_targets]
+    return "\n".join(lines)
+
+
+def format_results(targets, seconds):
+    lines = [f"{'LAYER':<18} {'TARGETS':>7} {'DELETED':>7} {'GONE':>5} {'FAILED':>6} {'TIME(s)':>8}"]
+    for layer in LAYERS:
+        layer_targets = [t for t in targets if t.layer == layer]
+        count = {status: sum(1 for t in layer_targets if t.status == status) for status in ("deleted", "gone", "failed")}
+        lines.append(f"{layer:<18} {len(layer_targets):>7} {count['deleted']:>7} {count['gone']:>5} "
+                     f"{count['failed']:>6} {seconds.get(layer, 0.0):>8.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete the pipeline's cdFMC objects in dependency order and verify the tenant is clean.")
+    parser.add_argument('--state', default="terraform.tfstate", help="terraform.tfstate or `terraform show -json` output ('-' reads stdin)")
+    parser.add_argument('--tfvars', help="Read cdfmc_host and scc_token from this .tfvars file when --host/--token are not given")
+    parser.add_argument('--host', help="cdFMC host")
+    parser.add_argument('--token', help="API token for cdFMC")
+    parser.add_argument('--domain-uuid', default=CDFMC_DOMAIN_UUID, help="Domain UUID (defaults to cdFMC global)")
+    parser.add_argument('--device-id', action='append', default=[], help="Also remove OSPF from this device (repeatable; devices in the state are included)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f"Concurrent deletes per layer (default {DEFAULT_WORKERS})")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help=f"Delete attempts per object (default {DEFAULT_ROUNDS})")
+    parser.add_argument('--dry-run', action='store_true', help="Print what would be deleted, in order, without deleting anything")
+    parser.add_argument('--json', action='store_true', help="Print the result as JSON")
+    parser.add_argument('--trace', help="Append a JSON-lines trace of every request, wait and phase to this file (or set FMC_TRACE)")
+    parser.add_argument('--profile', help="Write a cProfile dump to this file (or set FMC_PROFILE)")
+    args = parser.parse_args(argv)
+    start_tracing(args.trace, args.profile)
+
+    tfvars = load_tfvars(args.tfvars) if args.tfvars else {}
+    host = args.host or tfvars.get('cdfmc_host')
+    token = args.token or tfvars.get('scc_token')
+    try:
+        state = load_state(args.state)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read Terraform state {args.state}: {e}", file=sys.stderr)
+        return False
+
+    start = time.perf_counter()
+    with phase("1. plan"):
+        targets, devices = plan_from_state(state_resources(state))
+        devices.update({device_id: devices.get(device_id, device_id) for device_id in args.device_id})
+        teardown = None
+        if host and token:
+            teardown = Teardown(get_client(host), {'Authorization': 'Bearer ' + token}, args.domain_uuid,
+                                args.workers, args.rounds)
+            targets += teardown.discover_ospf(devices)
+        elif not args.dry_run:
+            parser.error("--host and --token (or --tfvars) are required unless --dry-run")
+        else:
+            print(f"   ℹ️  No --host/--token: OSPF processes on {len(devices)} device(s) not looked up", file=sys.stderr)
+
+    if args.dry_run:
+        print(format_plan(targets))
+        print(f"\nDry run: {len(targets)} object(s) would be deleted in {len(LAYERS)} layers")
+        return True
+
+    seconds = {}
+    for layer in LAYERS:
+        layer_targets = [t for t in targets if t.layer == layer]
+        if not layer_targets:
+            continue
+        with phase(f"2. delete {layer}"):
+            layer_start = time.perf_counter()
+            print(f"Deleting {len(layer_targets)} {layer}...", file=sys.stderr)
+            teardown.delete_layer(layer_targets)
+            seconds[layer] = time.perf_counter() - layer_start
+
+    with phase("3. verify"):
+        left = teardown.leftovers(targets)
+    failed = [t for t in targets if t.status == "failed"]
+    clean = not left and not failed
+
+    if args.json:
+        print(json.dumps({
+            "clean": clean,
+            "seconds": round(time.perf_counter() - start, 2),
+            "targets": [{"layer": t.layer, "label": t.label, "path": t.path, "status": t.status, "error": t.error}
+                        for t in targets],
+            "leftovers": [t.path for t in left]
+        }, indent=2))
+    else:
+        print(format_results(targets, seconds))
+        for target in failed:
+            print(f"FAILED {target.label}: {target.error}")
+        for target in left:
+            if target.status != "failed":
+                print(f"STILL PRESENT {target.label} ({target.path})")
+        print(f"{'Tenant clean' if clean else 'Tenant NOT clean'}: {len(targets)} object(s) in "
+              f"{time.perf_counter() - start:.1f}s")
+    if stats_enabled():
+        print_all_stats()
+    return clean
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,98 @@
+"""Tests for the export store and request handling (python3 -m pytest scripts/tests)"""
+
+import hashlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR / "config-import"))
+
+from export import ContentStore, DownloadError, start_export
+from fmc_multipart import UploadProgress
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body=None, text=""):
+        self.status_code = status_code
+        self.body = body
+        self.text = text
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+        return self.body
+
+
+class FakeClient:
+
+    def __init__(self, response):
+        self.response = response
+
+    def post(self, url, headers=None, json=None):
+        return self.response
+
+
+class ContentStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ContentStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_files_are_stored_once_under_their_sha256(self):
+        data = b"export" * 1000
+        sha256 = hashlib.sha256(data).hexdigest()
+        self.assertEqual(self.store.put([data[:10], data[10:]], len(data)), (sha256, len(data), True))
+        self.assertEqual(self.store.put([data]), (sha256, len(data), False))
+        path = Path(self.tmp.name) / "sha256" / sha256[:2] / sha256
+        self.assertEqual(self.store.path_for(sha256), path)
+        self.assertEqual(path.read_bytes(), data)
+
+    def test_truncated_or_mismatched_downloads_keep_nothing(self):
+        with self.assertRaises(DownloadError) as caught:
+            self.store.put([b"abc"], expected_size=5)
+        self.assertTrue(caught.exception.retryable)
+        with self.assertRaises(DownloadError) as caught:
+            self.store.put([b"abc"], expected_sha256="00" * 32)
+        self.assertFalse(caught.exception.retryable)
+        self.assertEqual(list(self.store.objects.iterdir()), [])
+
+
+class StartExportTest(unittest.TestCase):
+
+    def start(self, response):
+        return start_export(FakeClient(response), "https://fmc.example.com", {}, "domain", ["dev-1"], {}, "export")
+
+    def test_task_id(self):
+        self.assertEqual(self.start(FakeResponse(202, {"metadata": {"task": {"id": "task-1"}}})), "task-1")
+        self.assertEqual(self.start(FakeResponse(202, {"taskId": "task-2"})), "task-2")
+
+    def test_unusable_responses(self):
+        for response, message in ((FakeResponse(202, text="<html>"), "export response is not JSON: <html>"),
+                                  (FakeResponse(202, []), "no task ID"),
+                                  (FakeResponse(400, {}, text="bad"), "export request rejected: 400 bad")):
+            with self.subTest(message), self.assertRaises(DownloadError) as caught:
+                self.start(response)
+            self.assertIn(message, str(caught.exception))
+
+
+class ProgressTest(unittest.TestCase):
+
+    def test_direction_is_labelled(self):
+        out = io.StringIO()
+        UploadProgress("Downloading export", file=out, direction="received")(1048576, 1048576)
+        UploadProgress("Uploading backup", file=out)(1048576, 1048576)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("Downloading export: 1.0/1.0 MB received (100%)"), lines)
+        self.assertTrue(lines[1].startswith("Uploading backup: 1.0/1.0 MB sent (100%)"), lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
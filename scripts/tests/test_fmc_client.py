@@ -0,0 +1,108 @@
+"""Tests for the shared FMC client, run against the benchmark mock (python3 -m pytest scripts/tests)"""
+
+import gc
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR / "benchmark"))
+
+from fmc_client import FMCClient
+from fmc_index import ObjectIndex
+from mock_fmc import MockFMCServer
+
+NETWORKS_PATH = "/api/fmc_config/v1/domain/e276abec-e0f2-11e3-8169-6d9ed49b625f/object/networks"
+
+
+class PaginateTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFMCServer(latency=0.01)
+        cls.server.start()
+        networks = cls.server.state.objects["networks"]
+        for i in range(3000):
+            name = f"Net-{i}"
+            networks[name] = {"id": f"id-{i}", "type": "Network", "name": name, "value": f"10.{i // 256}.{i % 256}.0/24"}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def client(self, pool_size=10):
+        return FMCClient(self.server.url, pool_size=pool_size, rate_per_minute=0)
+
+    def test_every_item_once(self):
+        ids = [item["id"] for item in self.client().paginate(NETWORKS_PATH, limit=100)]
+        self.assertEqual(len(ids), 3000)
+        self.assertEqual(len(set(ids)), 3000)
+
+    def test_early_stop(self):
+        pages = self.client().paginate(NETWORKS_PATH, limit=100)
+        first = [next(pages) for _ in range(150)]
+        pages.close()
+        self.assertEqual(len(first), 150)
+
+    def test_concurrent_paginations_share_the_pool(self):
+        # More paginations than pooled connections, each with a prefetch window: must not deadlock
+        client = self.client(pool_size=10)
+        counts = {}
+
+        def run(n):
+            counts[n] = sum(1 for _ in client.paginate(NETWORKS_PATH, limit=100, window=4))
+
+        threads = [threading.Thread(target=run, args=(n,), daemon=True) for n in range(10)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 60
+        for thread in threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self.assertFalse([t for t in threads if t.is_alive()], "paginations did not finish")
+        self.assertEqual(counts, {n: 3000 for n in range(10)})
+
+
+
+class IndexListenerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockFMCServer()
+        self.server.start()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.client = FMCClient(self.server.url, rate_per_minute=0)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.cache_dir.cleanup()
+
+    def test_discarded_indexes_stop_listening(self):
+        for _ in range(50):  # As platsettings does: a new index per lookup
+            ObjectIndex(self.client, {}, cache_dir=self.cache_dir.name).items("object/networks")
+        index = ObjectIndex(self.client, {}, cache_dir=self.cache_dir.name)
+        index.items("object/networks")
+        gc.collect()
+        response = self.client.post(NETWORKS_PATH, json={"name": "New-Net", "value": "10.99.0.0/24"})
+        self.assertLess(response.status_code, 400)
+        self.assertEqual(len(self.client.write_listeners), 1)
+        self.assertFalse(index.is_cached("object/networks"))
+
+    def test_not_found_drops_a_recreated_object(self):
+        networks = self.server.state.objects["networks"]
+        networks["Branch"] = {"id": "old-id", "type": "Network", "name": "Branch", "value": "10.1.0.0/24"}
+        index = ObjectIndex(self.client, {}, cache_dir=self.cache_dir.name)
+        self.assertEqual(index.lookup("object/networks", "Branch"), ("old-id", "Network"))
+        # Deleted and recreated outside this process (e.g. by the Terraform provider)
+        networks["Branch"] = dict(networks["Branch"], id="new-id")
+        self.assertEqual(index.lookup("object/networks", "Branch"), ("old-id", "Network"))
+        self.assertEqual(self.client.get(NETWORKS_PATH + "/old-id").status_code, 404)
+        self.assertEqual(index.lookup("object/networks", "Branch"), ("new-id", "Network"))
+        reloaded = ObjectIndex(self.client, {}, cache_dir=self.cache_dir.name)
+        self.assertEqual(reloaded.lookup("object/networks", "Branch"), ("new-id", "Network"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for deployment planning (python3 -m pytest scripts/tests)"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+
+from fmc_deploy import deployment_request, plan_deployment
+
+CONFIG_URL = "https://fmc.example.com/api/fmc_config/v1/domain/global/"
+
+
+class FakeClient:
+    """Serves one deployabledevices listing"""
+
+    def __init__(self, items):
+        self.items = items
+        self.calls = 0
+
+    def paginate(self, url, headers=None, expanded=False):
+        self.calls += 1
+        return iter(self.items)
+
+
+def listed(device_id, version, up_to_date=False, can_deploy=True):
+    return {"device": {"id": device_id, "type": "Device"}, "version": version, "upToDate": up_to_date,
+            "canBeDeployed": can_deploy}
+
+
+class PlanDeploymentTest(unittest.TestCase):
+
+    def plan(self, items, device_ids=None):
+        client = FakeClient(items)
+        plan = plan_deployment(client, CONFIG_URL, {}, device_ids)
+        self.assertEqual(client.calls, 1)
+        return plan
+
+    def test_newest_version_of_the_pending_devices(self):
+        plan = self.plan([listed("a", "1700000000100"), listed("b", "1700000000300"), listed("c", "1700000000200")])
+        self.assertEqual(plan["pending"], ["a", "b", "c"])
+        self.assertEqual(plan["version"], 1700000000300)
+
+    def test_up_to_date_and_unlisted_devices_are_skipped(self):
+        plan = self.plan([listed("a", "100"), listed("b", "900", up_to_date=True)], ["a", "b", "not-listed"])
+        self.assertEqual(plan["pending"], ["a"])
+        self.assertEqual(plan["up_to_date"], ["b", "not-listed"])
+        self.assertEqual(plan["version"], 100)  # An up-to-date device's version doesn't count
+
+    def test_blocked_devices(self):
+        plan = self.plan([listed("a", "100", can_deploy=False), listed("b", "200")])
+        self.assertEqual((plan["pending"], plan["blocked"]), (["b"], ["a"]))
+        self.assertEqual(plan["version"], 200)
+
+    def test_only_requested_devices_once_each(self):
+        plan = self.plan([listed("a", "100"), listed("b", "200")], ["b", "b"])
+        self.assertEqual(plan["pending"], ["b"])
+        self.assertEqual(plan["version"], 200)
+
+    def test_missing_or_bad_versions(self):
+        plan = self.plan([listed("a", None), listed("b", "not-a-number")])
+        self.assertEqual(plan["pending"], ["a", "b"])
+        self.assertEqual(plan["version"], 0)
+
+
+class DeploymentRequestTest(unittest.TestCase):
+
+    def test_incremental_by_default(self):
+        payload = deployment_request(["a", "b"], 1700000000300)
+        self.assertEqual(payload["deviceList"], ["a", "b"])
+        self.assertIs(payload["forceDeploy"], False)
+        self.assertEqual(payload["version"], "1700000000300")
+
+    def test_force_only_when_asked(self):
+        self.assertIs(deployment_request(["a"], 100, force=True)["forceDeploy"], True)
+        self.assertIs(deployment_request(["a"], 100, force=0)["forceDeploy"], False)
+
+    def test_no_version_without_pending_changes(self):
+        self.assertNotIn("version", deployment_request(["a"], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for the incremental collection parser"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+
+from fmc_jsonstream import CollectionStream
+
+PAGE = {
+    "links": {"self": "https://fmc/api/x?offset=0&limit=3"},
+    "items": [3.5, 1e3, -12, 0, 2.5e-3, 123456789, True, None, "Zürich ✓",
+              {"id": "a", "value": 10.25, "nested": {"list": [1, 2.0, {"deep": -0.5e+2}]}},
+              [1, [2, [3]]], {}],
+    "paging": {"offset": 0, "limit": 12, "count": 12, "pages": 1}
+}
+
+
+def split_at(data, *cuts):
+    points = [0, *cuts, len(data)]
+    return [data[a:b] for a, b in zip(points, points[1:])]
+
+
+class CollectionStreamTest(unittest.TestCase):
+
+    def parse(self, chunks):
+        stream = CollectionStream(chunks)
+        return list(stream), stream.fields
+
+    def test_whole_body(self):
+        items, fields = self.parse([json.dumps(PAGE).encode()])
+        self.assertEqual(items, PAGE["items"])
+        self.assertEqual(fields["paging"], PAGE["paging"])
+        self.assertEqual(fields["links"], PAGE["links"])
+
+    def test_every_chunk_boundary(self):
+        # Numbers ("3." + "5", "1e" + "3"), strings, multi-byte characters and objects cut anywhere
+        for separators in ((',', ':'), (', ', ': ')):
+            data = json.dumps(PAGE, separators=separators, ensure_ascii=False).encode()
+            for cut in range(1, len(data)):
+                with self.subTest(separators=separators, cut=cut):
+                    items, fields = self.parse(split_at(data, cut))
+                    self.assertEqual(items, PAGE["items"])
+                    self.assertEqual(fields["paging"], PAGE["paging"])
+
+    def test_one_byte_chunks(self):
+        data = json.dumps(PAGE, ensure_ascii=False).encode()
+        items, _ = self.parse(data[i:i + 1] for i in range(len(data)))
+        self.assertEqual(items, PAGE["items"])
+
+    def test_numbers_split_mid_token(self):
+        for body, cut in ((b'{"items":[3.5]}', 11), (b'{"items":[1e3]}', 11), (b'{"items":[12,-0.5]}', 14),
+                          (b'{"items":[2.5e-3]}', 13), (b'{"items":[2.5e-3]}', 14)):
+            with self.subTest(body=body, cut=cut):
+                items, _ = self.parse(split_at(body, cut))
+                self.assertEqual(items, json.loads(body)["items"])
+
+    def test_empty_and_missing_items(self):
+        self.assertEqual(self.parse([b'{}']), ([], {}))
+        self.assertEqual(self.parse([b'{"items": [], "paging": {"count": 0}}']), ([], {"paging": {"count": 0}}))
+        self.assertEqual(self.parse([b'{"paging": {"count": 0}}']), ([], {"paging": {"count": 0}}))
+
+    def test_malformed(self):
+        for body in (b'', b'[1, 2]', b'{"items": [1 2]}', b'{"items": [1,', b'{"items": [1]'):
+            with self.subTest(body=body):
+                with self.assertRaises(ValueError):
+                    self.parse([body])
+
+
+if __name__ == "__main__":
+    unittest.main()
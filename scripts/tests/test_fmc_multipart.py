@@ -0,0 +1,64 @@
+"""Tests for the streaming multipart encoder (python3 -m pytest scripts/tests)"""
+
+import email.parser
+import email.policy
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+
+from fmc_multipart import MultipartStream
+
+
+class MultipartStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".sfo")
+        self.data = os.urandom(100_000)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def stream(self, **kwargs):
+        return MultipartStream([("type", "ImportRequest"), ("note", "Zürich ✓"),
+                                ("payloadFile", ("backup.sfo", self.path, "application/octet-stream"))], **kwargs)
+
+    def test_streamed_bytes_match_the_announced_length(self):
+        for chunk_size in (7919, 4096, 1 << 20):  # Uneven, even and larger than the file
+            with self.subTest(chunk_size=chunk_size):
+                stream = self.stream(chunk_size=chunk_size)
+                body = b"".join(stream)
+                self.assertEqual(len(body), len(stream))
+                self.assertEqual(stream.sent, len(stream))
+
+    def test_iterating_again_sends_the_same_body(self):
+        stream = self.stream()
+        self.assertEqual(b"".join(stream), b"".join(stream))
+        self.assertEqual(stream.sent, len(stream))
+
+    def test_body_parses_as_multipart(self):
+        stream = self.stream()
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {stream.content_type}\r\n\r\n".encode() + b"".join(stream))
+        parts = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+        self.assertEqual(list(parts), ["type", "note", "payloadFile"])
+        self.assertEqual(parts["type"].get_payload(decode=True), b"ImportRequest")
+        self.assertEqual(parts["note"].get_payload(decode=True), "Zürich ✓".encode())
+        self.assertEqual(parts["payloadFile"].get_filename(), "backup.sfo")
+        self.assertEqual(parts["payloadFile"].get_payload(decode=True), self.data)
+
+    def test_progress_reaches_the_total(self):
+        seen = []
+        stream = self.stream(chunk_size=16384, progress=lambda sent, total: seen.append((sent, total)))
+        list(stream)
+        self.assertEqual(seen[-1], (len(stream), len(stream)))
+        self.assertEqual([sent for sent, _ in seen], sorted(sent for sent, _ in seen))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Tests for the on-prem token cache's 401 handling (python3 -m pytest scripts/tests)"""
+
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+
+from fmc_client import FMCClient
+from fmc_tokens import TokenManager
+
+DEVICES_PATH = "/api/fmc_config/v1/domain/e276abec-e0f2-11e3-8169-6d9ed49b625f/devices/devicerecords"
+
+
+class TokenHandler(BaseHTTPRequestHandler):
+    """generatetoken hands out token-1, token-2, ...; other calls need the newest, unrevoked one"""
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with server.lock:
+            server.generated += 1
+            server.valid = f"token-{server.generated}"
+        self._send(204, [("X-auth-access-token", server.valid), ("X-auth-refresh-token", "refresh"),
+                         ("DOMAIN_UUID", "e276abec-e0f2-11e3-8169-6d9ed49b625f")])
+
+    def do_GET(self):
+        self._send(200 if self.headers.get("X-auth-access-token") == self.server.valid else 401)
+
+
+class UnauthorizedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), TokenHandler)
+        self.server.lock = threading.Lock()
+        self.server.generated = 0
+        self.server.valid = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.client = FMCClient(f"http://127.0.0.1:{self.server.server_address[1]}", rate_per_minute=0)
+        self.tokens = TokenManager(self.client.base_url, "admin", "secret", self.cache_dir.name, self.client)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache_dir.cleanup()
+
+    def test_revoked_token_is_replaced_once(self):
+        headers = self.tokens.headers()
+        self.server.valid = "revoked"
+        response = self.client.get(DEVICES_PATH, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(headers["X-auth-access-token"], "token-2")
+        self.assertEqual(self.client.get(DEVICES_PATH, headers=headers).status_code, 200)
+        self.assertEqual(self.server.generated, 2)
+
+    def test_concurrent_401s_generate_one_token(self):
+        headers = self.tokens.headers()
+        self.server.valid = "revoked"
+        statuses = []
+        threads = [threading.Thread(target=lambda: statuses.append(
+            self.client.get(DEVICES_PATH, headers=dict(headers)).status_code)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(statuses, [200] * 8)
+        self.assertEqual(self.server.generated, 2)
+
+    def test_unknown_token_is_left_alone(self):
+        self.tokens.headers()
+        response = self.client.get(DEVICES_PATH, headers={"X-auth-access-token": "someone-else"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.server.generated, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
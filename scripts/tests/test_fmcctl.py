@@ -0,0 +1,34 @@
+"""Tests for fmcctl's plan steps (python3 -m pytest scripts/tests)"""
+
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fmcctl import step_argv
+
+DEFAULTS = {"host": "fmc.example.com", "token": "secret"}
+
+
+class StepArgvTest(unittest.TestCase):
+
+    def test_defaults_fill_missing_flags(self):
+        self.assertEqual(step_argv({"command": "deploy", "argv": []}, DEFAULTS),
+                         ["--host", "https://fmc.example.com", "--token", "secret"])
+
+    def test_step_flags_win_in_either_form(self):
+        for argv in (["--host", "other.example.com"], ["--host=other.example.com"]):
+            with self.subTest(argv=argv):
+                self.assertEqual(step_argv({"command": "deploy", "argv": argv}, DEFAULTS),
+                                 argv + ["--token", "secret"])
+
+    def test_command_flag_names(self):
+        argv = step_argv({"command": "ospf", "argv": ["--api-key=mine"]}, DEFAULTS)
+        self.assertEqual(argv, ["--api-key=mine", "--fmc-url", "https://fmc.example.com"])
+
+
+if __name__ == "__main__":
+    unittest.main()
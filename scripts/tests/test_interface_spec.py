@@ -0,0 +1,109 @@
+"""Tests for the declarative interface spec and its diff helpers (python3 -m pytest scripts/tests)"""
+
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR / "interfaces"))
+
+from apply_interfaces import diff_interface, put_body
+from interface_spec import SpecError, build_plan, load_spec, prefix_length
+
+ZONES = {"WAN": "zone-wan", "LAN": "zone-lan"}
+
+
+def spec(*interfaces, **extra):
+    return dict({"devices": [{"id": "dev-1", "interfaces": list(interfaces)}]}, **extra)
+
+
+def live_interface(**overrides):
+    interface = {"id": "if-1", "name": "GigabitEthernet0/0", "type": "PhysicalInterface", "ifname": "WAN",
+                 "description": "PHY-Interface G0/0", "mode": "NONE", "enabled": True, "MTU": 1500,
+                 "securityZone": {"id": "zone-wan", "type": "SecurityZone"},
+                 "ipv4": {"static": {"address": "198.18.8.2", "netmask": "24"}},
+                 "links": {"self": "..."}, "metadata": {"timestamp": 1}}
+    interface.update(overrides)
+    return interface
+
+
+class BuildPlanTest(unittest.TestCase):
+
+    def assertProblems(self, value, *fragments):
+        with self.assertRaises(SpecError) as caught:
+            build_plan(value, ZONES)
+        for fragment in fragments:
+            self.assertTrue(any(fragment in error for error in caught.exception.errors),
+                            f"{fragment!r} not in {caught.exception.errors}")
+
+    def test_fields_are_normalized(self):
+        plan = build_plan(spec({"name": "GigabitEthernet0/0", "logical_name": "WAN", "security_zone": "WAN",
+                                "ipv4": "198.18.8.2/255.255.255.0", "mtu": "1500", "mode": "none"}), ZONES)
+        self.assertEqual(plan[0]["interfaces"]["GigabitEthernet0/0"], {
+            "logical_name": "WAN", "security_zone_id": "zone-wan", "ipv4_static_address": "198.18.8.2",
+            "ipv4_static_netmask": "24", "mtu": 1500, "mode": "NONE"})
+
+    def test_defaults_are_merged_under_each_interface(self):
+        plan = build_plan(spec({"name": "G0/0", "enabled": False}, {"name": "G0/1"},
+                               defaults={"mode": "NONE", "enabled": True}), ZONES)
+        interfaces = plan[0]["interfaces"]
+        self.assertEqual((interfaces["G0/0"]["enabled"], interfaces["G0/1"]["enabled"]), (False, True))
+        self.assertEqual(interfaces["G0/1"]["mode"], "NONE")
+
+    def test_non_string_keys_are_spec_errors(self):
+        self.assertProblems(load_spec("devices:\n  - id: dev-1\n    interfaces:\n      - name: G0/0\n        1500: mtu\n"),
+                            "interfaces[0].1500: unknown key")
+        self.assertProblems(spec({"name": "G0/0"}, defaults={1: "x"}), "interfaces[0].1: unknown key")
+
+    def test_invalid_values(self):
+        self.assertProblems(spec({"name": "G0/0", "mtu": 20, "mode": "ROUTED", "enabled": "yes",
+                                  "ipv4": "10.0.0.1", "security_zone": "DMZ"}),
+                            "invalid MTU", "invalid mode", "expected true or false", "expected ADDRESS/PREFIX",
+                            "zone 'DMZ' has no ID")
+        self.assertProblems(spec({"name": "G0/0", "ipv4_static_address": "10.0.0.300", "ipv4_static_netmask": 33}),
+                            "invalid IPv4 address", "invalid netmask")
+        self.assertProblems(spec({"name": "G0/0", "ipv4": "10.0.0.1/24", "ipv4_static_address": "10.0.0.1"}),
+                            "give ipv4 or ipv4_static_address")
+
+    def test_duplicates_on_a_device(self):
+        self.assertProblems(spec({"name": "G0/0"}, {"name": "G0/0"}), "G0/0 is listed twice")
+        self.assertProblems(spec({"name": "G0/0", "logical_name": "WAN"}, {"name": "G0/1", "logical_name": "wan"}),
+                            "wan is already used by G0/0")
+        self.assertProblems({"devices": [{"id": "dev-1", "interfaces": [{"name": "G0/0"}]},
+                                         {"id": "dev-1", "interfaces": [{"name": "G0/0"}]}]},
+                            "device dev-1 is already defined")
+
+    def test_prefix_length(self):
+        self.assertEqual([prefix_length(v) for v in ("255.255.255.0", 24, "/16", "255.0.255.0", True)],
+                         ["24", "24", "16", None, None])
+
+
+class DiffTest(unittest.TestCase):
+
+    def fields(self, **interface):
+        return build_plan(spec(dict({"name": "GigabitEthernet0/0"}, **interface)), ZONES)[0]["interfaces"][
+            "GigabitEthernet0/0"]
+
+    def test_matching_interface_has_no_drift(self):
+        fields = self.fields(logical_name="WAN", security_zone="WAN", ipv4="198.18.8.2/255.255.255.0", mtu=1500,
+                             description="PHY-Interface G0/0", enabled=True)
+        self.assertEqual(diff_interface(fields, live_interface()), {})
+
+    def test_drift_lists_live_and_wanted_values(self):
+        fields = self.fields(mtu=9000, security_zone="LAN", description="")
+        self.assertEqual(diff_interface(fields, live_interface(description=None)),
+                         {"mtu": (1500, 9000), "security_zone_id": ("zone-wan", "zone-lan")})
+
+    def test_put_body_replaces_nested_objects_and_drops_read_only_keys(self):
+        live = live_interface(ipv4={"dhcp": {"enableDefaultRouteDHCP": True}})
+        body = put_body(live, self.fields(ipv4="10.0.0.1/24", security_zone="LAN"))
+        self.assertEqual(body["ipv4"], {"static": {"address": "10.0.0.1", "netmask": "24"}})
+        self.assertEqual(body["securityZone"], {"id": "zone-lan", "type": "SecurityZone"})
+        self.assertEqual((body["ifname"], body["MTU"]), ("WAN", 1500))  # Keys not in the spec are kept
+        self.assertNotIn("links", body)
+        self.assertNotIn("metadata", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""Tests for the bulk object and static route loader (python3 -m pytest scripts/tests)"""
+
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR / "objects"))
+
+from fmc_spec import SpecError
+from load_objects import ObjectLoader, route_key, route_payload, validate_spec
+
+NETWORK = {"id": "id-net", "type": "Network", "name": "Branch"}
+GATEWAY = {"id": "id-gw", "type": "Host", "name": "En-Cat8Kv"}
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body=None, text=""):
+        self.status_code = status_code
+        self.body = body
+        self.text = text
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+        return self.body
+
+
+class FakeClient:
+    """Serves one listing for paginate and a fixed response for every POST"""
+
+    base_url = "https://fmc.example.com"
+
+    def __init__(self, listing=(), response=None):
+        self.listing = list(listing)
+        self.response = response
+        self.posts = []
+
+    def add_write_listener(self, listener):
+        pass
+
+    def add_not_found_listener(self, listener):
+        pass
+
+    def paginate(self, url, headers=None, expanded=False):
+        return iter(self.listing)
+
+    def post(self, url, headers=None, params=None, json=None):
+        self.posts.append(json)
+        return self.response
+
+
+def route(**changes):
+    return dict({"device_id": "dev-1", "interface": "WAN", "networks": ["Branch"], "gateway": "En-Cat8Kv",
+                 "metric": 1}, **changes)
+
+
+class ValidateSpecTest(unittest.TestCase):
+
+    def assertProblems(self, spec, *fragments):
+        with self.assertRaises(SpecError) as caught:
+            validate_spec(spec)
+        for fragment in fragments:
+            self.assertTrue(any(fragment in error for error in caught.exception.errors),
+                            f"{fragment!r} not in {caught.exception.errors}")
+        return caught.exception.errors
+
+    def test_values_are_normalized(self):
+        spec = validate_spec({"networks": [{"name": " Attacker ", "prefix": "198.18.14.7/24", "description": "x"}],
+                              "hosts": [{"name": "AWS1", "value": "169.254.6.1"}],
+                              "routes": [route(metric="5")]})
+        self.assertEqual(spec["networks"], [{"name": "Attacker", "type": "Network", "value": "198.18.14.0/24",
+                                             "description": "x"}])
+        self.assertEqual(spec["hosts"], [{"name": "AWS1", "type": "Host", "value": "169.254.6.1"}])
+        self.assertEqual(spec["routes"][0]["metric"], 5)
+
+    def test_names_are_unique_across_networks_and_hosts(self):
+        self.assertProblems({"networks": [{"name": "AWS1", "prefix": "10.0.0.0/8"}],
+                             "hosts": [{"name": "aws1", "ip": "10.0.0.1"}]},
+                            "hosts[0].name: aws1 is already defined at networks[0]")
+
+    def test_every_problem_is_reported_together(self):
+        errors = self.assertProblems({"networks": [{"prefix": "10.0.0.0/33"}], "hosts": ["AWS1"],
+                                      "routes": [{"networks": [], "metric": 255}, route(metric=True)]},
+                                     "networks[0].name: a name is required", "invalid prefix",
+                                     "hosts[0]: expected a mapping", "routes[0].device_id: required",
+                                     "routes[0].networks: at least one", "routes[0].metric: invalid metric 255",
+                                     "routes[1].metric: invalid metric True")
+        self.assertEqual(len(errors), 9)
+
+    def test_not_a_mapping(self):
+        self.assertProblems([], "must be a mapping")
+
+
+class RouteKeyTest(unittest.TestCase):
+
+    def payload(self, **changes):
+        return route_payload(route(**changes), {"Branch": NETWORK, "Other": dict(NETWORK, id="id-other"),
+                                                "En-Cat8Kv": GATEWAY}.__getitem__)
+
+    def test_live_route_matches_its_payload(self):
+        # As listed by FMC: extra keys, networks in another order, the metric as a string
+        live = {"id": "route-1", "type": "IPv4StaticRoute", "interfaceName": "WAN", "metricValue": "1",
+                "selectedNetworks": [dict(NETWORK, id="id-other"), NETWORK], "gateway": {"object": GATEWAY},
+                "links": {"self": "..."}}
+        self.assertEqual(route_key(self.payload(networks=["Branch", "Other"])), route_key(live))
+
+    def test_literal_and_object_gateways(self):
+        literal = self.payload(gateway="198.18.8.1")
+        self.assertEqual(literal["gateway"], {"literal": {"type": "Host", "value": "198.18.8.1"}})
+        self.assertEqual(route_key(literal)[2], "198.18.8.1")
+        self.assertEqual(route_key(self.payload())[2], "id-gw")
+
+    def test_what_makes_routes_differ(self):
+        key = route_key(self.payload())
+        for changes in ({"interface": "LAN"}, {"networks": ["Other"]}, {"gateway": "198.18.8.1"}, {"metric": 2}):
+            self.assertNotEqual(route_key(self.payload(**changes)), key, changes)
+
+
+class ObjectLoaderTest(unittest.TestCase):
+
+    def loader(self, client):
+        loader = ObjectLoader(client, {})
+        loader.known = {"Branch": NETWORK, "En-Cat8Kv": GATEWAY}
+        return loader
+
+    def test_only_missing_routes_are_posted(self):
+        live = route_payload(route(), {"Branch": NETWORK, "En-Cat8Kv": GATEWAY}.__getitem__)
+        client = FakeClient([live], FakeResponse(201, {}))
+        result = self.loader(client)._device_routes("dev-1", [route(), route(metric=2), route(metric="2")])
+        self.assertEqual((result["existing"], result["created"], result["errors"]), (2, 1, []))
+        self.assertEqual([payload["metricValue"] for payload in client.posts], [2])
+
+    def test_unknown_route_network(self):
+        result = self.loader(FakeClient())._device_routes("dev-1", [route(networks=["Nope"])])
+        self.assertEqual(result["errors"], ["WAN -> Nope via En-Cat8Kv: unknown network or host 'Nope'"])
+
+    def test_bulk_response_that_is_not_json_fails_its_chunk(self):
+        loader = self.loader(FakeClient(response=FakeResponse(201, text="<html>")))
+        created, errors = loader.create_objects("hosts", [{"name": "AWS1", "type": "Host", "value": "169.254.6.1"}])
+        self.assertEqual(created, [])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith("hosts 1-1: Expecting value"), errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
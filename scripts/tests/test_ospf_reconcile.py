@@ -0,0 +1,132 @@
+"""Tests for the OSPF --reconcile diff and the per-device job runner (python3 -m pytest scripts/tests)"""
+
+import contextlib
+import io
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR / "ospf"))
+
+import cdfmc_ospf_automation as ospf
+
+NETWORKS = [{"type": "Network", "id": f"id-{name}", "name": name} for name in ("Attacker", "DMZ", "Outside")]
+
+
+def live_config(networks=NETWORKS, **changes):
+    """An OspfRoute as FMC returns it: with an ID, scalars echoed with their own types"""
+    live = dict(ospf.build_ospf_payload(networks), id="ospf-1", processId=1)
+    live.update(changes)
+    live["links"] = {"self": "..."}
+    return live
+
+
+def area(area_id, networks=NETWORKS, area_type="normal"):
+    return {"areaId": area_id, "areaType": {"type": area_type}, "areaNetworks": list(networks)}
+
+
+class FakeAPI:
+    """Stands in for CdFMCRestAPI: serves one OSPF listing and records writes"""
+
+    def __init__(self, routes=(), fail_listing=False):
+        self.routes = list(routes)
+        self.fail_listing = fail_listing
+        self.created, self.updated = [], []
+
+    def get_existing_ospf_routes(self, device_id, expanded=False, strict=False):
+        if self.fail_listing:
+            raise TimeoutError("timed out")
+        return self.routes
+
+    def create_fresh_ospf_configuration(self, device_id, found_networks):
+        self.created.append(device_id)
+        return {"id": "new"}
+
+    def update_ospf_route(self, device_id, ospf_id, found_networks=None, payload=None):
+        self.updated.append((device_id, ospf_id, found_networks))
+        return {"id": ospf_id}
+
+
+class DiffTest(unittest.TestCase):
+
+    def test_no_drift(self):
+        self.assertEqual(ospf.diff_ospf_config(ospf.build_ospf_payload(NETWORKS), live_config()), [])
+
+    def test_area_network_order_is_ignored(self):
+        self.assertEqual(ospf.diff_ospf_config(ospf.build_ospf_payload(NETWORKS),
+                                               live_config(list(reversed(NETWORKS)))), [])
+
+    def test_changed_networks(self):
+        drift = ospf.diff_ospf_config(ospf.build_ospf_payload(NETWORKS), live_config(NETWORKS[:2]))
+        self.assertEqual(drift, ["areas[0].areaNetworks (+1 -0)"])
+
+    def test_area_added_or_removed(self):
+        self.assertEqual(ospf.diff_ospf_areas([area("0"), area("1")], [area(0)]), ["areas[1] (missing)"])
+        self.assertEqual(ospf.diff_ospf_areas([area("0")], [area("0"), area("1")]), ["areas[1] (unexpected)"])
+
+    def test_area_type_and_scalar_fields(self):
+        self.assertEqual(ospf.diff_ospf_areas([area("0")], [area("0", area_type="stub")]), ["areas[0].areaType"])
+        drift = ospf.diff_ospf_config(ospf.build_ospf_payload(NETWORKS), live_config(enableProcess="PROCESS_2"))
+        self.assertEqual(drift, ["enableProcess"])
+
+
+class ReconcileTest(unittest.TestCase):
+
+    def reconcile(self, api):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return ospf.reconcile_device_ospf(api, "dev-1", NETWORKS)
+
+    def test_unchanged_sends_no_write(self):
+        api = FakeAPI([live_config(list(reversed(NETWORKS)))])
+        self.assertEqual(self.reconcile(api), {"ok": True, "detail": "unchanged"})
+        self.assertEqual((api.created, api.updated), ([], []))
+
+    def test_drift_is_updated_in_place(self):
+        api = FakeAPI([live_config(NETWORKS[:1])])
+        result = self.reconcile(api)
+        self.assertTrue(result["ok"])
+        self.assertEqual(api.updated, [("dev-1", "ospf-1", NETWORKS)])
+        self.assertEqual(api.created, [])
+
+    def test_missing_process_is_created(self):
+        api = FakeAPI([live_config(processId=2)])
+        self.assertEqual(self.reconcile(api)["detail"], "created")
+        self.assertEqual(api.created, ["dev-1"])
+
+    def test_failed_listing_creates_nothing(self):
+        api = FakeAPI(fail_listing=True)
+        self.assertFalse(self.reconcile(api)["ok"])
+        self.assertEqual((api.created, api.updated), ([], []))
+
+
+class RunDeviceJobsTest(unittest.TestCase):
+
+    def test_output_is_grouped_per_device_without_touching_stdout(self):
+        barrier = threading.Barrier(4)
+
+        def work(device_id, value):
+            ospf.log(f"{device_id} start")
+            barrier.wait(timeout=10)  # All jobs are running at once here
+            ospf.log(f"{device_id} end")
+            return {"ok": True, "networks": value}
+
+        jobs = {f"dev-{n}": n for n in range(4)}
+        out = io.StringIO()
+        stdout = sys.stdout
+        with contextlib.redirect_stdout(out):
+            results = ospf.run_device_jobs(jobs, 4, work)
+            self.assertIs(sys.stdout, out)
+        self.assertIs(sys.stdout, stdout)
+        self.assertEqual([(r["device_id"], r["networks"]) for r in results], list(jobs.items()))
+        lines = [line for line in out.getvalue().splitlines() if line.startswith("dev-")]
+        self.assertEqual(len(lines), 8)
+        for n in range(0, len(lines), 2):
+            device = lines[n].split()[0]
+            self.assertEqual(lines[n:n + 2], [f"{device} start", f"{device} end"])
+
+
+if __name__ == "__main__":
+    unittest.main()
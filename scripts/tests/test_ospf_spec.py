@@ -0,0 +1,95 @@
+"""Tests for the declarative OSPF spec (python3 -m pytest scripts/tests)"""
+
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR / "ospf"))
+
+from ospf_spec import SpecError, build_plan, ospf_route_payload
+
+NETWORK_IDS = {"attacker_id": "id-attacker", "data_center_id": "id-dc", "Outside": "id-outside"}
+
+
+def spec(*processes, **device):
+    return {"devices": [dict({"id": "dev-1", "processes": list(processes)}, **device)]}
+
+
+def area(area_id=0, area_type="normal", networks=("Attacker",)):
+    return {"id": area_id, "type": area_type, "networks": list(networks)}
+
+
+class BuildPlanTest(unittest.TestCase):
+
+    def assertProblems(self, value, *fragments):
+        with self.assertRaises(SpecError) as caught:
+            build_plan(value, NETWORK_IDS)
+        for fragment in fragments:
+            self.assertTrue(any(fragment in error for error in caught.exception.errors),
+                            f"{fragment!r} not in {caught.exception.errors}")
+        return caught.exception.errors
+
+    def test_payload_matches_the_shared_builder(self):
+        plan = build_plan(spec({"id": 1, "areas": [area(networks=["Attacker", "Data-Center"])]}), NETWORK_IDS)
+        networks = [{"type": "Network", "id": "id-attacker", "name": "Attacker"},
+                    {"type": "Network", "id": "id-dc", "name": "Data-Center"}]
+        self.assertEqual(plan[0]["payloads"], [ospf_route_payload(1, [{"areaId": "0", "type": "normal",
+                                                                       "networks": networks}])])
+        self.assertEqual(plan[0]["payloads"][0]["logAdjacencyChanges"], {"logType": "DEFAULT"})
+        self.assertEqual(plan[0]["networks"], 2)
+
+    def test_process_ids(self):
+        plan = build_plan(spec({"id": 1, "areas": [area()]}, {"id": "2", "areas": [area(1, networks=["Outside"])]}),
+                          NETWORK_IDS)
+        self.assertEqual([p["processId"] for p in plan[0]["payloads"]], ["1", "2"])
+        self.assertProblems(spec({"id": 3, "areas": [area()]}), "invalid process ID 3")
+        self.assertProblems(spec({"id": 1, "areas": [area()]}, {"id": 1, "areas": [area(1, networks=["Outside"])]}),
+                            "process 1 is defined twice")
+
+    def test_area_types(self):
+        plan = build_plan(spec({"id": 1, "areas": [area(), area("0.0.0.5", "NSSA", ["Outside"])]}), NETWORK_IDS)
+        self.assertEqual([a["areaType"]["type"] for a in plan[0]["payloads"][0]["areas"]], ["normal", "nssa"])
+        self.assertProblems(spec({"id": 1, "areas": [area(0, "stub")]}), "backbone area 0 must be normal")
+        self.assertProblems(spec({"id": 1, "areas": [area("0.0.0.0", "nssa")]}), "backbone area 0 must be normal")
+        self.assertProblems(spec({"id": 1, "areas": [area(1, "totally-stubby")]}), "invalid area type")
+        self.assertProblems(spec({"id": 1, "areas": [area(2 ** 32)]}), "invalid area ID")
+
+    def test_network_resolution(self):
+        plan = build_plan({"networks": {"Lab": "id-lab", "Outside": "id-spec-outside"},
+                           **spec({"id": 1, "areas": [area(networks=[
+                               "Lab", "Outside", "Data-Center", {"id": "id-host", "name": "AWS1", "type": "Host"}])]})},
+                          NETWORK_IDS)
+        networks = plan[0]["payloads"][0]["areas"][0]["areaNetworks"]
+        self.assertEqual([(n["id"], n["type"]) for n in networks],
+                         [("id-lab", "Network"), ("id-spec-outside", "Network"), ("id-dc", "Network"),
+                          ("id-host", "Host")])
+        self.assertProblems(spec({"id": 1, "areas": [area(networks=["Unknown"])]}), "'Unknown' has no ID")
+        self.assertProblems(spec({"id": 1, "areas": [area(networks=[{"id": "x", "type": "Range"}])]}),
+                            "invalid network type")
+
+    def test_duplicate_networks_across_areas_and_processes(self):
+        self.assertProblems(spec({"id": 1, "areas": [area(), area(1)]}), "Attacker (id-attacker) is already in")
+        self.assertProblems(spec({"id": 1, "areas": [area()]}, {"id": 2, "areas": [area(1, networks=["attacker_id"])]}),
+                            "is already in devices[0].processes[0].areas[0]")
+        # The same network on another device is fine
+        plan = build_plan({"devices": [{"id": "dev-1", "processes": [{"id": 1, "areas": [area()]}]},
+                                       {"id": "dev-2", "processes": [{"id": 1, "areas": [area()]}]}]}, NETWORK_IDS)
+        self.assertEqual(len(plan), 2)
+
+    def test_every_problem_is_reported_together(self):
+        errors = self.assertProblems({"devices": [{"processes": [{"id": 5, "areas": [area(0, "stub", ["Nope"])]}]},
+                                                  {"id": "dev-2"}]},
+                                     "device ID is required", "invalid process ID", "backbone area",
+                                     "'Nope' has no ID", "devices[1].processes: no processes")
+        self.assertEqual(len(errors), 5)
+
+    def test_defaults_processes(self):
+        plan = build_plan({"defaults": {"processes": [{"id": 1, "areas": [area()]}]},
+                           "devices": [{"id": "dev-1"}, {"id": "dev-2"}]}, NETWORK_IDS)
+        self.assertEqual([len(device["payloads"]) for device in plan], [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
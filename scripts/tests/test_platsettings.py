@@ -0,0 +1,86 @@
+"""Tests for platform settings assignment (python3 -m pytest scripts/tests)"""
+
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / "common"))
+sys.path.insert(0, str(SCRIPTS_DIR / "benchmark"))
+sys.path.insert(0, str(SCRIPTS_DIR / "config-import"))
+
+import platsettings
+from mock_fmc import MockFMCServer
+
+POLICY = ("policy-1", "FTDPlatformSettingsPolicy", "vFTD-platform-policy")
+
+
+class ParseListArgsTest(unittest.TestCase):
+
+    def test_json_lists_and_comma_separated_values(self):
+        self.assertEqual(platsettings.parse_list_args(['["a", "b"]', "b, c", " d "]), ["a", "b", "c", "d"])
+        self.assertEqual(platsettings.parse_list_args(None), [])
+
+    def test_malformed_json_is_a_usage_error(self):
+        with self.assertRaises(ValueError):
+            platsettings.parse_list_args(['["a",'])
+        with contextlib.redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit) as caught:
+            platsettings.main(["--host", "fmc.example.com", "--platformpolicy_name", "p", "--deviceid", '["a",'])
+        self.assertEqual(caught.exception.code, 2)
+        self.assertIn("--deviceid", err.getvalue())
+
+
+class AttachToDevicesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockFMCServer()
+        self.server.start()
+        platsettings.headers = {"Authorization": "Bearer test"}
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def attach(self, device_ids):
+        policy_id, policy_type, name = POLICY
+        with contextlib.redirect_stdout(io.StringIO()):
+            return platsettings.attach_to_devices(self.server.url, policy_id, policy_type, name, device_ids)
+
+    def requests(self):
+        return [(entry["method"], entry["status"]) for entry in self.server.state.snapshot_log()
+                if "policyassignments" in entry["endpoint"]]
+
+    def targets(self):
+        return [target["id"] for target in self.server.state.assignments[POLICY[0]]["targets"]]
+
+    def test_new_assignment_is_posted(self):
+        self.assertTrue(self.attach(["d1", "d2"]))
+        self.assertEqual(self.requests(), [("GET", 404), ("POST", 201)])
+        self.assertEqual(self.targets(), ["d1", "d2"])
+
+    def test_existing_assignment_is_merged_with_put(self):
+        self.attach(["d1", "d2"])
+        self.server.state.log.clear()
+        self.assertTrue(self.attach(["d2", "d3"]))
+        self.assertEqual(self.requests(), [("GET", 200), ("PUT", 200)])
+        self.assertEqual(self.targets(), ["d1", "d2", "d3"])
+
+    def test_nothing_to_add_sends_no_write(self):
+        self.attach(["d1", "d2"])
+        self.server.state.log.clear()
+        self.assertTrue(self.attach(["d2"]))
+        self.assertEqual(self.requests(), [("GET", 200)])
+
+    def test_rejected_write_fails(self):
+        # The lookup misses an assignment the server has, so its POST is rejected
+        self.attach(["d1"])
+        with mock.patch.object(platsettings, "get_policy_assignment", return_value=None), \
+                contextlib.redirect_stderr(io.StringIO()) as err:
+            self.assertFalse(self.attach(["d2"]))
+        self.assertIn("Failed to attach", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()